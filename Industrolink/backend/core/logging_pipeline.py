@@ -0,0 +1,81 @@
+import logging
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of the records from chatty loggers. `rates` maps
+    logger names to the share of records kept (0.0 - 1.0); child loggers
+    inherit their parent's rate. Warnings and above are never dropped.
+    """
+
+    def __init__(self, rates=None, default_rate=1.0):
+        super().__init__()
+        self.rates = rates or {}
+        self.default_rate = default_rate
+        self._resolved = {}
+
+    def rate_for(self, name):
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = self.default_rate
+            parts = name.split('.')
+            for i in range(len(parts), 0, -1):
+                prefix = '.'.join(parts[:i])
+                if prefix in self.rates:
+                    rate = self.rates[prefix]
+                    break
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate_for(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class BackgroundStreamHandler(QueueHandler):
+    """
+    Puts records on a bounded in-memory queue; a QueueListener thread
+    formats them and writes them to the stream. The request thread only
+    pays for the enqueue. When the queue is full, records are dropped
+    and counted rather than blocking the request.
+    """
+
+    def __init__(self, stream=None, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.dropped = 0
+        self.target = logging.StreamHandler(stream or sys.stderr)
+        self.listener = QueueListener(self.queue, self.target, respect_handler_level=True)
+        self.listener.start()
+        self._listening = True
+
+    def setFormatter(self, fmt):
+        # Formatting happens on the listener thread, in the target handler
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # The queue never leaves the process, so the record can travel
+        # as-is; QueueHandler.prepare would format it on this thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        # Called by logging.shutdown() at exit; drains what is queued
+        if self._listening:
+            self._listening = False
+            try:
+                self.listener.stop()
+            except queue.Full:
+                pass
+        super().close()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -74,6 +75,11 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# The API authenticates with JWT cookies only. Sessions are left for the
+# Django admin site and live in a signed cookie, so no django_session rows
+# are written (existing ones can be removed with `manage.py clearsessions`).
+SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+
 # CORS_ALLOW_ALL_ORIGINS = True  # Only for development!
 
 CORS_ALLOWED_ORIGINS = [
@@ -125,6 +131,29 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',    
 }
 
+# In-process cache of validated access tokens (see users/token_cache.py)
+TOKEN_CACHE_MAX_ENTRIES = 2048
+TOKEN_CACHE_TTL_SECONDS = 60
+# How long User.token_epoch values stay cached for revocation checks. With
+# a per-process cache this is how long other workers can miss a change.
+TOKEN_EPOCH_CACHE_SECONDS = 60
+
+# Per-user token epochs (users/tokens.py) live in the default cache. Set
+# REDIS_URL in production so every worker sees an epoch change immediately.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 
 
 
@@ -218,6 +247,63 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Logging
+# Records go through a queue to a background thread, so request threads
+# never format or write log lines. LOG_SAMPLE_RATES keeps only a share of
+# the DEBUG/INFO records of chatty loggers; warnings are always kept.
+LOG_LEVEL = 'INFO'
+LOG_SAMPLE_RATES = {
+    'users.authentication': 0.01,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'sample': {
+            '()': 'core.logging_pipeline.SamplingFilter',
+            'rates': LOG_SAMPLE_RATES,
+        },
+        'require_debug_false': {
+            '()': 'django.utils.log.RequireDebugFalse',
+        },
+    },
+    'formatters': {
+        'standard': {
+            'format': '%(asctime)s %(levelname)s %(name)s: %(message)s',
+        },
+    },
+    'handlers': {
+        'background': {
+            '()': 'core.logging_pipeline.BackgroundStreamHandler',
+            'formatter': 'standard',
+            'filters': ['sample'],
+        },
+        'mail_admins': {
+            'level': 'ERROR',
+            'filters': ['require_debug_false'],
+            'class': 'django.utils.log.AdminEmailHandler',
+        },
+    },
+    'root': {
+        'handlers': ['background'],
+        'level': LOG_LEVEL,
+    },
+    'loggers': {
+        # Replaces Django's default console handler, which would print every
+        # django.* record a second time next to the root handler
+        'django': {
+            'handlers': ['mail_admins'],
+            'level': 'INFO',
+            'propagate': True,
+        },
+        # Per-request authentication tracing; set to DEBUG to enable it
+        'users.authentication': {
+            'level': 'INFO',
+        },
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -238,9 +324,83 @@ EMAIL_VERIFICATION_TOKEN_EXPIRE_HOURS = 24
 EMAIL_VERIFICATION_SUBJECT = 'Verify Your Email - Industrolink'
 EMAIL_VERIFICATION_FROM_EMAIL = 'noreply@industrolink.com'
 
+# Server-sent verification status stream (users/async_views.py)
+VERIFICATION_STREAM_KEEPALIVE_SECONDS = 15
+VERIFICATION_STREAM_RECHECK_SECONDS = 60
+VERIFICATION_STREAM_MAX_SECONDS = 600
+
+# How long the password-set links emailed to imported users stay valid
+PASSWORD_RESET_TIMEOUT = 60 * 60 * 24 * 7  # 7 days
+
 # Frontend URL for email verification links
 FRONTEND_URL = 'http://localhost:5173'  # Your Vite dev server URL
 
+# Email outbox worker (python manage.py send_outbox --loop)
+EMAIL_OUTBOX_BATCH_SIZE = 100
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = 30
+EMAIL_OUTBOX_LEASE_SECONDS = 300
+
+# Sliding-window limits for login and email verification (users/throttling.py)
+AUTH_THROTTLE_RATES = {
+    'login_ip': '20/min',
+    'login_email': '5/min',
+    'verification_ip': '30/min',
+    'verification_email': '10/min',
+}
+# Set to a cache alias backed by Redis/Memcached to share limits across workers
+AUTH_THROTTLE_CACHE = None
+
+# Process pool used by the async auth views (users/hashing.py). Workers
+# default to the CPU count; jobs beyond MAX_PENDING get a 503.
+PASSWORD_HASH_WORKERS = None
+PASSWORD_HASH_MAX_PENDING = None
+
+# Bulk cohort imports (systemadmin/provisioning.py): rows per bulk_create.
+# Uploads are imported by `manage.py run_cohort_imports --loop`.
+PROVISIONING_CHUNK_SIZE = 500
+
+# Admin session polls record a session_verification audit row at most once
+# per admin per this many seconds
+ADMIN_SESSION_AUDIT_SECONDS = 900
+
+# Per-student dashboard statistics (students/stats.py); entries are also
+# dropped whenever one of the student's tasks changes. Without REDIS_URL
+# every worker has its own cache and only sees its own drops, so entries
+# must expire quickly.
+TASK_STATS_CACHE_SECONDS = 3600 if os.environ.get('REDIS_URL') else 60
+
+# Rows fetched per round trip by the streaming logbook export
+LOGBOOK_EXPORT_CHUNK_SIZE = 2000
+
+# In-process tools/skills autocomplete (students/autocomplete.py): suggestions
+# per keystroke, and how often each process reloads usage from the database
+TERM_AUTOCOMPLETE_MAX_RESULTS = 10
+TERM_AUTOCOMPLETE_REFRESH_SECONDS = 900
+
+# Near-duplicate task detection (students/duplicates.py). BANDS x ROWS is the
+# MinHash signature length; changing either needs `manage.py
+# rebuild_task_fingerprints`. The threshold is the default minimum similarity.
+NEAR_DUPLICATE_BANDS = 16
+NEAR_DUPLICATE_ROWS = 4
+NEAR_DUPLICATE_THRESHOLD = 0.8
+# Each task is compared with at most this many others sharing a bucket
+NEAR_DUPLICATE_BUCKET_LIMIT = 50
+
+# In-process task category lookup by name (students/categories.py); local
+# changes clear it at once, other processes' after this many seconds
+TASK_CATEGORY_CACHE_MAX_ENTRIES = 1024
+TASK_CATEGORY_CACHE_SECONDS = 300
+
+# In-memory filter in front of the refresh-token blacklist (users/blacklist.py).
+# Run `manage.py prune_tokens` on a schedule to delete expired token rows.
+TOKEN_BLACKLIST_FILTER_CAPACITY = 100000
+TOKEN_BLACKLIST_FILTER_SYNC_SECONDS = 5
+TOKEN_BLACKLIST_FILTER_REBUILD_SECONDS = 3600
+# Each sync re-reads this many ids back for rows that committed late
+TOKEN_BLACKLIST_FILTER_TRAILING_IDS = 1000
+TOKEN_PRUNE_CHUNK_SIZE = 1000
+
 
 
 
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Load the tools/skills autocomplete before the first keystroke needs it
+from students.autocomplete import term_autocomplete  # noqa: E402
+
+term_autocomplete.warm()
@@ -0,0 +1,36 @@
+from datetime import date
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from .models import DailyTask
+from .serializers import DailyTaskSerializer
+from users.async_views import get_request_user, not_authenticated
+
+
+@require_GET
+async def today_task_async_view(request):
+    """Async TodayTaskView for dashboards polling through core/asgi.py"""
+    user = await get_request_user(request)
+    if user is None:
+        return not_authenticated()
+    
+    # Everything the serializer touches is joined so .data needs no queries
+    task = None
+    if user.role == 'student':
+        task = await (
+            DailyTask.objects
+            .select_related('student__user', 'task_category', 'supervisor')
+            .filter(student__user=user, date=date.today())
+            .afirst()
+        )
+    
+    if task is None:
+        return JsonResponse({
+            'message': 'No task entry found for today',
+            'has_task': False
+        }, status=404)
+    
+    return JsonResponse({
+        'has_task': True,
+        'task': DailyTaskSerializer(task).data
+    })
@@ -0,0 +1,183 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Count
+
+from .models import TaskTerm
+
+logger = logging.getLogger(__name__)
+
+
+class _Node:
+    __slots__ = ('children', 'best')
+
+    def __init__(self):
+        self.children = {}
+        # Names of the most used terms under this node, best first
+        self.best = []
+
+
+class TermTrie:
+    """
+    Prefix trie over the names of one kind of term, weighted by usage.
+    Every node keeps its `top` best completions, so a lookup is a walk down
+    the prefix and a slice. Each term is reachable from the start of every
+    word in it ("vs code" from "co" as well as "vs").
+
+    Usage that only goes down (edited or deleted tasks) can leave a node
+    listing fewer than `top` names until the next rebuild.
+    """
+
+    def __init__(self, top=10):
+        self.top = top
+        self._root = _Node()
+        # name -> [display_name, uses]
+        self._terms = {}
+
+    def _rank(self, name):
+        return (-self._terms[name][1], name)
+
+    def _nodes(self, name):
+        """Every node on the paths to `name` from each of its word starts"""
+        for i in range(len(name)):
+            if i and name[i - 1] != ' ':
+                continue
+            node = self._root
+            for char in name[i:]:
+                node = node.children.setdefault(char, _Node())
+                yield node
+
+    def load(self, terms):
+        """Fill an empty trie from (name, display_name, uses) in one pass"""
+        for name, display_name, uses in terms:
+            if uses > 0:
+                self._terms[name] = [display_name, uses]
+        for name in sorted(self._terms, key=self._rank):
+            for node in self._nodes(name):
+                if len(node.best) < self.top and name not in node.best:
+                    node.best.append(name)
+
+    def add(self, name, display_name, delta):
+        entry = self._terms.get(name)
+        if entry is None:
+            if delta <= 0:
+                return
+            entry = self._terms[name] = [display_name, 0]
+        entry[1] += delta
+
+        if entry[1] <= 0:
+            for node in self._nodes(name):
+                if name in node.best:
+                    node.best.remove(name)
+            del self._terms[name]
+            return
+
+        for node in self._nodes(name):
+            if name not in node.best:
+                node.best.append(name)
+            node.best.sort(key=self._rank)
+            del node.best[self.top:]
+
+    def complete(self, prefix, limit):
+        """[(name, display_name, uses)] for the best terms starting with `prefix`"""
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return [(name, *self._terms[name]) for name in node.best[:limit]]
+
+
+class TermAutocomplete:
+    """
+    In-process autocomplete over the tools/skills vocabulary. The tries
+    are loaded when a worker starts (core/wsgi.py, core/asgi.py) or on
+    first use, and rebuilt every `refresh_seconds` to pick up other
+    processes' writes; this process's own writes are applied as they
+    commit (students/vocabulary.py). Only one caller at a time rebuilds,
+    and the rest keep answering from the old tries meanwhile.
+    """
+
+    def __init__(self, top=10, refresh_seconds=900):
+        self.top = top
+        self.refresh_seconds = refresh_seconds
+        self._tries = None
+        self._built_at = 0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def complete(self, kind, prefix, limit=None):
+        """Suggestions for an already normalized prefix (see normalize_term)"""
+        limit = min(limit or self.top, self.top)
+        if self._tries is None or time.monotonic() - self._built_at > self.refresh_seconds:
+            self._refresh()
+        with self._lock:
+            trie = self._tries.get(kind) if self._tries is not None else None
+            return trie.complete(prefix, limit) if trie is not None and prefix else []
+
+    def _refresh(self):
+        # Only the very first load makes other callers wait
+        if not self._refresh_lock.acquire(blocking=self._tries is None):
+            return
+        try:
+            if self._tries is not None and time.monotonic() - self._built_at <= self.refresh_seconds:
+                # Another caller rebuilt while this one waited
+                return
+            if self._tries is None:
+                self.rebuild()
+                return
+            try:
+                self.rebuild()
+            except Exception:
+                # Keep serving the old tries; the next lookup tries again
+                logger.exception('Could not rebuild the term autocomplete')
+        finally:
+            self._refresh_lock.release()
+
+    def warm(self):
+        """Load the tries ahead of the first lookup"""
+        try:
+            self._refresh()
+        except Exception:
+            logger.exception('Could not load the term autocomplete')
+
+    def record(self, changes):
+        """Apply {(kind, name): (display_name, delta)} usage changes"""
+        with self._lock:
+            if self._tries is None:
+                # Nothing loaded yet; the first lookup reads the changes
+                return
+            for (kind, name), (display_name, delta) in changes.items():
+                self._tries.setdefault(kind, TermTrie(self.top)).add(name, display_name, delta)
+
+    def rebuild(self):
+        rows = {kind: [] for kind, _ in TaskTerm.KIND_CHOICES}
+        terms = (
+            TaskTerm.objects
+            .annotate(uses=Count('task_links'))
+            .filter(uses__gt=0)
+            .values_list('kind', 'name', 'display_name', 'uses')
+        )
+        for kind, name, display_name, uses in terms.iterator():
+            rows.setdefault(kind, []).append((name, display_name, uses))
+
+        tries = {}
+        for kind, kind_rows in rows.items():
+            tries[kind] = TermTrie(self.top)
+            tries[kind].load(kind_rows)
+        with self._lock:
+            self._tries = tries
+            self._built_at = time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._tries = None
+            self._built_at = 0
+
+
+term_autocomplete = TermAutocomplete(
+    top=getattr(settings, 'TERM_AUTOCOMPLETE_MAX_RESULTS', 10),
+    refresh_seconds=getattr(settings, 'TERM_AUTOCOMPLETE_REFRESH_SECONDS', 900),
+)
@@ -0,0 +1,80 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db.models.functions import Lower
+
+from .models import TaskCategory
+
+
+def category_key(name):
+    """What the unique index on lower(name) compares; names are stored stripped"""
+    return name.strip().lower()
+
+
+class CategoryResolver:
+    """
+    In-process cache of task categories by case-insensitive name, so
+    resolving the category of a task submission is usually a dict lookup.
+    Entries are dropped whenever a category is saved or deleted in this
+    process (students/signals.py) and expire after `ttl` seconds to pick up
+    other processes' changes.
+    """
+
+    def __init__(self, max_entries=1024, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._fields = [field.attname for field in TaskCategory._meta.concrete_fields]
+        # key -> (field values, expires_at)
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        """The category called `name` in any case, or None"""
+        key = category_key(name)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[1] > now:
+            return TaskCategory.from_db(TaskCategory.objects.db, self._fields, entry[0])
+
+        # lower(name) = key is what the functional unique index covers
+        values = (
+            TaskCategory.objects
+            .alias(lower_name=Lower('name'))
+            .filter(lower_name=key)
+            .values_list(*self._fields)
+            .first()
+        )
+        if values is None:
+            return None
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = (values, now + self.ttl)
+        return TaskCategory.from_db(TaskCategory.objects.db, self._fields, values)
+
+    def get_or_create(self, name, **defaults):
+        """
+        (category, created) for `name`. A missing category is added with a
+        single INSERT ... ON CONFLICT DO NOTHING, so concurrent submissions
+        of the same new name end up with the same row.
+        """
+        category = self.get(name)
+        if category is not None:
+            return category, False
+
+        new = TaskCategory(name=name.strip(), **defaults)
+        TaskCategory.objects.bulk_create([new], ignore_conflicts=True)
+        category = self.get(name)
+        return category, category.pk == new.pk
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+category_resolver = CategoryResolver(
+    max_entries=getattr(settings, 'TASK_CATEGORY_CACHE_MAX_ENTRIES', 1024),
+    ttl=getattr(settings, 'TASK_CATEGORY_CACHE_SECONDS', 300),
+)
@@ -0,0 +1,198 @@
+"""
+Near-duplicate detection for DailyTask descriptions.
+
+Each description is reduced to the set of its three-word shingles and
+summarized by a MinHash signature: the fraction of positions where two
+signatures agree estimates the Jaccard similarity of the shingle sets.
+The signature is cut into NEAR_DUPLICATE_BANDS bands of
+NEAR_DUPLICATE_ROWS values and each band is hashed to a bucket
+(locality-sensitive hashing). Similar descriptions very likely share at
+least one bucket, so candidates come from an indexed self-join on
+(band, bucket) instead of comparing every pair of tasks. Candidates are
+then checked against the threshold using their signatures.
+
+Changing the band settings changes every bucket; run
+`manage.py rebuild_task_fingerprints` afterwards.
+"""
+import hashlib
+import random
+import re
+import struct
+from functools import lru_cache
+from itertools import groupby
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+
+from .models import DailyTaskBand, DailyTaskFingerprint
+
+# DailyTask fields a fingerprint is built from
+FINGERPRINT_SOURCE_FIELDS = {'description', 'student', 'student_id'}
+SHINGLE_SIZE = 3
+# Mersenne prime modulus of the (a * x + b) mod p permutations
+_PRIME = (1 << 61) - 1
+# Fixed seed: signatures must be comparable across processes and restarts
+_SEED = 20250101
+
+
+def _bands():
+    return (
+        getattr(settings, 'NEAR_DUPLICATE_BANDS', 16),
+        getattr(settings, 'NEAR_DUPLICATE_ROWS', 4),
+    )
+
+
+@lru_cache(maxsize=None)
+def _permutations(count):
+    rng = random.Random(_SEED)
+    return [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(count)]
+
+
+def _hash64(data):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+
+def shingles(text):
+    """Case-folded word n-grams of `text`; short texts are a single shingle"""
+    words = re.findall(r'\w+', (text or '').casefold())
+    if len(words) <= SHINGLE_SIZE:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text):
+    """MinHash signature of `text` as a list of ints, or None when it has no words"""
+    hashes = [_hash64(shingle.encode()) for shingle in shingles(text)]
+    if not hashes:
+        return None
+    bands, rows = _bands()
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _permutations(bands * rows)]
+
+
+def pack(signature):
+    return struct.pack(f'>{len(signature)}Q', *signature)
+
+
+def unpack(data):
+    data = bytes(data)
+    return struct.unpack(f'>{len(data) // 8}Q', data)
+
+
+def band_buckets(signature):
+    """(band, bucket) for each LSH band of a signature"""
+    bands, rows = _bands()
+    for band in range(bands):
+        chunk = pack(signature[band * rows:(band + 1) * rows])
+        # Signed, to fit a BigIntegerField
+        bucket = _hash64(bytes([band]) + chunk)
+        yield band, bucket - (1 << 64) if bucket >= 1 << 63 else bucket
+
+
+def similarity(first, second):
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+
+def fingerprint_tasks(tasks, created=False):
+    """
+    Store the signature and bands of `tasks`. `created` says the tasks are
+    new, so there is nothing to replace.
+    """
+    tasks = list(tasks)
+    if not tasks:
+        return
+
+    if not created:
+        pks = [task.pk for task in tasks]
+        DailyTaskFingerprint.objects.filter(task__in=pks).delete()
+        DailyTaskBand.objects.filter(task__in=pks).delete()
+
+    fingerprints, bands = [], []
+    for task in tasks:
+        signature = minhash(task.description)
+        if signature is None:
+            continue
+        fingerprints.append(DailyTaskFingerprint(task_id=task.pk, signature=pack(signature)))
+        bands.extend(
+            DailyTaskBand(task_id=task.pk, student_id=task.student_id, band=band, bucket=bucket)
+            for band, bucket in band_buckets(signature)
+        )
+    DailyTaskFingerprint.objects.bulk_create(fingerprints)
+    DailyTaskBand.objects.bulk_create(bands, batch_size=1000)
+
+
+def candidate_pairs(bands, limit=None):
+    """
+    (task_id, task_id) pairs that share a bucket within `bands` (a
+    DailyTaskBand queryset). Only buckets with more than one task leave the
+    database. Every pair in a bucket is a candidate, except that each task
+    is paired with at most `limit` of the tasks before it, so one huge
+    bucket (a stock phrase) stays linear instead of k².
+    """
+    if limit is None:
+        limit = getattr(settings, 'NEAR_DUPLICATE_BUCKET_LIMIT', 50)
+    shared = bands.filter(band=OuterRef('band'), bucket=OuterRef('bucket')).exclude(task=OuterRef('task'))
+    rows = (
+        bands
+        .filter(Exists(shared))
+        .values_list('band', 'bucket', 'task_id')
+        .order_by('band', 'bucket', 'task_id')
+    )
+    pairs = set()
+    for _, bucket_rows in groupby(rows.iterator(), key=lambda row: row[:2]):
+        task_ids = [task_id for _, _, task_id in bucket_rows]
+        for i, task_id in enumerate(task_ids):
+            pairs.update((other, task_id) for other in task_ids[max(0, i - limit):i])
+    return pairs
+
+
+def _signatures(task_ids, batch_size=1000):
+    task_ids = list(task_ids)
+    signatures = {}
+    for i in range(0, len(task_ids), batch_size):
+        batch = DailyTaskFingerprint.objects.filter(task__in=task_ids[i:i + batch_size])
+        signatures.update((task_id, unpack(data)) for task_id, data in batch.values_list('task_id', 'signature'))
+    return signatures
+
+
+def find_duplicate_clusters(bands, threshold=None):
+    """
+    Groups of tasks within `bands` whose descriptions are at least
+    `threshold` similar, as [(task_ids, lowest linking similarity)],
+    largest first
+    """
+    if threshold is None:
+        threshold = getattr(settings, 'NEAR_DUPLICATE_THRESHOLD', 0.8)
+
+    pairs = candidate_pairs(bands)
+    signatures = _signatures({task_id for pair in pairs for task_id in pair})
+
+    parent = {}
+
+    def find(task_id):
+        parent.setdefault(task_id, task_id)
+        while parent[task_id] != task_id:
+            parent[task_id] = parent[parent[task_id]]
+            task_id = parent[task_id]
+        return task_id
+
+    lowest = {}
+    for first, second in pairs:
+        if first not in signatures or second not in signatures:
+            # Edited or deleted since the candidates were read
+            continue
+        score = similarity(signatures[first], signatures[second])
+        if score < threshold:
+            continue
+        root_first, root_second = find(first), find(second)
+        if root_first != root_second:
+            parent[root_second] = root_first
+        root = find(first)
+        lowest[root] = min(score, lowest.pop(root_first, 1.0), lowest.pop(root_second, 1.0))
+
+    clusters = {}
+    for task_id in parent:
+        clusters.setdefault(find(task_id), []).append(task_id)
+    return sorted(
+        ((task_ids, round(lowest[root], 3)) for root, task_ids in clusters.items()),
+        key=lambda cluster: -len(cluster[0])
+    )
@@ -0,0 +1,86 @@
+"""
+Logbook export. Rows are read with QuerySet.iterator(), which uses a
+server-side cursor on PostgreSQL, and written out one at a time, so memory
+use does not grow with the size of the export.
+"""
+import csv
+import json
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+# (column name, DailyTask lookup) in output order
+EXPORT_COLUMNS = (
+    ('task_id', 'id'),
+    ('date', 'date'),
+    ('week', 'week_number'),
+    ('iso_year', 'iso_year'),
+    ('registration_no', 'student__registration_no'),
+    ('first_name', 'student__user__first_name'),
+    ('last_name', 'student__user__last_name'),
+    ('email', 'student__user__email'),
+    ('company', 'student__company__name'),
+    ('category', 'task_category__name'),
+    ('description', 'description'),
+    ('hours_spent', 'hours_spent'),
+    ('tools_used', 'tools_used'),
+    ('skills_applied', 'skills_applied'),
+    ('approved', 'approved'),
+    ('approved_at', 'approved_at'),
+    ('supervisor_email', 'supervisor__email'),
+    ('supervisor_comments', 'supervisor_comments'),
+    ('created_at', 'created_at'),
+)
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller"""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset):
+    """Tuples in EXPORT_COLUMNS order, fetched a chunk at a time"""
+    chunk_size = getattr(settings, 'LOGBOOK_EXPORT_CHUNK_SIZE', 2000)
+    return (
+        queryset
+        .order_by('date', 'created_at', 'id')
+        .values_list(*(lookup for _, lookup in EXPORT_COLUMNS))
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+# Spreadsheets treat cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def csv_cell(value):
+    """A value as a CSV cell, with student-entered formulas neutralized"""
+    if isinstance(value, list):
+        value = ', '.join(map(str, value))
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(queryset):
+    writer = csv.writer(Echo())
+    yield writer.writerow([column for column, _ in EXPORT_COLUMNS])
+    for row in export_rows(queryset):
+        yield writer.writerow([csv_cell(value) for value in row])
+
+
+def stream_ndjson(queryset):
+    columns = [column for column, _ in EXPORT_COLUMNS]
+    for row in export_rows(queryset):
+        yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+STREAMERS = {
+    'csv': stream_csv,
+    'ndjson': stream_ndjson,
+}
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from students.models import DailyTask
+from students.duplicates import fingerprint_tasks
+
+
+class Command(BaseCommand):
+    help = 'Compute the near-duplicate fingerprints and LSH bands of the existing daily tasks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Tasks fingerprinted per transaction')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        tasks = (
+            DailyTask.objects
+            .only('id', 'student_id', 'description')
+            .order_by('pk')
+            .iterator(chunk_size=batch_size)
+        )
+
+        fingerprinted = 0
+        batch = []
+        for task in tasks:
+            batch.append(task)
+            if len(batch) == batch_size:
+                fingerprinted += self.fingerprint(batch)
+                batch = []
+        fingerprinted += self.fingerprint(batch)
+        self.stdout.write(self.style.SUCCESS(f'Fingerprinted {fingerprinted} task(s)'))
+
+    def fingerprint(self, tasks):
+        with transaction.atomic():
+            fingerprint_tasks(tasks)
+        return len(tasks)
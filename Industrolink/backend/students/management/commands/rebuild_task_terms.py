@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from students.models import DailyTask
+from students.vocabulary import sync_task_terms
+
+
+class Command(BaseCommand):
+    help = 'Build the tools/skills vocabulary and task term links from the existing daily tasks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Tasks linked per transaction')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        tasks = (
+            DailyTask.objects
+            .only('id', 'student_id', 'date', 'tools_used', 'skills_applied')
+            .order_by('pk')
+            .iterator(chunk_size=batch_size)
+        )
+
+        linked = 0
+        batch = []
+        for task in tasks:
+            batch.append(task)
+            if len(batch) == batch_size:
+                linked += self.link(batch)
+                batch = []
+        linked += self.link(batch)
+        self.stdout.write(self.style.SUCCESS(f'Linked terms for {linked} task(s)'))
+
+    def link(self, tasks):
+        with transaction.atomic():
+            sync_task_terms(tasks)
+        return len(tasks)
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from students.models import DailyTask, DailyTaskWeeklyRollup
+from students.rollups import KEY_FIELDS, ROLLUP_FIELDS, aggregate_weeks, rollup_from_row
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the weekly task rollups from daily_tasks, or verify them with --verify'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', help='Compare the rollups with the raw rows without changing anything')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rollups inserted per statement')
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            return self.verify()
+
+        with transaction.atomic():
+            deleted, _ = DailyTaskWeeklyRollup.objects.all().delete()
+            rollups = DailyTaskWeeklyRollup.objects.bulk_create(
+                (rollup_from_row(row) for row in aggregate_weeks(DailyTask.objects.all()).iterator()),
+                batch_size=options['batch_size'],
+            )
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(rollups)} weekly rollup(s), replacing {deleted}'))
+
+    def verify(self):
+        expected = {
+            tuple(row[field] for field in KEY_FIELDS): rollup_from_row(row)
+            for row in aggregate_weeks(DailyTask.objects.all()).iterator()
+        }
+        mismatches = 0
+        for rollup in DailyTaskWeeklyRollup.objects.iterator():
+            key = (rollup.student_id, rollup.iso_year, rollup.week_number)
+            wanted = expected.pop(key, None)
+            if wanted is None:
+                self.stderr.write(f'{rollup}: no tasks in this week')
+                mismatches += 1
+                continue
+            differing = [
+                field for field in ROLLUP_FIELDS if getattr(rollup, field) != getattr(wanted, field)
+            ]
+            if differing:
+                self.stderr.write(f"{rollup}: {', '.join(differing)} differ")
+                mismatches += 1
+        for wanted in expected.values():
+            self.stderr.write(f'{wanted}: rollup missing')
+            mismatches += 1
+
+        if mismatches:
+            raise CommandError(f'{mismatches} weekly rollup(s) out of date; run rebuild_weekly_rollups')
+        self.stdout.write(self.style.SUCCESS('Weekly rollups match daily_tasks'))
@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0004_taskcategory_dailytask'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dailytask',
+            index=models.Index(fields=['student', '-date', '-created_at', '-id'], name='daily_tasks_student_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='dailytask',
+            index=models.Index(fields=['-date', '-created_at', '-id'], name='daily_tasks_keyset'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import ExtractIsoYear, ExtractWeek
+
+
+def backfill_rollups(apps, schema_editor):
+    DailyTask = apps.get_model('students', 'DailyTask')
+    DailyTaskWeeklyRollup = apps.get_model('students', 'DailyTaskWeeklyRollup')
+    # Buckets are the ISO week of the task's date, as in students/rollups.py
+    rows = (
+        DailyTask.objects
+        .values('student_id', date_iso_year=ExtractIsoYear('date'), date_week=ExtractWeek('date'))
+        .annotate(
+            task_count=Count('id'),
+            total_hours=Sum('hours_spent'),
+            approved_count=Count('id', filter=Q(approved=True)),
+            last_submitted_at=Max('created_at'),
+        )
+        .order_by()
+    )
+    DailyTaskWeeklyRollup.objects.bulk_create(
+        (
+            DailyTaskWeeklyRollup(
+                student_id=row['student_id'],
+                iso_year=row['date_iso_year'],
+                week_number=row['date_week'],
+                task_count=row['task_count'],
+                total_hours=round(row['total_hours'] or 0, 2),
+                approved_count=row['approved_count'],
+                pending_count=row['task_count'] - row['approved_count'],
+                last_submitted_at=row['last_submitted_at'],
+            )
+            for row in rows.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0005_dailytask_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyTaskWeeklyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('iso_year', models.PositiveIntegerField()),
+                ('week_number', models.PositiveIntegerField()),
+                ('task_count', models.PositiveIntegerField(default=0)),
+                ('total_hours', models.FloatField(default=0)),
+                ('approved_count', models.PositiveIntegerField(default=0)),
+                ('pending_count', models.PositiveIntegerField(default=0)),
+                ('last_submitted_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='weekly_rollups', to='students.student')),
+            ],
+            options={
+                'db_table': 'daily_task_weekly_rollups',
+                'ordering': ['iso_year', 'week_number'],
+                'constraints': [models.UniqueConstraint(fields=('student', 'iso_year', 'week_number'), name='daily_task_rollup_student_week')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
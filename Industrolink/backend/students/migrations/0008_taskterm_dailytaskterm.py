@@ -0,0 +1,48 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0007_dailytask_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('tool', 'Tool'), ('skill', 'Skill')], max_length=10)),
+                ('name', models.CharField(max_length=200)),
+                ('display_name', models.CharField(max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'task_terms',
+                'ordering': ['kind', 'name'],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'name'), name='task_term_kind_name')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyTaskTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('tool', 'Tool'), ('skill', 'Skill')], max_length=10)),
+                ('iso_year', models.PositiveIntegerField()),
+                ('week_number', models.PositiveIntegerField()),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='term_links', to='students.student')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='term_links', to='students.dailytask')),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_links', to='students.taskterm')),
+            ],
+            options={
+                'db_table': 'daily_task_terms',
+                'constraints': [models.UniqueConstraint(fields=('task', 'term'), name='daily_task_term_unique')],
+                'indexes': [
+                    models.Index(fields=['kind', 'term'], name='daily_task_terms_kind'),
+                    models.Index(fields=['student', 'kind', 'term'], name='daily_task_terms_student'),
+                    models.Index(fields=['iso_year', 'week_number', 'kind', 'term'], name='daily_task_terms_week'),
+                ],
+            },
+        ),
+    ]
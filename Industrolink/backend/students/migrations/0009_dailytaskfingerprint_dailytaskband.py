@@ -0,0 +1,39 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0008_taskterm_dailytaskterm'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyTaskFingerprint',
+            fields=[
+                ('task', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='fingerprint', serialize=False, to='students.dailytask')),
+                ('signature', models.BinaryField()),
+            ],
+            options={
+                'db_table': 'daily_task_fingerprints',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyTaskBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField()),
+                ('bucket', models.BigIntegerField()),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_bands', to='students.student')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bands', to='students.dailytask')),
+            ],
+            options={
+                'db_table': 'daily_task_bands',
+                'indexes': [
+                    models.Index(fields=['band', 'bucket'], name='daily_task_bands_bucket'),
+                    models.Index(fields=['student', 'band', 'bucket'], name='daily_task_bands_student'),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+def merge_case_duplicates(apps, schema_editor):
+    """
+    Fold categories that differ only in case or surrounding spaces into the
+    oldest one, and store the kept names stripped
+    """
+    TaskCategory = apps.get_model('students', 'TaskCategory')
+    DailyTask = apps.get_model('students', 'DailyTask')
+    keep = {}
+    for category in TaskCategory.objects.order_by('created_at', 'id'):
+        key = category.name.strip().lower()
+        if key not in keep:
+            keep[key] = category.pk
+            if category.name != category.name.strip():
+                TaskCategory.objects.filter(pk=category.pk).update(name=category.name.strip())
+            continue
+        DailyTask.objects.filter(task_category_id=category.pk).update(task_category_id=keep[key])
+        category.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0009_dailytaskfingerprint_dailytaskband'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_case_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='taskcategory',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), name='task_category_name_ci'),
+        ),
+    ]
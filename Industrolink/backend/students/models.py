@@ -1,5 +1,7 @@
+import copy
 import uuid
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Lower
 from django.conf import settings
 from supervisors.models import Supervisor, Company
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -65,11 +67,66 @@ class TaskCategory(models.Model):
         db_table = 'task_categories'
         verbose_name_plural = 'Task Categories'
         ordering = ['name']
+        constraints = [
+            # Names are matched case-insensitively (students/categories.py)
+            models.UniqueConstraint(Lower('name'), name='task_category_name_ci'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        # Stored stripped, so lower(name) is exactly category_key(name)
+        if self.name:
+            self.name = self.name.strip()
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return self.name
 
 
+class DailyTaskQuerySet(models.QuerySet):
+    """
+    update() and bulk_create() skip the save/delete signals, so they keep
+    DailyTaskWeeklyRollup (students/rollups.py), the term links
+    (students/vocabulary.py) and the duplicate fingerprints
+    (students/duplicates.py) in step themselves
+    """
+    
+    def update(self, **kwargs):
+        from .duplicates import FINGERPRINT_SOURCE_FIELDS, fingerprint_tasks
+        from .rollups import ROLLUP_SOURCE_FIELDS, tasks_changed, week_key
+        from .vocabulary import TERM_SOURCE_FIELDS, sync_task_terms
+        rollups = bool(ROLLUP_SOURCE_FIELDS & kwargs.keys())
+        terms = bool(TERM_SOURCE_FIELDS & kwargs.keys())
+        fingerprints = bool(FINGERPRINT_SOURCE_FIELDS & kwargs.keys())
+        if not (rollups or terms or fingerprints):
+            return super().update(**kwargs)
+        
+        with transaction.atomic(using=self.db):
+            pks = list(self.values_list('pk', flat=True))
+            keys = {week_key(*row) for row in self.values_list('student_id', 'date')}
+            updated = super().update(**kwargs)
+            changed = DailyTask.objects.filter(pk__in=pks)
+            if rollups:
+                # Rows can move to another student or week
+                keys.update(week_key(*row) for row in changed.values_list('student_id', 'date'))
+                tasks_changed(keys)
+            if terms:
+                sync_task_terms(changed)
+            if fingerprints:
+                fingerprint_tasks(changed)
+        return updated
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        from .duplicates import fingerprint_tasks
+        from .rollups import tasks_changed
+        from .vocabulary import sync_task_terms
+        with transaction.atomic(using=self.db):
+            created = super().bulk_create(objs, *args, **kwargs)
+            tasks_changed({task.rollup_key for task in created})
+            sync_task_terms(created, created=True)
+            fingerprint_tasks(created, created=True)
+        return created
+
+
 class DailyTask(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     student = models.ForeignKey(
@@ -115,8 +172,36 @@ class DailyTask(models.Model):
         indexes = [
             models.Index(fields=['student', 'date']),
             models.Index(fields=['week_number', 'iso_year']),
+            # Keyset pagination of the task list (students/pagination.py)
+            models.Index(fields=['student', '-date', '-created_at', '-id'], name='daily_tasks_student_keyset'),
+            models.Index(fields=['-date', '-created_at', '-id'], name='daily_tasks_keyset'),
         ]
     
+    objects = DailyTaskQuerySet.as_manager()
+    
+    # Fields the term links and fingerprints are built from; the values a
+    # row was loaded with let a save skip rebuilding them (students/signals.py)
+    DERIVED_SOURCE_FIELDS = ('description', 'tools_used', 'skills_applied', 'student_id', 'date')
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the week the row was loaded in, so a save that moves it
+        # can refresh the rollup it left as well
+        instance._loaded_rollup_key = instance.rollup_key
+        instance._loaded_sources = instance.derived_sources()
+        return instance
+    
+    def derived_sources(self):
+        # Copied, since the JSON lists can be changed in place
+        return {name: copy.deepcopy(self.__dict__.get(name)) for name in self.DERIVED_SOURCE_FIELDS}
+    
+    @property
+    def rollup_key(self):
+        from .rollups import week_key
+        # Read from __dict__ so deferred fields are not fetched
+        return week_key(self.__dict__.get('student_id'), self.__dict__.get('date'))
+    
     def clean(self):
         """Custom validation"""
         # Remove date validation since it's auto-generated
@@ -143,3 +228,152 @@ class DailyTask(models.Model):
     def __str__(self):
         return f"{self.student.user.get_full_name()} - {self.date}"
 
+
+class DailyTaskWeeklyRollup(models.Model):
+    """
+    Per-student, per-ISO-week totals of DailyTask, kept up to date on every
+    write (students/rollups.py) so weekly figures are a unique-key lookup
+    instead of an aggregate over the raw rows. `manage.py rebuild_weekly_rollups`
+    recomputes or verifies the whole table.
+    """
+    student = models.ForeignKey(
+        'students.Student',
+        on_delete=models.CASCADE,
+        related_name='weekly_rollups'
+    )
+    iso_year = models.PositiveIntegerField()
+    week_number = models.PositiveIntegerField()
+    task_count = models.PositiveIntegerField(default=0)
+    total_hours = models.FloatField(default=0)
+    approved_count = models.PositiveIntegerField(default=0)
+    pending_count = models.PositiveIntegerField(default=0)
+    last_submitted_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'daily_task_weekly_rollups'
+        ordering = ['iso_year', 'week_number']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student', 'iso_year', 'week_number'],
+                name='daily_task_rollup_student_week'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.student_id} {self.iso_year}-W{self.week_number:02d}"
+
+
+
+class TaskTerm(models.Model):
+    """
+    One entry in the vocabulary of tools and skills students list on their
+    tasks. `name` is the case-folded form used for matching; `display_name`
+    keeps the first spelling seen.
+    """
+    KIND_CHOICES = [
+        ('tool', 'Tool'),
+        ('skill', 'Skill'),
+    ]
+    
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    name = models.CharField(max_length=200)
+    display_name = models.CharField(max_length=200)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'task_terms'
+        ordering = ['kind', 'name']
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'name'], name='task_term_kind_name'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind}: {self.display_name}"
+
+
+class DailyTaskTerm(models.Model):
+    """
+    A term listed on a task. Rebuilt from DailyTask.tools_used and
+    skills_applied on every write (students/vocabulary.py); the student and
+    week are copied from the task so usage counts group on this table alone.
+    """
+    task = models.ForeignKey(
+        DailyTask,
+        on_delete=models.CASCADE,
+        related_name='term_links'
+    )
+    term = models.ForeignKey(
+        TaskTerm,
+        on_delete=models.CASCADE,
+        related_name='task_links'
+    )
+    kind = models.CharField(max_length=10, choices=TaskTerm.KIND_CHOICES)
+    student = models.ForeignKey(
+        'students.Student',
+        on_delete=models.CASCADE,
+        related_name='term_links'
+    )
+    iso_year = models.PositiveIntegerField()
+    week_number = models.PositiveIntegerField()
+    
+    class Meta:
+        db_table = 'daily_task_terms'
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'term'], name='daily_task_term_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'term'], name='daily_task_terms_kind'),
+            models.Index(fields=['student', 'kind', 'term'], name='daily_task_terms_student'),
+            models.Index(fields=['iso_year', 'week_number', 'kind', 'term'], name='daily_task_terms_week'),
+        ]
+    
+    def __str__(self):
+        return f"{self.task_id} - {self.term_id}"
+
+
+class DailyTaskFingerprint(models.Model):
+    """
+    MinHash signature of a task's description, packed as unsigned 64-bit
+    integers (students/duplicates.py). Tasks with no words have none.
+    """
+    task = models.OneToOneField(
+        DailyTask,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='fingerprint'
+    )
+    signature = models.BinaryField()
+    
+    class Meta:
+        db_table = 'daily_task_fingerprints'
+
+
+class DailyTaskBand(models.Model):
+    """
+    One LSH band of a task's fingerprint. Tasks that share a (band, bucket)
+    are near-duplicate candidates.
+    """
+    task = models.ForeignKey(
+        DailyTask,
+        on_delete=models.CASCADE,
+        related_name='bands'
+    )
+    # Copied from the task so a company or cohort is scanned without daily_tasks
+    student = models.ForeignKey(
+        'students.Student',
+        on_delete=models.CASCADE,
+        related_name='task_bands'
+    )
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+    
+    class Meta:
+        db_table = 'daily_task_bands'
+        indexes = [
+            models.Index(fields=['band', 'bucket'], name='daily_task_bands_bucket'),
+            models.Index(fields=['student', 'band', 'bucket'], name='daily_task_bands_student'),
+        ]
+    
+    def __str__(self):
+        return f"{self.task_id} band {self.band}"
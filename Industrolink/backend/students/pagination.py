@@ -0,0 +1,141 @@
+import base64
+import json
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on a unique composite ordering. The cursor holds the
+    key of the last (or first) row on the page, so every page is a single
+    index range scan no matter how deep it is. The total count costs a
+    COUNT(*) and is only computed when the client asks with ?count=true.
+    """
+    # Must end with a unique field so every row has a distinct key
+    ordering = ('-id',)
+    page_size = 20
+    max_page_size = 100
+    page_size_query_params = ('page_size',)
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.count = queryset.count() if self.wants_count(request) else None
+
+        key, self.reverse = self.decode_cursor(request, queryset.model)
+        ordering = self.flipped_ordering() if self.reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if key is not None:
+            queryset = queryset.filter(self.after(key))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, key is not None
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_page_size(self, request):
+        for param in self.page_size_query_params:
+            try:
+                size = int(request.query_params[param])
+            except (KeyError, ValueError):
+                continue
+            if size > 0:
+                return min(size, self.max_page_size)
+        return self.page_size
+
+    def wants_count(self, request):
+        return request.query_params.get(self.count_query_param, '').lower() in ('1', 'true')
+
+    def flipped_ordering(self):
+        return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering)
+
+    def after(self, key):
+        """Rows that come after `key` in the current direction"""
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') != self.reverse else 'gt'
+            step = Q(**{f'{name}__{lookup}': key[i]})
+            for previous, value in zip(self.ordering[:i], key[:i]):
+                step &= Q(**{previous.lstrip('-'): value})
+            condition |= step
+        return condition
+
+    def key_for(self, row):
+        return [getattr(row, field.lstrip('-')) for field in self.ordering]
+
+    def encode_cursor(self, row, reverse):
+        key = [value.isoformat() if hasattr(value, 'isoformat') else str(value) for value in self.key_for(row)]
+        payload = json.dumps({'k': key, 'r': reverse}, separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request, model):
+        """(key, reverse) from the request's cursor, or (None, False)"""
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            names = [field.lstrip('-') for field in self.ordering]
+            if len(payload['k']) != len(names):
+                raise ValueError
+            key = [self.to_python(model, name, value) for name, value in zip(names, payload['k'])]
+            return key, bool(payload['r'])
+        except (TypeError, ValueError, KeyError, ValidationError, FieldDoesNotExist):
+            raise NotFound(self.invalid_cursor_message)
+
+    def to_python(self, model, name, value):
+        """A cursor value back to the type of the field it came from"""
+        return model._meta.get_field(name).to_python(value)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+
+class DailyTaskPagination(KeysetPagination):
+    ordering = ('-date', '-created_at', '-id')
+    # `limit` is what the dashboard already sends
+    page_size_query_params = ('page_size', 'limit')
+
+
+class TaskSearchPagination(KeysetPagination):
+    # Ranks are recomputed identically for the same query, so they can
+    # lead the key; the id breaks ties
+    ordering = ('-rank', '-id')
+
+    def to_python(self, model, name, value):
+        if name == 'rank':
+            return float(value)
+        return super().to_python(model, name, value)
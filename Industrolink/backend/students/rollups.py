@@ -0,0 +1,172 @@
+"""
+Maintenance of DailyTaskWeeklyRollup. Every write to DailyTask ends in
+tasks_changed() with the (student_id, iso_year, week_number) buckets it
+touched; each bucket is re-aggregated from its handful of raw rows and
+upserted in a single statement, or deleted once it is empty.
+
+A task's bucket is the ISO week of its `date`. The stored iso_year and
+week_number are stamped by DailyTask.save() with the week of the latest
+save, so they are not used here.
+"""
+from datetime import date, timedelta
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import ExtractIsoYear, ExtractWeek
+
+from .models import DailyTask, DailyTaskWeeklyRollup
+from .stats import invalidate_task_statistics, week_summary_figures
+
+KEY_FIELDS = ('student_id', 'date_iso_year', 'date_week')
+ROLLUP_FIELDS = ('task_count', 'total_hours', 'approved_count', 'pending_count', 'last_submitted_at')
+# DailyTask fields a rollup is computed from
+ROLLUP_SOURCE_FIELDS = {
+    'student', 'student_id', 'date', 'hours_spent', 'approved', 'created_at',
+}
+
+
+def week_key(student_id, task_date):
+    """The (student_id, iso_year, week_number) bucket of a task on `task_date`"""
+    if task_date is None:
+        return (student_id, None, None)
+    iso_year, week_number, _ = task_date.isocalendar()
+    return (student_id, iso_year, week_number)
+
+
+def aggregate_weeks(queryset):
+    """Rollup figures for every bucket in a DailyTask queryset"""
+    return (
+        queryset
+        .values('student_id', date_iso_year=ExtractIsoYear('date'), date_week=ExtractWeek('date'))
+        .annotate(
+            task_count=Count('id'),
+            total_hours=Sum('hours_spent'),
+            approved_count=Count('id', filter=Q(approved=True)),
+            last_submitted_at=Max('created_at'),
+        )
+        .order_by()
+    )
+
+
+def rollup_from_row(row):
+    return DailyTaskWeeklyRollup(
+        student_id=row['student_id'],
+        iso_year=row['date_iso_year'],
+        week_number=row['date_week'],
+        task_count=row['task_count'],
+        total_hours=round(row['total_hours'] or 0, 2),
+        approved_count=row['approved_count'],
+        pending_count=row['task_count'] - row['approved_count'],
+        last_submitted_at=row['last_submitted_at'],
+    )
+
+
+def _buckets(keys):
+    condition = Q()
+    for student_id, iso_year, week_number in keys:
+        condition |= Q(student_id=student_id, iso_year=iso_year, week_number=week_number)
+    return condition
+
+
+def _task_buckets(keys):
+    # Date ranges, so the (student, date) index is used
+    condition = Q()
+    for student_id, iso_year, week_number in keys:
+        monday = date.fromisocalendar(iso_year, week_number, 1)
+        condition |= Q(student_id=student_id, date__range=(monday, monday + timedelta(days=6)))
+    return condition
+
+
+def refresh_weekly_rollups(keys):
+    """
+    Recompute the given buckets from the raw rows. The rollup rows are
+    locked before the tasks are read, so concurrent writers to the same
+    week take turns and the last one counts everyone's committed tasks.
+    """
+    # Sorted, so writers lock shared buckets in the same order
+    keys = sorted({key for key in keys if None not in key}, key=lambda key: tuple(map(str, key)))
+    if not keys:
+        return
+
+    with transaction.atomic():
+        DailyTaskWeeklyRollup.objects.bulk_create(
+            [DailyTaskWeeklyRollup(student_id=student_id, iso_year=iso_year, week_number=week_number)
+             for student_id, iso_year, week_number in keys],
+            ignore_conflicts=True,
+        )
+        list(
+            DailyTaskWeeklyRollup.objects
+            .select_for_update()
+            .filter(_buckets(keys))
+            .order_by('student_id', 'iso_year', 'week_number')
+            .values_list('pk', flat=True)
+        )
+
+        rows = {
+            tuple(row[field] for field in KEY_FIELDS): row
+            for row in aggregate_weeks(DailyTask.objects.filter(_task_buckets(keys)))
+        }
+        if rows:
+            DailyTaskWeeklyRollup.objects.bulk_create(
+                [rollup_from_row(row) for row in rows.values()],
+                update_conflicts=True,
+                unique_fields=['student', 'iso_year', 'week_number'],
+                update_fields=list(ROLLUP_FIELDS),
+            )
+
+        empty = set(keys) - rows.keys()
+        if empty:
+            DailyTaskWeeklyRollup.objects.filter(_buckets(empty)).delete()
+
+
+def tasks_changed(keys):
+    """Everything that has to follow a write to the tasks in `keys`"""
+    refresh_weekly_rollups(keys)
+
+    # After commit, so a concurrent read cannot cache the old figures again
+    student_ids = {student_id for student_id, _, _ in keys if student_id is not None}
+
+    def invalidate():
+        for student_id in student_ids:
+            invalidate_task_statistics(student_id)
+
+    transaction.on_commit(invalidate)
+
+
+def weekly_rollups(student_id, first=None, last=None):
+    """
+    {(iso_year, week_number): rollup} for a student, optionally limited to
+    the weeks from `first` to `last` ((year, week) tuples, inclusive)
+    """
+    rollups = DailyTaskWeeklyRollup.objects.filter(student_id=student_id)
+    if first is not None:
+        rollups = rollups.filter(Q(iso_year__gt=first[0]) | Q(iso_year=first[0], week_number__gte=first[1]))
+    if last is not None:
+        rollups = rollups.filter(Q(iso_year__lt=last[0]) | Q(iso_year=last[0], week_number__lte=last[1]))
+    return {(rollup.iso_year, rollup.week_number): rollup for rollup in rollups}
+
+
+def rollup_week_summaries(student, first, last):
+    """
+    weekly_summary's per-week figures for a range of weeks, read from the
+    rollups alone (no daily breakdown)
+    """
+    rollups = weekly_rollups(student.pk, first, last)
+    summaries = []
+    week_start = date.fromisocalendar(*first, 1)
+    end = date.fromisocalendar(*last, 1)
+    while week_start <= end:
+        year, week, _ = week_start.isocalendar()
+        rollup = rollups.get((year, week))
+        summaries.append({
+            'week_number': week,
+            'year': year,
+            'week_start': week_start,
+            'week_end': week_start + timedelta(days=6),
+            'summary': week_summary_figures(
+                rollup.task_count if rollup else 0,
+                rollup.approved_count if rollup else 0,
+                rollup.total_hours if rollup else 0,
+            ),
+        })
+        week_start += timedelta(days=7)
+    return summaries
@@ -0,0 +1,120 @@
+"""
+Full-text search over DailyTask description, tools_used and skills_applied.
+
+On PostgreSQL daily_tasks gets a generated tsvector column (description
+weighted above tools and skills) with a GIN index, so the database keeps
+it current on every write, bulk ones included. SQLite, for local runs,
+uses an FTS5 table kept in step by triggers. The model does not declare
+either; they are reached through raw SQL below.
+"""
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Value
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = 'english'
+
+POSTGRES_INDEX_SQL = (
+    f"""
+    ALTER TABLE daily_tasks ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'A') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(tools_used, '[]'::jsonb)), 'B') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(skills_applied, '[]'::jsonb)), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS daily_tasks_search_gin ON daily_tasks USING gin (search_vector)",
+)
+
+SQLITE_INDEX_SQL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS daily_tasks_fts
+    USING fts5(task_id UNINDEXED, description, tools_used, skills_applied)
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS daily_tasks_fts_insert AFTER INSERT ON daily_tasks BEGIN
+        INSERT INTO daily_tasks_fts (task_id, description, tools_used, skills_applied)
+        VALUES (new.id, new.description, new.tools_used, new.skills_applied);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS daily_tasks_fts_update
+    AFTER UPDATE OF description, tools_used, skills_applied ON daily_tasks BEGIN
+        DELETE FROM daily_tasks_fts WHERE task_id = old.id;
+        INSERT INTO daily_tasks_fts (task_id, description, tools_used, skills_applied)
+        VALUES (new.id, new.description, new.tools_used, new.skills_applied);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS daily_tasks_fts_delete AFTER DELETE ON daily_tasks BEGIN
+        DELETE FROM daily_tasks_fts WHERE task_id = old.id;
+    END
+    """,
+)
+
+SQLITE_BACKFILL_SQL = """
+    INSERT INTO daily_tasks_fts (task_id, description, tools_used, skills_applied)
+    SELECT id, description, tools_used, skills_applied FROM daily_tasks
+    WHERE NOT EXISTS (SELECT 1 FROM daily_tasks_fts)
+"""
+
+
+def install_search_index(connection):
+    """Create the search column/table for this database. Safe to re-run."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            for sql in POSTGRES_INDEX_SQL:
+                cursor.execute(sql)
+        elif connection.vendor == 'sqlite':
+            for sql in SQLITE_INDEX_SQL:
+                cursor.execute(sql)
+            cursor.execute(SQLITE_BACKFILL_SQL)
+
+
+def remove_search_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("DROP INDEX IF EXISTS daily_tasks_search_gin")
+            cursor.execute("ALTER TABLE daily_tasks DROP COLUMN IF EXISTS search_vector")
+        elif connection.vendor == 'sqlite':
+            for name in ('insert', 'update', 'delete'):
+                cursor.execute(f"DROP TRIGGER IF EXISTS daily_tasks_fts_{name}")
+            cursor.execute("DROP TABLE IF EXISTS daily_tasks_fts")
+
+
+def _fts5_query(text):
+    # Every word as a quoted phrase, so user input is never FTS5 syntax
+    return ' '.join('"{}"'.format(word.replace('"', '""')) for word in text.split())
+
+
+def search_tasks(queryset, text):
+    """
+    Tasks in `queryset` matching `text`, annotated with a `rank` where
+    higher is more relevant
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        query = f"websearch_to_tsquery('{SEARCH_CONFIG}', %s)"
+        return queryset.filter(
+            RawSQL(f"daily_tasks.search_vector @@ {query}", [text], output_field=BooleanField())
+        ).annotate(
+            rank=RawSQL(f"ts_rank(daily_tasks.search_vector, {query})::float8", [text], output_field=FloatField())
+        )
+
+    if vendor == 'sqlite':
+        match = _fts5_query(text)
+        # bm25() is lower for better matches
+        return queryset.filter(
+            RawSQL(
+                "daily_tasks.id IN (SELECT task_id FROM daily_tasks_fts WHERE daily_tasks_fts MATCH %s)",
+                [match], output_field=BooleanField()
+            )
+        ).annotate(
+            rank=RawSQL(
+                "(SELECT -bm25(daily_tasks_fts) FROM daily_tasks_fts"
+                " WHERE daily_tasks_fts MATCH %s AND task_id = daily_tasks.id)",
+                [match], output_field=FloatField()
+            )
+        )
+
+    # No full-text support: plain substring match, unranked
+    return queryset.filter(description__icontains=text).annotate(rank=Value(0.0, output_field=FloatField()))
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.utils import timezone
 from .models import Student, DailyTask, TaskCategory
+from .categories import category_resolver
 
 class StudentProfileSerializer(serializers.ModelSerializer):
     company_name = serializers.CharField(source='company.name', read_only=True)
@@ -63,6 +64,12 @@ class TaskCategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description', 'is_active', 'is_user_created', 'created_by', 'created_at']
         read_only_fields = ['id', 'created_at']
     
+    def validate_name(self, value):
+        existing = category_resolver.get(value)
+        if existing is not None and (self.instance is None or existing.pk != self.instance.pk):
+            raise serializers.ValidationError("A task category with this name already exists")
+        return value.strip()
+    
     def create(self, validated_data):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
@@ -131,6 +138,8 @@ class DailyTaskCreateSerializer(serializers.ModelSerializer):
             'description', 'task_category', 'task_category_name',
             'tools_used', 'skills_applied', 'hours_spent'
         ]
+        # validate() fills it in from task_category_name or the default
+        extra_kwargs = {'task_category': {'required': False}}
     
     def validate(self, attrs):
         # Handle category creation/selection
@@ -139,9 +148,9 @@ class DailyTaskCreateSerializer(serializers.ModelSerializer):
         
         if not task_category and not task_category_name:
             # If no categories exist at all, create a default one
-            if TaskCategory.objects.count() == 0:
-                default_category = TaskCategory.objects.create(
-                    name='General Tasks',
+            if not TaskCategory.objects.exists():
+                default_category, _ = category_resolver.get_or_create(
+                    'General Tasks',
                     description='Default category for daily tasks',
                     is_active=True,
                     is_user_created=False
@@ -151,15 +160,13 @@ class DailyTaskCreateSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError("Either task_category or task_category_name must be provided")
         
         if task_category_name:
-            # Create or get existing category
-            category, created = TaskCategory.objects.get_or_create(
-                name__iexact=task_category_name.strip(),
-                defaults={
-                    'name': task_category_name.strip(),
-                    'description': f'User-created category: {task_category_name.strip()}',
-                    'is_user_created': True,
-                    'created_by': self.context.get('request').user if self.context.get('request') else None
-                }
+            # Get the existing category in any case, or create it
+            request = self.context.get('request')
+            category, created = category_resolver.get_or_create(
+                task_category_name,
+                description=f'User-created category: {task_category_name.strip()}',
+                is_user_created=True,
+                created_by=request.user if request else None
             )
             attrs['task_category'] = category
             attrs.pop('task_category_name', None)
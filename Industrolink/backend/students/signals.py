@@ -0,0 +1,55 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import DailyTask, TaskCategory
+from .categories import category_resolver
+from .duplicates import FINGERPRINT_SOURCE_FIELDS, fingerprint_tasks
+from .rollups import tasks_changed
+from .vocabulary import TERM_SOURCE_FIELDS, sync_task_terms
+
+
+def _sources_changed(instance, fields, loaded, update_fields):
+    """Whether a save of an existing task may have changed any of `fields`"""
+    if update_fields is not None and not fields & update_fields:
+        return False
+    if loaded is None:
+        return True
+    return any(instance.__dict__.get(name) != loaded[name] for name in fields if name in loaded)
+
+
+@receiver(post_save, sender=DailyTask)
+def task_saved(sender, instance, created=False, update_fields=None, **kwargs):
+    """Keep the rollup, statistics, term links and fingerprint in step with the task"""
+    # The task may have moved to another student or date, leaving another bucket
+    keys = {instance.rollup_key, getattr(instance, '_loaded_rollup_key', instance.rollup_key)}
+    tasks_changed(keys)
+    instance._loaded_rollup_key = instance.rollup_key
+
+    # Approvals and comments leave the terms and description alone
+    loaded = getattr(instance, '_loaded_sources', None)
+    if created or _sources_changed(instance, TERM_SOURCE_FIELDS, loaded, update_fields):
+        sync_task_terms([instance], created=created)
+    if created or _sources_changed(instance, FINGERPRINT_SOURCE_FIELDS, loaded, update_fields):
+        fingerprint_tasks([instance], created=created)
+    current = instance.derived_sources()
+    if loaded is None or update_fields is None:
+        instance._loaded_sources = current
+    else:
+        # Only what was written is now the stored value
+        loaded.update(
+            (name, value) for name, value in current.items()
+            if name in update_fields or name.removesuffix('_id') in update_fields
+        )
+
+
+@receiver(post_delete, sender=DailyTask)
+def task_deleted(sender, instance, **kwargs):
+    tasks_changed({instance.rollup_key})
+
+
+@receiver(post_save, sender=TaskCategory)
+@receiver(post_delete, sender=TaskCategory)
+def category_changed(sender, **kwargs):
+    # Again after commit, in case another thread cached the old row meanwhile
+    category_resolver.clear()
+    transaction.on_commit(category_resolver.clear)
@@ -0,0 +1,170 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+
+from .models import DailyTask
+from .serializers import DailyTaskSerializer
+
+# Most weeks weekly_summary returns in one range request
+MAX_SUMMARY_WEEKS = 53
+
+
+def _stats_cache_key(student_id, today):
+    # The current-week and last-7-days figures change at midnight, so
+    # each day gets its own entry
+    return f'students:task-stats:{student_id}:{today.isoformat()}'
+
+
+def compute_task_statistics(student, today=None):
+    """
+    Every figure task_statistics reports, from one query. Tasks are grouped
+    by category with conditional aggregates for the week and recent-activity
+    counts; the overall totals are the sums of the groups.
+    """
+    today = today or date.today()
+    iso_year, iso_week, weekday = today.isocalendar()
+    # By date, as the rollups are; save() restamps week_number with today's week
+    monday = today - timedelta(days=weekday - 1)
+    this_week = Q(date__range=(monday, monday + timedelta(days=6)))
+
+    categories = list(
+        DailyTask.objects.filter(student=student)
+        .values('task_category__name')
+        .annotate(
+            count=Count('id'),
+            hours=Sum('hours_spent'),
+            approved=Count('id', filter=Q(approved=True)),
+            week_count=Count('id', filter=this_week),
+            week_hours=Sum('hours_spent', filter=this_week),
+            recent=Count('id', filter=Q(date__gte=today - timedelta(days=7))),
+        )
+        .order_by()
+    )
+
+    total_tasks = sum(row['count'] for row in categories)
+    approved_tasks = sum(row['approved'] for row in categories)
+    total_hours = sum(row['hours'] or 0 for row in categories)
+    current_week_hours = sum(row['week_hours'] or 0 for row in categories)
+
+    return {
+        'total_tasks': total_tasks,
+        'approved_tasks': approved_tasks,
+        'pending_approval': total_tasks - approved_tasks,
+        'total_hours': round(total_hours, 2),
+        'approval_rate': round((approved_tasks / total_tasks * 100) if total_tasks > 0 else 0, 2),
+        'current_week': {
+            'week_number': iso_week,
+            'year': iso_year,
+            'task_count': sum(row['week_count'] for row in categories),
+            'hours': round(current_week_hours, 2)
+        },
+        'recent_activity': {
+            'tasks_last_7_days': sum(row['recent'] for row in categories)
+        },
+        'category_breakdown': [
+            {'task_category__name': row['task_category__name'], 'count': row['count'], 'hours': row['hours']}
+            for row in sorted(categories, key=lambda row: -row['count'])
+        ],
+        'average_hours_per_task': round(total_hours / total_tasks if total_tasks > 0 else 0, 2)
+    }
+
+
+def get_task_statistics(student):
+    """compute_task_statistics() through the cache"""
+    today = date.today()
+    key = _stats_cache_key(student.pk, today)
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_task_statistics(student, today)
+        cache.set(key, stats, timeout=getattr(settings, 'TASK_STATS_CACHE_SECONDS', 60))
+    return stats
+
+
+def invalidate_task_statistics(student_id):
+    cache.delete(_stats_cache_key(student_id, date.today()))
+
+
+def parse_week(value, default_year):
+    """
+    (iso_year, week) from "2025-W07" or a bare week number in default_year.
+    Raises ValueError for anything that is not a real ISO week.
+    """
+    value = value.strip().upper()
+    if '-W' in value:
+        year, week = value.split('-W', 1)
+    else:
+        year, week = default_year, value
+    year, week = int(year), int(week)
+    date.fromisocalendar(year, week, 1)
+    return year, week
+
+
+def summarize_weeks(student, first, last):
+    """
+    weekly_summary for every ISO week from `first` to `last` ((year, week)
+    tuples, inclusive). All the tasks come from one query and are bucketed
+    by week and day here.
+    """
+    start = date.fromisocalendar(*first, 1)
+    end = date.fromisocalendar(*last, 7)
+    tasks = (
+        DailyTask.objects
+        .filter(student=student, date__range=(start, end))
+        .select_related('student__user', 'task_category', 'supervisor')
+        .order_by('-date', '-created_at')
+    )
+
+    by_week = defaultdict(list)
+    for task in tasks:
+        by_week[tuple(task.date.isocalendar())[:2]].append(task)
+
+    summaries = []
+    week_start = start
+    while week_start <= end:
+        year, week, _ = week_start.isocalendar()
+        summaries.append(_week_summary(year, week, week_start, by_week[(year, week)]))
+        week_start += timedelta(days=7)
+    return summaries
+
+
+def _week_summary(year, week, week_start, tasks):
+    total_tasks = len(tasks)
+    approved_tasks = sum(1 for task in tasks if task.approved)
+    total_hours = sum(task.hours_spent for task in tasks)
+
+    # Tasks are newest first, so the first one seen is the day's latest
+    latest = {}
+    for task in tasks:
+        latest.setdefault(task.date, task)
+
+    daily_tasks = {}
+    for i in range(7):  # Monday to Sunday
+        day = week_start + timedelta(days=i)
+        task = latest.get(day)
+        daily_tasks[day.strftime('%A').lower()] = {
+            'date': day,
+            'has_task': task is not None,
+            'task': DailyTaskSerializer(task).data if task is not None else None
+        }
+
+    return {
+        'week_number': week,
+        'year': year,
+        'week_start': week_start,
+        'week_end': week_start + timedelta(days=6),
+        'summary': week_summary_figures(total_tasks, approved_tasks, total_hours),
+        'daily_breakdown': daily_tasks
+    }
+
+
+def week_summary_figures(total_tasks, approved_tasks, total_hours):
+    return {
+        'total_tasks': total_tasks,
+        'approved_tasks': approved_tasks,
+        'pending_tasks': total_tasks - approved_tasks,
+        'total_hours': round(total_hours, 2),
+        'average_hours_per_day': round(total_hours / 7, 2),
+        'completion_rate': round((total_tasks / 5 * 100), 2)  # Assuming 5 working days
+    }
@@ -1,3 +1,824 @@
-from django.test import TestCase
+import csv
+import json
+from datetime import date, timedelta
+from io import StringIO
+from unittest import skipUnless
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection, transaction
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from .models import DailyTask, DailyTaskBand, DailyTaskFingerprint, DailyTaskTerm, DailyTaskWeeklyRollup, Student, TaskCategory, TaskTerm
+from .autocomplete import TermTrie, term_autocomplete
+from .categories import category_resolver
+from .duplicates import candidate_pairs, minhash, similarity
+from .search import install_search_index
+from supervisors.models import Company, Supervisor
+
+User = get_user_model()
+
+
+def create_company(name='Acme', email='info@acme.test'):
+    return Company.objects.create(name=name, address='1 Main St', phone_number='0700000000', email=email)
+
+
+def create_user(role, name=None, **fields):
+    """A user with the test password; `name` (the role by default) gives the email and last name"""
+    name = name or role
+    fields.setdefault('first_name', 'Test')
+    fields.setdefault('last_name', name[:1].upper() + name[1:])
+    return User.objects.create_user(
+        email=f'{name}@test.com',
+        username=f'{name}@test.com',
+        password='testpass123',
+        role=role,
+        **fields
+    )
+
+
+def create_student(user, company, registration_no='REG-001', **fields):
+    """A student profile for `user` on the usual 2025 placement"""
+    return Student.objects.create(
+        user=user,
+        registration_no=registration_no,
+        academic_year='2025',
+        course='Computer Science',
+        year_of_study='3',
+        company=company,
+        duration_in_weeks=12,
+        start_date=date(2025, 1, 6),
+        completion_date=date(2025, 3, 31),
+        **fields
+    )
+
+
+class DailyTaskPaginationTest(APITestCase):
+    """Test keyset pagination of the daily task list"""
+
+    def setUp(self):
+        self.company = create_company()
+        self.lecturer = create_user('lecturer')
+        self.user = create_user('student')
+        self.student = create_student(self.user, self.company, lecturer=self.lecturer)
+        category = TaskCategory.objects.create(name='Testing')
+        for i in range(5):
+            DailyTask.objects.create(
+                student=self.student,
+                description=f'Task {i}',
+                task_category=category,
+                hours_spent=1
+            )
+
+        # Two tasks share a date and created_at so the id has to break the tie
+        created_at = timezone.now()
+        for offset, task in enumerate(DailyTask.objects.order_by('description')):
+            DailyTask.objects.filter(pk=task.pk).update(
+                date=date.today() - timedelta(days=min(offset, 3)),
+                created_at=created_at
+            )
+        self.expected = list(
+            DailyTask.objects.order_by('-date', '-created_at', '-id').values_list('id', flat=True)
+        )
+
+    def ids(self, response):
+        return [task['id'] for task in response.data['results']]
+
+    def test_pages_follow_the_key(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse('daily-tasks-list')
+
+        response = self.client.get(url, {'limit': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data['count'])
+        self.assertIsNone(response.data['previous'])
+        seen = self.ids(response)
+
+        pages = [response]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            pages.append(response)
+            seen.extend(self.ids(response))
+        self.assertEqual(seen, [str(pk) for pk in self.expected])
+
+        # Going back from the last page returns the one before it
+        response = self.client.get(pages[-1].data['previous'])
+        self.assertEqual(self.ids(response), self.ids(pages[-2]))
+        self.assertIsNotNone(response.data['next'])
+
+    def test_count_only_on_request(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse('daily-tasks-list'), {'count': 'true', 'page_size': 1000})
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_invalid_cursor(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse('daily-tasks-list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_lecturer_sees_assigned_students_only(self):
+        other = create_user('lecturer', 'other', first_name='Other', last_name='Lecturer')
+        self.client.force_authenticate(user=self.lecturer)
+        response = self.client.get(reverse('daily-tasks-list'))
+        self.assertEqual(len(response.data['results']), 5)
+
+        self.client.force_authenticate(user=other)
+        response = self.client.get(reverse('daily-tasks-list'))
+        self.assertEqual(response.data['results'], [])
+
+
+class TaskStatisticsTest(APITestCase):
+    """Test the cached one-query task statistics"""
+
+    def setUp(self):
+        cache.clear()
+        company = create_company()
+        self.user = create_user('student')
+        self.student = create_student(self.user, company)
+        testing = TaskCategory.objects.create(name='Testing')
+        design = TaskCategory.objects.create(name='Design')
+        self.tasks = [
+            DailyTask.objects.create(student=self.student, description='One', task_category=testing, hours_spent=2),
+            DailyTask.objects.create(student=self.student, description='Two', task_category=testing, hours_spent=3),
+            DailyTask.objects.create(student=self.student, description='Three', task_category=design, hours_spent=1.5, approved=True),
+        ]
+        self.client.force_authenticate(user=self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_statistics(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('task-statistics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_tasks'], 3)
+        self.assertEqual(response.data['approved_tasks'], 1)
+        self.assertEqual(response.data['total_hours'], 6.5)
+        self.assertEqual(response.data['current_week']['task_count'], 3)
+        self.assertEqual(response.data['recent_activity']['tasks_last_7_days'], 3)
+        self.assertEqual(response.data['category_breakdown'][0], {'task_category__name': 'Testing', 'count': 2, 'hours': 5.0})
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('task-statistics'))
+        self.assertEqual(response.data['total_tasks'], 3)
+
+    def test_back_dated_task_is_not_this_week(self):
+        DailyTask.objects.filter(pk=self.tasks[0].pk).update(date=date.today() - timedelta(days=14))
+        task = DailyTask.objects.get(pk=self.tasks[0].pk)
+        task.description = 'Edited'
+        task.save()
+        response = self.client.get(reverse('task-statistics'))
+        self.assertEqual(response.data['current_week']['task_count'], 2)
+
+    def test_approval_and_delete_invalidate(self):
+        self.client.get(reverse('task-statistics'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tasks[0].approved = True
+            self.tasks[0].save()
+        response = self.client.get(reverse('task-statistics'))
+        self.assertEqual(response.data['approved_tasks'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tasks[1].delete()
+        response = self.client.get(reverse('task-statistics'))
+        self.assertEqual(response.data['total_tasks'], 2)
+
+
+class WeeklySummaryTest(APITestCase):
+    """Test the one-query weekly summary and its range mode"""
+
+    def setUp(self):
+        company = create_company()
+        self.user = create_user('student')
+        self.student = create_student(self.user, company)
+        category = TaskCategory.objects.create(name='Testing')
+        # Monday and Wednesday of 2025-W10, Tuesday of 2025-W11
+        for day, hours in ((date(2025, 3, 3), 2), (date(2025, 3, 5), 3), (date(2025, 3, 11), 4)):
+            task = DailyTask.objects.create(
+                student=self.student,
+                description=f'Work on {day}',
+                task_category=category,
+                hours_spent=hours
+            )
+            DailyTask.objects.filter(pk=task.pk).update(date=day)
+        self.client.force_authenticate(user=self.user)
+
+    def test_single_week(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('weekly-summary'), {'week': 10, 'year': 2025})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['week_start'], date(2025, 3, 3))
+        self.assertEqual(response.data['summary']['total_tasks'], 2)
+        self.assertEqual(response.data['summary']['total_hours'], 5)
+        self.assertTrue(response.data['daily_breakdown']['monday']['has_task'])
+        self.assertFalse(response.data['daily_breakdown']['tuesday']['has_task'])
+        self.assertEqual(response.data['daily_breakdown']['wednesday']['task']['hours_spent'], 3)
+
+    def test_range(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('weekly-summary'), {'from_week': '2025-W09', 'to_week': '2025-W11'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        weeks = response.data['weeks']
+        self.assertEqual([week['week_number'] for week in weeks], [9, 10, 11])
+        self.assertEqual([week['summary']['total_tasks'] for week in weeks], [0, 2, 1])
+
+    def test_invalid_range(self):
+        response = self.client.get(reverse('weekly-summary'), {'from_week': 11, 'to_week': 9, 'year': 2025})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('weekly-summary'), {'week': 60, 'year': 2025})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class WeeklyRollupTest(APITestCase):
+    """Test the incrementally maintained weekly rollups"""
+
+    def setUp(self):
+        cache.clear()
+        self.company = create_company()
+        self.user = create_user('student')
+        self.student = create_student(self.user, self.company)
+        category = TaskCategory.objects.create(name='Testing')
+        self.tasks = [
+            DailyTask.objects.create(student=self.student, description=f'Task {i}', task_category=category, hours_spent=i + 1)
+            for i in range(3)
+        ]
+        self.year, self.week, _ = date.today().isocalendar()
+
+    def tearDown(self):
+        cache.clear()
+
+    def rollup(self):
+        return DailyTaskWeeklyRollup.objects.get(student=self.student, iso_year=self.year, week_number=self.week)
+
+    def test_kept_up_to_date(self):
+        rollup = self.rollup()
+        self.assertEqual((rollup.task_count, rollup.total_hours, rollup.approved_count, rollup.pending_count), (3, 6, 0, 3))
+        self.assertEqual(rollup.last_submitted_at, self.tasks[2].created_at)
+
+        self.tasks[0].approved = True
+        self.tasks[0].save()
+        self.assertEqual(self.rollup().approved_count, 1)
+
+        # Bulk paths skip the signals
+        DailyTask.objects.filter(pk=self.tasks[1].pk).update(approved=True, hours_spent=5)
+        rollup = self.rollup()
+        self.assertEqual((rollup.approved_count, rollup.pending_count, rollup.total_hours), (2, 1, 9))
+
+        for task in self.tasks:
+            task.delete()
+        self.assertFalse(DailyTaskWeeklyRollup.objects.exists())
+
+    def test_bucket_follows_task_date(self):
+        DailyTask.objects.filter(pk=self.tasks[0].pk).update(date=date(2025, 3, 5))
+        self.assertEqual(self.rollup().task_count, 2)
+
+        # save() stamps this week on iso_year/week_number; the rollup goes by the date
+        task = DailyTask.objects.get(pk=self.tasks[0].pk)
+        task.approved = True
+        task.save()
+        self.assertEqual(self.rollup().task_count, 2)
+        old = DailyTaskWeeklyRollup.objects.get(student=self.student, iso_year=2025, week_number=10)
+        self.assertEqual((old.task_count, old.approved_count), (1, 1))
+        call_command('rebuild_weekly_rollups', verify=True, stdout=StringIO())
+
+    def test_supervisor_bulk_approval(self):
+        supervisor = create_user('supervisor')
+        Supervisor.objects.create(user=supervisor, company=self.company, phone_number='0711111111', position='Lead')
+        self.client.force_authenticate(user=supervisor)
+
+        response = self.client.post(
+            reverse('supervisor-bulk-task-approval'),
+            {'task_ids': [str(task.pk) for task in self.tasks[:2]]},
+            format='json'
+        )
+        self.assertEqual(response.data['approved_count'], 2)
+        self.assertEqual(self.rollup().approved_count, 2)
+        task = DailyTask.objects.get(pk=self.tasks[0].pk)
+        self.assertEqual(task.updated_at, task.approved_at)
+
+        response = self.client.get(reverse('supervisor-weekly-tasks', args=[self.student.pk]))
+        week = f'{self.year}-W{self.week:02d}'
+        self.assertEqual(response.data['week_summaries'][week]['pending_count'], 1)
+
+        # Both dicts are keyed by the week of the task's date
+        DailyTask.objects.filter(pk=self.tasks[2].pk).update(date=date(2025, 3, 5))
+        response = self.client.get(reverse('supervisor-weekly-tasks', args=[self.student.pk]))
+        self.assertEqual(list(response.data['weekly_tasks']), ['2025-W10'])
+        self.assertEqual(response.data['week_summaries']['2025-W10']['pending_count'], 1)
+
+    def test_summary_only_range(self):
+        self.client.force_authenticate(user=self.user)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('weekly-summary'), {
+                'from_week': f'{self.year}-W{self.week:02d}',
+                'to_week': f'{self.year}-W{self.week:02d}',
+                'summary_only': 'true'
+            })
+        self.assertEqual(response.data['weeks'][0]['summary']['total_tasks'], 3)
+        self.assertNotIn('daily_breakdown', response.data['weeks'][0])
+
+    def test_rebuild_and_verify(self):
+        call_command('rebuild_weekly_rollups', '--verify', stdout=StringIO())
+
+        DailyTaskWeeklyRollup.objects.all().delete()
+        with self.assertRaises(CommandError):
+            call_command('rebuild_weekly_rollups', '--verify', stdout=StringIO(), stderr=StringIO())
+
+        call_command('rebuild_weekly_rollups', stdout=StringIO())
+        self.assertEqual(self.rollup().task_count, 3)
+        call_command('rebuild_weekly_rollups', '--verify', stdout=StringIO())
+
+
+class LogbookExportTest(APITestCase):
+    """Test the streaming CSV and NDJSON logbook export"""
+
+    def setUp(self):
+        company = create_company()
+        self.lecturer = create_user('lecturer')
+        category = TaskCategory.objects.create(name='Testing')
+        self.students = []
+        for i, lecturer in enumerate((self.lecturer, None)):
+            user = create_user('student', f'student{i}')
+            student = create_student(user, company, registration_no=f'REG-00{i}', lecturer=lecturer)
+            DailyTask.objects.create(
+                student=student,
+                description='Wrote, "quoted" tests',
+                task_category=category,
+                hours_spent=2,
+                tools_used=['pytest', 'git'],
+                approved=bool(i)
+            )
+            self.students.append(student)
+
+    def content(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv(self):
+        self.client.force_authenticate(user=self.lecturer)
+        response = self.client.get(reverse('logbook-export'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment;', response['Content-Disposition'])
+
+        rows = list(csv.DictReader(StringIO(self.content(response))))
+        # Only the lecturer's own student
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['registration_no'], 'REG-000')
+        self.assertEqual(rows[0]['description'], 'Wrote, "quoted" tests')
+        self.assertEqual(rows[0]['tools_used'], 'pytest, git')
+
+    def test_csv_neutralizes_formulas(self):
+        DailyTask.objects.filter(student=self.students[0]).update(
+            description='=HYPERLINK("http://evil.test")', tools_used=['@SUM(A1)', 'git']
+        )
+        self.client.force_authenticate(user=self.lecturer)
+        response = self.client.get(reverse('logbook-export'))
+        row = next(csv.DictReader(StringIO(self.content(response))))
+        self.assertEqual(row['description'], '\'=HYPERLINK("http://evil.test")')
+        self.assertEqual(row['tools_used'], "'@SUM(A1), git")
+        self.assertEqual(row['hours_spent'], '2.0')
+
+    def test_ndjson_with_filters(self):
+        admin = create_user('admin')
+        self.client.force_authenticate(user=admin)
+        response = self.client.get(reverse('logbook-export'), {'export_format': 'ndjson'})
+        self.assertEqual(len(self.content(response).splitlines()), 2)
+
+        response = self.client.get(reverse('logbook-export'), {
+            'export_format': 'ndjson',
+            'approved': 'true',
+            'date_from': date.today().isoformat()
+        })
+        rows = [json.loads(line) for line in self.content(response).splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['registration_no'], 'REG-001')
+        self.assertEqual(rows[0]['tools_used'], ['pytest', 'git'])
+
+        response = self.client.get(reverse('logbook-export'), {'date_from': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TaskSearchTest(APITestCase):
+    """Test ranked full-text search over daily tasks"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Test databases built without migrations have no search index yet
+        install_search_index(connection)
+
+        company = create_company()
+        cls.lecturer = create_user('lecturer')
+        category = TaskCategory.objects.create(name='Ops')
+        cls.tasks = []
+        for i, lecturer in enumerate((cls.lecturer, None)):
+            user = create_user('student', f'student{i}')
+            student = create_student(user, company, registration_no=f'REG-00{i}', lecturer=lecturer)
+            for description, tools in (
+                ('Kubernetes upgrade, then kubernetes node drain', ['kubectl']),
+                ('Wrote the weekly report for the team lead and reviewed a long list of open tickets', ['Kubernetes']),
+                ('Fixed the login form', ['react']),
+            ):
+                cls.tasks.append(DailyTask.objects.create(
+                    student=student,
+                    description=description,
+                    task_category=category,
+                    hours_spent=1,
+                    tools_used=tools
+                ))
+
+    def search(self, **params):
+        return self.client.get(reverse('daily-task-search'), params)
+
+    def test_ranked_and_scoped(self):
+        self.client.force_authenticate(user=self.lecturer)
+        response = self.search(q='kubernetes')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Only the lecturer's own student, best match first
+        self.assertEqual(
+            [task['id'] for task in response.data['results']],
+            [str(self.tasks[0].pk), str(self.tasks[1].pk)]
+        )
+
+    def test_keyset_pages(self):
+        self.client.force_authenticate(user=self.lecturer)
+        first = self.search(q='kubernetes', page_size=1)
+        second = self.client.get(first.data['next'])
+        self.assertEqual(second.data['results'][0]['id'], str(self.tasks[1].pk))
+        self.assertIsNone(second.data['next'])
+
+    @skipUnless(connection.vendor == 'postgresql', 'ts_rank is PostgreSQL only')
+    def test_keyset_pages_by_ts_rank(self):
+        # Ranks that are not exact in float4 must still round-trip through the cursor
+        student = self.tasks[0].student
+        for i in range(1, 8):
+            DailyTask.objects.create(
+                student=student,
+                description=' '.join(['kubernetes'] * i + ['filler'] * (i * 3)),
+                task_category=self.tasks[0].task_category,
+                hours_spent=1
+            )
+        expected = {str(task.pk) for task in DailyTask.objects.filter(student=student, description__icontains='kubernetes')}
+
+        self.client.force_authenticate(user=self.lecturer)
+        seen = []
+        response = self.search(q='kubernetes', page_size=1)
+        while True:
+            seen.extend(task['id'] for task in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(len(seen), len(expected))
+        self.assertEqual(set(seen), expected)
+
+    def test_index_follows_writes(self):
+        self.client.force_authenticate(user=self.lecturer)
+        task = self.tasks[2]
+        task.description = 'Moved the login form to Terraform'
+        task.save()
+        self.assertEqual(len(self.search(q='terraform').data['results']), 1)
+
+        task.delete()
+        self.assertEqual(self.search(q='terraform').data['results'], [])
+
+    def test_query_text_is_not_syntax(self):
+        self.client.force_authenticate(user=self.lecturer)
+        response = self.search(q='kubernetes" OR NEAR(')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.search(q='k').status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TaskTermTest(APITestCase):
+    """Test the tools/skills vocabulary and the usage endpoint"""
+
+    def setUp(self):
+        self.admin = create_user('admin')
+        category = TaskCategory.objects.create(name='Dev')
+        self.companies = []
+        self.tasks = []
+        for i in range(2):
+            company = create_company(f'Company {i}', f'info{i}@company.test')
+            user = create_user('student', f'student{i}')
+            student = create_student(user, company, registration_no=f'REG-00{i}')
+            self.companies.append(company)
+            self.tasks.append(DailyTask.objects.create(
+                student=student,
+                description='Containerised the API',
+                task_category=category,
+                hours_spent=2,
+                tools_used=['Docker', ' docker ', 'Git'] if i == 0 else ['DOCKER'],
+                skills_applied=['Testing']
+            ))
+
+    def names(self, task):
+        return set(task.term_links.values_list('kind', 'term__name'))
+
+    def test_terms_are_case_folded(self):
+        docker = TaskTerm.objects.get(kind='tool', name='docker')
+        self.assertEqual(docker.display_name, 'Docker')
+        self.assertEqual(TaskTerm.objects.count(), 3)
+        self.assertEqual(
+            self.names(self.tasks[0]),
+            {('tool', 'docker'), ('tool', 'git'), ('skill', 'testing')}
+        )
+
+    def test_links_follow_writes(self):
+        task = self.tasks[0]
+        task.tools_used = ['Kubernetes']
+        task.save()
+        self.assertEqual(self.names(task), {('tool', 'kubernetes'), ('skill', 'testing')})
+
+        DailyTask.objects.filter(pk=task.pk).update(skills_applied=['Ops'])
+        self.assertEqual(self.names(task), {('tool', 'kubernetes'), ('skill', 'ops')})
+
+        task.delete()
+        self.assertFalse(DailyTaskTerm.objects.filter(task_id=task.pk).exists())
+
+    def test_top_terms(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(reverse('term-usage'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        top = response.data['tool'][0]
+        self.assertEqual((top['name'], top['tasks'], top['students']), ('docker', 2, 2))
+
+        response = self.client.get(reverse('term-usage'), {
+            'kind': 'tool', 'company': str(self.companies[1].pk)
+        })
+        self.assertEqual(list(response.data), ['tool'])
+        self.assertEqual([row['name'] for row in response.data['tool']], ['docker'])
+
+        response = self.client.get(reverse('term-usage'), {'kind': 'language'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_week_filter_uses_task_date(self):
+        DailyTask.objects.filter(pk=self.tasks[0].pk).update(date=date(2025, 3, 5))
+        # A later save restamps iso_year/week_number with this week
+        task = DailyTask.objects.get(pk=self.tasks[0].pk)
+        task.skills_applied = ['Testing', 'Docs']
+        task.save()
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(reverse('term-usage'), {'kind': 'tool', 'week': '2025-W10'})
+        self.assertEqual([(row['name'], row['tasks']) for row in response.data['tool']], [('docker', 1), ('git', 1)])
+
+    def test_student_sees_own_terms(self):
+        self.client.force_authenticate(user=self.tasks[1].student.user)
+        response = self.client.get(reverse('term-usage'), {'kind': 'tool'})
+        self.assertEqual([(row['name'], row['tasks']) for row in response.data['tool']], [('docker', 1)])
+
+    def test_rebuild_command(self):
+        DailyTaskTerm.objects.all().delete()
+        call_command('rebuild_task_terms', batch_size=1, stdout=StringIO())
+        self.assertEqual(DailyTaskTerm.objects.count(), 5)
+
+
+class TermAutocompleteTest(APITestCase):
+    """Test the in-process tools/skills autocomplete"""
+
+    def setUp(self):
+        term_autocomplete.clear()
+        user = create_user('student')
+        company = create_company()
+        self.student = create_student(user, company)
+        self.category = TaskCategory.objects.create(name='Dev')
+        for tools in (['Docker', 'VS Code'], ['docker', 'Dojo']):
+            self.add_task(tools)
+        self.client.force_authenticate(user=user)
+
+    def add_task(self, tools):
+        return DailyTask.objects.create(
+            student=self.student,
+            description='Built things',
+            task_category=self.category,
+            hours_spent=1,
+            tools_used=tools
+        )
+
+    def suggest(self, q, kind='tool'):
+        response = self.client.get(reverse('term-autocomplete'), {'kind': kind, 'q': q})
+        return [(row['display_name'], row['uses']) for row in response.data['results']]
+
+    def test_trie(self):
+        trie = TermTrie(top=2)
+        trie.load([('git', 'Git', 3), ('github actions', 'GitHub Actions', 1), ('gitlab', 'GitLab', 2)])
+        self.assertEqual([row[0] for row in trie.complete('git', 5)], ['git', 'gitlab'])
+        self.assertEqual(trie.complete('act', 5), [('github actions', 'GitHub Actions', 1)])
+
+        trie.add('github actions', 'GitHub Actions', 5)
+        self.assertEqual([row[0] for row in trie.complete('git', 5)], ['github actions', 'git'])
+        trie.add('git', 'Git', -3)
+        self.assertEqual([row[0] for row in trie.complete('git', 5)], ['github actions'])
+
+    def test_suggestions_by_usage(self):
+        self.assertEqual(self.suggest('DO'), [('Docker', 2), ('Dojo', 1)])
+        self.assertEqual(self.suggest('code'), [('VS Code', 1)])
+        self.assertEqual(self.suggest(''), [])
+        self.assertEqual(self.suggest('do', kind='skill'), [])
+
+    def test_keystrokes_skip_the_database(self):
+        self.suggest('d')
+        with self.assertNumQueries(0):
+            self.suggest('do')
+
+    def test_one_caller_rebuilds_stale_tries(self):
+        term_autocomplete.warm()
+        term_autocomplete._built_at -= term_autocomplete.refresh_seconds + 1
+        # While another caller rebuilds, lookups answer from the old tries
+        with term_autocomplete._refresh_lock, self.assertNumQueries(0):
+            self.assertEqual(self.suggest('DO'), [('Docker', 2), ('Dojo', 1)])
+        with self.assertNumQueries(1):
+            self.suggest('DO')
+        with self.assertNumQueries(0):
+            self.suggest('DO')
+
+    def test_new_tasks_update_suggestions(self):
+        self.suggest('d')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_task(['Dojo'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_task(['dojo', 'Django'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.suggest('d'), [('Dojo', 3), ('Docker', 2), ('Django', 1)])
+
+    def test_invalid_kind(self):
+        response = self.client.get(reverse('term-autocomplete'), {'kind': 'language', 'q': 'py'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class DuplicateTaskTest(APITestCase):
+    """Test MinHash/LSH near-duplicate task detection"""
+
+    copied = (
+        'Configured the staging Kubernetes cluster, rotated the TLS certificates '
+        'and documented the rollback steps for the deployment pipeline'
+    )
+
+    def setUp(self):
+        self.companies = []
+        students = []
+        for i in range(2):
+            company = create_company(f'Company {i}', f'info{i}@company.test')
+            self.companies.append(company)
+            for j in range(2):
+                user = create_user('student', f'student{i}{j}')
+                students.append(create_student(user, company, registration_no=f'REG-{i}{j}'))
+        supervisor = create_user('supervisor')
+        Supervisor.objects.create(user=supervisor, company=self.companies[0], phone_number='0711111111', position='Lead')
+        self.supervisor = supervisor
+
+        category = TaskCategory.objects.create(name='Ops')
+        descriptions = [
+            (students[0], self.copied),
+            (students[0], self.copied + ' again'),
+            (students[1], self.copied.replace('Configured', 'Set up')),
+            (students[1], 'Reviewed pull requests for the billing service and paired on a flaky test'),
+            # Same text at another company
+            (students[2], self.copied),
+        ]
+        self.tasks = [
+            DailyTask.objects.create(student=student, description=text, task_category=category, hours_spent=2)
+            for student, text in descriptions
+        ]
+
+    def clusters(self, **params):
+        self.client.force_authenticate(user=self.supervisor)
+        response = self.client.get(reverse('duplicate-task-clusters'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['clusters']
+
+    def test_signatures(self):
+        self.assertEqual(DailyTaskFingerprint.objects.count(), 5)
+        self.assertEqual(DailyTaskBand.objects.filter(task=self.tasks[0]).count(), 16)
+        self.assertEqual(similarity(minhash(self.copied), minhash(self.copied)), 1.0)
+        self.assertLess(similarity(minhash(self.copied), minhash(self.tasks[3].description)), 0.2)
+        self.assertIsNone(minhash('  ...  '))
+
+    def test_clusters_within_company(self):
+        clusters = self.clusters()
+        self.assertEqual(len(clusters), 1)
+        cluster = clusters[0]
+        self.assertEqual({task['id'] for task in cluster['tasks']}, {task.pk for task in self.tasks[:3]})
+        self.assertEqual(cluster['students'], 2)
+        self.assertGreaterEqual(cluster['similarity'], 0.8)
+
+    def test_threshold_and_student_filter(self):
+        clusters = self.clusters(student=str(self.tasks[0].student_id))
+        self.assertEqual([cluster['size'] for cluster in clusters], [2])
+        self.assertEqual(self.clusters(threshold='1'), [])
+        response = self.client.get(reverse('duplicate-task-clusters'), {'threshold': '2'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_edits_refresh_fingerprints(self):
+        task = self.tasks[2]
+        DailyTask.objects.filter(pk=task.pk).update(description='Something else entirely, written fresh today')
+        self.assertEqual(self.clusters()[0]['size'], 2)
+
+        task = self.tasks[1]
+        task.delete()
+        self.assertEqual(self.clusters(), [])
+
+    def test_every_pair_in_a_bucket(self):
+        DailyTaskBand.objects.all().delete()
+        ids = sorted(task.pk for task in self.tasks[:3])
+        DailyTaskBand.objects.bulk_create(
+            DailyTaskBand(task_id=task_id, student_id=self.tasks[0].student_id, band=0, bucket=1)
+            for task_id in ids
+        )
+        bands = DailyTaskBand.objects.all()
+        # Not only the pairs with the bucket's first task
+        self.assertEqual(candidate_pairs(bands), {(ids[0], ids[1]), (ids[0], ids[2]), (ids[1], ids[2])})
+        self.assertEqual(candidate_pairs(bands, limit=1), {(ids[0], ids[1]), (ids[1], ids[2])})
+
+    def test_approval_keeps_fingerprints(self):
+        task = DailyTask.objects.get(pk=self.tasks[0].pk)
+        bands = set(DailyTaskBand.objects.filter(task=task).values_list('pk', flat=True))
+        task.approved = True
+        task.save(update_fields=['approved'])
+        task.supervisor_comments = 'Fine'
+        task.save()
+        self.assertEqual(set(DailyTaskBand.objects.filter(task=task).values_list('pk', flat=True)), bands)
+
+        task.description = 'Something else entirely, written fresh today'
+        task.save()
+        self.assertNotEqual(set(DailyTaskBand.objects.filter(task=task).values_list('pk', flat=True)), bands)
+
+    def test_rebuild_command(self):
+        DailyTaskBand.objects.all().delete()
+        DailyTaskFingerprint.objects.all().delete()
+        call_command('rebuild_task_fingerprints', batch_size=2, stdout=StringIO())
+        self.assertEqual(DailyTaskBand.objects.count(), 5 * 16)
+        self.assertEqual(len(self.clusters()), 1)
+
+
+class TaskCategoryResolutionTest(APITestCase):
+    """Test case-insensitive, cached task category resolution"""
+
+    def setUp(self):
+        category_resolver.clear()
+        user = create_user('student')
+        company = create_company()
+        create_student(user, company)
+        self.client.force_authenticate(user=user)
+
+    def create_task(self, **data):
+        return self.client.post(reverse('daily-task-create'), {
+            'description': 'Wrote docs',
+            'hours_spent': 2,
+            **data
+        }, format='json')
+
+    def test_default_category(self):
+        response = self.create_task()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(DailyTask.objects.get().task_category.name, 'General Tasks')
+
+    def test_existing_category_in_any_case(self):
+        category = TaskCategory.objects.create(name='Testing')
+        response = self.create_task(task_category_name=' testing ')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(DailyTask.objects.get().task_category_id, category.pk)
+        self.assertEqual(TaskCategory.objects.count(), 1)
+
+        # Resolved from the cache from now on
+        with self.assertNumQueries(0):
+            self.assertEqual(category_resolver.get('TESTING').pk, category.pk)
+
+    def test_get_or_create(self):
+        first, created = category_resolver.get_or_create('Docs', is_user_created=True)
+        self.assertTrue(created)
+        second, created = category_resolver.get_or_create('DOCS')
+        self.assertFalse(created)
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(TaskCategory.objects.filter(name__iexact='docs').count(), 1)
+
+    def test_names_are_stored_stripped(self):
+        spaced = TaskCategory.objects.create(name=' Testing ')
+        self.assertEqual(TaskCategory.objects.get(pk=spaced.pk).name, 'Testing')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            TaskCategory.objects.create(name='testing')
+        category, created = category_resolver.get_or_create('  TESTING')
+        self.assertEqual((category.pk, created), (spaced.pk, False))
+
+    def test_case_insensitive_unique_index(self):
+        TaskCategory.objects.create(name='Testing')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            TaskCategory.objects.create(name='TESTING')
+
+        response = self.client.post(reverse('task-categories'), {'name': 'tEsTiNg'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_changes_clear_the_cache(self):
+        category = TaskCategory.objects.create(name='Testing')
+        self.assertIsNotNone(category_resolver.get('testing'))
+        category.name = 'QA'
+        category.save()
+        self.assertIsNone(category_resolver.get('testing'))
+        self.assertEqual(category_resolver.get('qa').pk, category.pk)
+
+        category.delete()
+        self.assertIsNone(category_resolver.get('qa'))
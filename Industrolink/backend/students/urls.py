@@ -1,6 +1,6 @@
 # students/urls.py
 from django.urls import path
-from . import views
+from . import views, async_views
 
 urlpatterns = [
     path('profile/create/', views.StudentProfileCreateView.as_view(), name='student-profile-create'),
@@ -12,12 +12,18 @@ urlpatterns = [
     # Daily Task URLs
     path('tasks/', views.DailyTaskListView.as_view(), name='daily-tasks-list'),
     path('tasks/create/', views.DailyTaskCreateView.as_view(), name='daily-task-create'),
+    path('tasks/search/', views.DailyTaskSearchView.as_view(), name='daily-task-search'),
     path('tasks/today/', views.TodayTaskView.as_view(), name='today-task'),
+    path('tasks/today/async/', async_views.today_task_async_view, name='today-task-async'),
     path('tasks/<uuid:pk>/', views.DailyTaskDetailView.as_view(), name='daily-task-detail'),
     path('tasks/<uuid:task_id>/approve/', views.approve_task, name='approve-task'),
     
     # Statistics and Reports
     path('tasks/statistics/', views.task_statistics, name='task-statistics'),
     path('tasks/weekly-summary/', views.weekly_summary, name='weekly-summary'),
+    path('tasks/export/', views.LogbookExportView.as_view(), name='logbook-export'),
+    path('tasks/duplicates/', views.DuplicateTaskClustersView.as_view(), name='duplicate-task-clusters'),
+    path('terms/top/', views.TermUsageView.as_view(), name='term-usage'),
+    path('terms/autocomplete/', views.TermAutocompleteView.as_view(), name='term-autocomplete'),
 
 ]
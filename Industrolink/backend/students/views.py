@@ -3,12 +3,25 @@ from rest_framework.response import Response
 from .models import Student
 from .serializers import StudentProfileSerializer
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework.views import APIView
 
-from django.db.models import Q, Count, Sum
+import uuid
+from django.db.models import Q
+from django.http import StreamingHttpResponse
 from django.db import IntegrityError
 from django.shortcuts import get_object_or_404
-from datetime import date, timedelta
-from .models import DailyTask, TaskCategory
+from users.authentication import CookieJWTClaimsAuthentication
+from datetime import date
+from .models import DailyTask, DailyTaskBand, DailyTaskTerm, TaskCategory
+from .duplicates import find_duplicate_clusters
+from .exports import EXPORT_FORMATS, STREAMERS
+from .pagination import DailyTaskPagination, TaskSearchPagination
+from .rollups import rollup_week_summaries
+from .search import search_tasks
+from .stats import MAX_SUMMARY_WEEKS, get_task_statistics, parse_week, summarize_weeks
+from .autocomplete import term_autocomplete
+from .vocabulary import TERM_SOURCES, normalize_term, top_terms
 from .serializers import (
     DailyTaskSerializer, 
     DailyTaskCreateSerializer, 
@@ -150,11 +163,13 @@ class DailyTaskCreateView(generics.CreateAPIView):
 class DailyTaskListView(generics.ListAPIView):
     """
     List daily tasks for the authenticated student
-    Supports filtering by date range, week, approval status
+    Supports filtering by date range, week, approval status.
+    Pages are keyset-paginated on (-date, -created_at, -id); see
+    students/pagination.py for the cursor and ?count=true parameters.
     """
     serializer_class = DailyTaskSerializer
     permission_classes = [permissions.IsAuthenticated]
-    pagination_class = None  # Disable pagination to use our custom response format
+    pagination_class = DailyTaskPagination
     
     def get_queryset(self):
         try:
@@ -167,9 +182,13 @@ class DailyTaskListView(generics.ListAPIView):
                 
                 queryset = DailyTask.objects.filter(student=user.student_profile)
             # Lecturers and supervisors can see tasks of students they supervise
-            elif user.role in ['lecturer', 'supervisor']:
-                # For now, show all tasks - you can add supervision logic here
-                queryset = DailyTask.objects.all()
+            elif user.role == 'lecturer':
+                queryset = DailyTask.objects.filter(student__lecturer=user)
+            elif user.role == 'supervisor':
+                if not hasattr(user, 'supervisor_profile'):
+                    return DailyTask.objects.none()
+                
+                queryset = DailyTask.objects.filter(student__company_id=user.supervisor_profile.company_id)
             else:
                 return DailyTask.objects.none()
         except Exception as e:
@@ -222,55 +241,10 @@ class DailyTaskListView(generics.ListAPIView):
                 elif approved.lower() in ['false', '0']:
                     queryset = queryset.filter(approved=False)
             
-            # Order by date (most recent first) and then by creation time
-            final_queryset = queryset.order_by('-date', '-created_at')
-            
-            # Apply limit if specified (after ordering)
-            limit = self.request.query_params.get('limit')
-            if limit:
-                try:
-                    limit = int(limit)
-                    if limit > 0:
-                        final_queryset = final_queryset[:limit]
-                except ValueError:
-                    pass
-            
-            return final_queryset
+            # Ordering and the page size (`limit`) are left to the paginator
+            return queryset.select_related('student__user', 'task_category', 'supervisor')
         except Exception as e:
             return DailyTask.objects.none()
-    
-    def list(self, request, *args, **kwargs):
-        """
-        Override list method to use custom response format
-        """
-        try:
-            queryset = self.get_queryset()
-            serializer = self.get_serializer(queryset, many=True)
-            return self.get_paginated_response(serializer.data)
-        except Exception as e:
-            return Response({
-                'error': 'Internal server error occurred while fetching tasks',
-                'details': str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-    
-    def get_paginated_response(self, data):
-        """
-        Override to return consistent response format
-        """
-        try:
-            # Since pagination is disabled, just return the data in the expected format
-            response_data = {
-                'count': len(data),
-                'next': None,
-                'previous': None,
-                'results': data
-            }
-            return Response(response_data)
-        except Exception as e:
-            return Response({
-                'error': 'Internal server error occurred while formatting response',
-                'details': str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 class DailyTaskDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -395,51 +369,8 @@ def task_statistics(request):
             'error': 'Statistics only available for students'
         }, status=status.HTTP_403_FORBIDDEN)
     
-    student = user.student_profile
-    tasks = DailyTask.objects.filter(student=student)
-    
-    # Get current week
-    today = date.today()
-    iso_year, iso_week, _ = today.isocalendar()
-    
-    # Overall statistics
-    total_tasks = tasks.count()
-    approved_tasks = tasks.filter(approved=True).count()
-    total_hours = tasks.aggregate(Sum('hours_spent'))['hours_spent__sum'] or 0
-    
-    # Current week statistics
-    current_week_tasks = tasks.filter(week_number=iso_week, iso_year=iso_year)
-    current_week_count = current_week_tasks.count()
-    current_week_hours = current_week_tasks.aggregate(Sum('hours_spent'))['hours_spent__sum'] or 0
-    
-    # Task categories breakdown
-    category_stats = tasks.values('task_category__name').annotate(
-        count=Count('id'),
-        hours=Sum('hours_spent')
-    ).order_by('-count')
-    
-    # Recent tasks (last 7 days)
-    week_ago = today - timedelta(days=7)
-    recent_tasks = tasks.filter(date__gte=week_ago).count()
-    
-    return Response({
-        'total_tasks': total_tasks,
-        'approved_tasks': approved_tasks,
-        'pending_approval': total_tasks - approved_tasks,
-        'total_hours': round(total_hours, 2),
-        'approval_rate': round((approved_tasks / total_tasks * 100) if total_tasks > 0 else 0, 2),
-        'current_week': {
-            'week_number': iso_week,
-            'year': iso_year,
-            'task_count': current_week_count,
-            'hours': round(current_week_hours, 2)
-        },
-        'recent_activity': {
-            'tasks_last_7_days': recent_tasks
-        },
-        'category_breakdown': category_stats,
-        'average_hours_per_task': round(total_hours / total_tasks if total_tasks > 0 else 0, 2)
-    })
+    # One grouped query on a miss, cleared whenever a task changes
+    return Response(get_task_statistics(user.student_profile))
 
 
 @api_view(['GET'])
@@ -455,63 +386,301 @@ def weekly_summary(request):
             'error': 'Weekly summary only available for students'
         }, status=status.HTTP_403_FORBIDDEN)
     
+    student = user.student_profile
+    current_year, current_week, _ = date.today().isocalendar()
+    
+    # Range mode: ?from_week=&to_week= as "2025-W07" or week numbers in ?year=
+    from_week = request.query_params.get('from_week')
+    to_week = request.query_params.get('to_week')
+    if from_week or to_week:
+        try:
+            default_year = int(request.query_params.get('year') or current_year)
+            first = parse_week(from_week or to_week, default_year)
+            last = parse_week(to_week or from_week, default_year)
+        except ValueError:
+            return Response({
+                'error': 'Invalid week or year format'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        weeks = (date.fromisocalendar(*last, 1) - date.fromisocalendar(*first, 1)).days // 7 + 1
+        if weeks < 1:
+            return Response({
+                'error': 'from_week must not be after to_week'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if weeks > MAX_SUMMARY_WEEKS:
+            return Response({
+                'error': f'At most {MAX_SUMMARY_WEEKS} weeks per request'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # ?summary_only=true skips the daily breakdown and reads the rollups
+        if request.query_params.get('summary_only', '').lower() in ('1', 'true'):
+            return Response({'weeks': rollup_week_summaries(student, first, last)})
+        return Response({'weeks': summarize_weeks(student, first, last)})
+    
     # Get week and year from query params or use current week
     week = request.query_params.get('week')
     year = request.query_params.get('year')
     
     if not week or not year:
-        today = date.today()
-        year, week, _ = today.isocalendar()
+        year, week = current_year, current_week
     else:
         try:
-            week = int(week)
-            year = int(year)
+            year, week = parse_week(week, int(year))
         except ValueError:
             return Response({
                 'error': 'Invalid week or year format'
             }, status=status.HTTP_400_BAD_REQUEST)
     
-    student = user.student_profile
-    weekly_tasks = DailyTask.objects.filter(
-        student=student,
-        week_number=week,
-        iso_year=year
-    )
+    # The whole week is one query, bucketed by day in summarize_weeks
+    return Response(summarize_weeks(student, (year, week), (year, week))[0])
+
+def student_scope(user):
+    """
+    Q over a `student` relation for the logbooks the user may read: their
+    own for students, their assigned students' for lecturers, their
+    company's for supervisors and everyone's for admins. None when the user
+    has no logbook access.
+    """
+    if user.role == 'admin':
+        return Q()
+    if user.role == 'lecturer':
+        return Q(student__lecturer=user)
+    if user.role == 'supervisor' and hasattr(user, 'supervisor_profile'):
+        return Q(student__company_id=user.supervisor_profile.company_id)
+    if user.role == 'student' and hasattr(user, 'student_profile'):
+        return Q(student=user.student_profile)
+    return None
+
+
+def visible_tasks(user):
+    """Tasks the user may read across students, or None (see student_scope)"""
+    scope = student_scope(user)
+    return None if scope is None else DailyTask.objects.filter(scope)
+
+
+class DailyTaskSearchView(generics.ListAPIView):
+    """
+    Ranked full-text search (?q=) over the description, tools and skills
+    of the tasks the caller can see, keyset-paginated by relevance
+    """
+    serializer_class = DailyTaskSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TaskSearchPagination
     
-    # Calculate week start and end dates
-    # ISO week starts on Monday
-    jan_1 = date(year, 1, 1)
-    week_start = jan_1 + timedelta(days=(week - 1) * 7 - jan_1.weekday())
-    week_end = week_start + timedelta(days=6)
+    def list(self, request, *args, **kwargs):
+        text = request.query_params.get('q', '').strip()
+        if len(text) < 2:
+            return Response({
+                'error': 'Search text (q) must be at least 2 characters'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        tasks = visible_tasks(request.user)
+        if tasks is None:
+            return Response({
+                'error': 'You do not have access to any logbooks'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        tasks = search_tasks(tasks, text).select_related('student__user', 'task_category', 'supervisor')
+        page = self.paginate_queryset(tasks)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class LogbookExportView(APIView):
+    """
+    Stream a logbook as CSV (default) or NDJSON (?export_format=ndjson).
+    Filters: student, company, date_from, date_to (YYYY-MM-DD), approved.
+    Students get their own tasks, lecturers their assigned students',
+    supervisors their company's and admins everyone's.
+    """
+    permission_classes = [permissions.IsAuthenticated]
     
-    # Statistics
-    total_tasks = weekly_tasks.count()
-    approved_tasks = weekly_tasks.filter(approved=True).count()
-    total_hours = weekly_tasks.aggregate(Sum('hours_spent'))['hours_spent__sum'] or 0
+    def get(self, request):
+        tasks = visible_tasks(request.user)
+        if tasks is None:
+            return Response({
+                'error': 'You do not have access to any logbooks'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        export_format = request.query_params.get('export_format', 'csv').lower()
+        if export_format not in STREAMERS:
+            return Response({
+                'error': f"export_format must be one of: {', '.join(STREAMERS)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Everything is validated up front; errors cannot be reported once
+        # the response has started streaming
+        params = request.query_params
+        try:
+            if params.get('student'):
+                tasks = tasks.filter(student_id=uuid.UUID(params['student']))
+            if params.get('company'):
+                tasks = tasks.filter(student__company_id=uuid.UUID(params['company']))
+            if params.get('date_from'):
+                tasks = tasks.filter(date__gte=date.fromisoformat(params['date_from']))
+            if params.get('date_to'):
+                tasks = tasks.filter(date__lte=date.fromisoformat(params['date_to']))
+        except ValueError:
+            return Response({
+                'error': 'Invalid student, company or date filter'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        approved = params.get('approved')
+        if approved is not None:
+            if approved.lower() in ['true', '1']:
+                tasks = tasks.filter(approved=True)
+            elif approved.lower() in ['false', '0']:
+                tasks = tasks.filter(approved=False)
+        
+        response = StreamingHttpResponse(
+            STREAMERS[export_format](tasks),
+            content_type=EXPORT_FORMATS[export_format]
+        )
+        filename = f'logbook-{date.today():%Y%m%d}.{export_format}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class TermUsageView(APIView):
+    """
+    Most used tools and skills across the logbooks the caller can see.
+    Filters: kind (tool or skill), student, company, course, week
+    ("2025-W07" or a week number in the current year) and limit.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_limit = 100
+    
+    def get(self, request):
+        scope = student_scope(request.user)
+        if scope is None:
+            return Response({
+                'error': 'You do not have access to any logbooks'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        params = request.query_params
+        kinds = list(TERM_SOURCES)
+        if params.get('kind'):
+            if params['kind'] not in TERM_SOURCES:
+                return Response({
+                    'error': f"kind must be one of: {', '.join(TERM_SOURCES)}"
+                }, status=status.HTTP_400_BAD_REQUEST)
+            kinds = [params['kind']]
+        
+        links = DailyTaskTerm.objects.filter(scope)
+        try:
+            if params.get('student'):
+                links = links.filter(student_id=uuid.UUID(params['student']))
+            if params.get('company'):
+                links = links.filter(student__company_id=uuid.UUID(params['company']))
+            if params.get('week'):
+                year, week = parse_week(params['week'], date.today().isocalendar()[0])
+                links = links.filter(iso_year=year, week_number=week)
+            limit = min(int(params.get('limit', 20)), self.max_limit)
+        except ValueError:
+            return Response({
+                'error': 'Invalid student, company, week or limit'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if params.get('course'):
+            links = links.filter(student__course=params['course'])
+        
+        return Response({
+            kind: top_terms(links.filter(kind=kind), max(limit, 1))
+            for kind in kinds
+        })
+
+
+class TermAutocompleteView(APIView):
+    """
+    Tool or skill suggestions for what a student has typed so far
+    (?kind=tool|skill&q=...), most used first. Served from the in-process
+    trie, so a keystroke reads neither the user nor the vocabulary tables.
+    """
+    authentication_classes = [CookieJWTClaimsAuthentication, JWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
     
-    # Daily breakdown
-    daily_tasks = {}
-    for i in range(7):  # Monday to Sunday
-        day = week_start + timedelta(days=i)
-        day_tasks = weekly_tasks.filter(date=day)
-        daily_tasks[day.strftime('%A').lower()] = {
-            'date': day,
-            'has_task': day_tasks.exists(),
-            'task': DailyTaskSerializer(day_tasks.first()).data if day_tasks.exists() else None
-        }
+    def get(self, request):
+        kind = request.query_params.get('kind')
+        if kind not in TERM_SOURCES:
+            return Response({
+                'error': f"kind must be one of: {', '.join(TERM_SOURCES)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get('limit', 0))
+        except ValueError:
+            limit = 0
+        
+        prefix = normalize_term(request.query_params.get('q', ''))
+        return Response({
+            'results': [
+                {'name': name, 'display_name': display_name, 'uses': uses}
+                for name, display_name, uses in term_autocomplete.complete(kind, prefix, limit)
+            ]
+        })
+
+
+class DuplicateTaskClustersView(APIView):
+    """
+    Groups of near-identical task descriptions, within one student's
+    logbook or across students, among the logbooks the caller can see.
+    Filters: company, course, academic_year, student, threshold (0-1,
+    default NEAR_DUPLICATE_THRESHOLD) and limit (clusters returned).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_limit = 200
     
-    return Response({
-        'week_number': week,
-        'year': year,
-        'week_start': week_start,
-        'week_end': week_end,
-        'summary': {
-            'total_tasks': total_tasks,
-            'approved_tasks': approved_tasks,
-            'pending_tasks': total_tasks - approved_tasks,
-            'total_hours': round(total_hours, 2),
-            'average_hours_per_day': round(total_hours / 7, 2),
-            'completion_rate': round((total_tasks / 5 * 100), 2)  # Assuming 5 working days
-        },
-        'daily_breakdown': daily_tasks
-    })
\ No newline at end of file
+    def get(self, request):
+        scope = student_scope(request.user)
+        if scope is None:
+            return Response({
+                'error': 'You do not have access to any logbooks'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        params = request.query_params
+        bands = DailyTaskBand.objects.filter(scope)
+        try:
+            if params.get('student'):
+                bands = bands.filter(student_id=uuid.UUID(params['student']))
+            if params.get('company'):
+                bands = bands.filter(student__company_id=uuid.UUID(params['company']))
+            threshold = float(params['threshold']) if params.get('threshold') else None
+            limit = min(int(params.get('limit', 50)), self.max_limit)
+        except ValueError:
+            return Response({
+                'error': 'Invalid student, company, threshold or limit'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if threshold is not None and not 0 < threshold <= 1:
+            return Response({
+                'error': 'threshold must be between 0 and 1'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if params.get('course'):
+            bands = bands.filter(student__course=params['course'])
+        if params.get('academic_year'):
+            bands = bands.filter(student__academic_year=params['academic_year'])
+        
+        clusters = find_duplicate_clusters(bands, threshold)[:max(limit, 1)]
+        tasks = DailyTask.objects.select_related('student__user').in_bulk(
+            [task_id for task_ids, _ in clusters for task_id in task_ids]
+        )
+        results = []
+        for task_ids, score in clusters:
+            members = sorted(
+                (tasks[task_id] for task_id in task_ids if task_id in tasks),
+                key=lambda task: (task.date, task.created_at)
+            )
+            results.append({
+                'similarity': score,
+                'size': len(members),
+                'students': len({task.student_id for task in members}),
+                'tasks': [
+                    {
+                        'id': task.id,
+                        'student_id': task.student_id,
+                        'student_name': task.student.user.get_full_name(),
+                        'registration_no': task.student.registration_no,
+                        'date': task.date,
+                        'description': task.description,
+                    }
+                    for task in members
+                ]
+            })
+        return Response({'clusters': results})
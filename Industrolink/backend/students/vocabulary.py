@@ -0,0 +1,121 @@
+"""
+Normalized vocabulary of the tools and skills on DailyTask. The JSON lists
+stay the source of truth; every write rebuilds the task's DailyTaskTerm
+rows from them, so usage questions ("top skills at company X") are an
+indexed GROUP BY over daily_task_terms instead of parsing JSON in Python.
+"""
+from collections import Counter
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .autocomplete import term_autocomplete
+from .models import DailyTaskTerm, TaskTerm
+
+# kind -> DailyTask field the terms come from
+TERM_SOURCES = {
+    'tool': 'tools_used',
+    'skill': 'skills_applied',
+}
+# DailyTask fields the links are built from
+TERM_SOURCE_FIELDS = {
+    'tools_used', 'skills_applied', 'student', 'student_id', 'date',
+}
+TERM_MAX_LENGTH = TaskTerm._meta.get_field('name').max_length
+
+
+def normalize_term(value):
+    """Matching form of a term: whitespace collapsed and case-folded"""
+    return ' '.join(str(value).split()).casefold()[:TERM_MAX_LENGTH]
+
+
+def task_terms(task):
+    """{(kind, name): display_name} for a task's tools and skills"""
+    terms = {}
+    for kind, field in TERM_SOURCES.items():
+        values = getattr(task, field) or []
+        if not isinstance(values, list):
+            continue
+        for value in values:
+            name = normalize_term(value)
+            if name:
+                terms.setdefault((kind, name), ' '.join(str(value).split())[:TERM_MAX_LENGTH])
+    return terms
+
+
+def ensure_terms(terms):
+    """
+    {(kind, name): id} for `terms` ({(kind, name): display_name}), adding
+    the ones the vocabulary does not have yet
+    """
+    if not terms:
+        return {}
+    TaskTerm.objects.bulk_create(
+        [TaskTerm(kind=kind, name=name, display_name=display) for (kind, name), display in terms.items()],
+        ignore_conflicts=True,
+    )
+    condition = Q()
+    for kind in {kind for kind, _ in terms}:
+        condition |= Q(kind=kind, name__in=[name for term_kind, name in terms if term_kind == kind])
+    return {
+        (kind, name): pk
+        for pk, kind, name in TaskTerm.objects.filter(condition).values_list('pk', 'kind', 'name')
+    }
+
+
+def sync_task_terms(tasks, created=False):
+    """
+    Rebuild the DailyTaskTerm rows of `tasks` from their JSON lists.
+    `created` says the tasks are new, so they have no links to replace.
+    """
+    tasks = list(tasks)
+    if not tasks:
+        return
+
+    pks = [task.pk for task in tasks]
+    terms_by_task = [(task, task_terms(task)) for task in tasks]
+    displays = {key: display for _, terms in terms_by_task for key, display in terms.items()}
+    ids = ensure_terms(displays)
+
+    # The week of the task's date, as the rollups use; the stored
+    # iso_year/week_number are restamped on every save
+    weeks = {task.pk: task.date.isocalendar()[:2] for task in tasks}
+
+    old = Counter()
+    if not created:
+        old.update(DailyTaskTerm.objects.filter(task__in=pks).values_list('kind', 'term__name'))
+        DailyTaskTerm.objects.filter(task__in=pks).delete()
+    DailyTaskTerm.objects.bulk_create(
+        DailyTaskTerm(
+            task_id=task.pk,
+            term_id=ids[key],
+            kind=key[0],
+            student_id=task.student_id,
+            iso_year=weeks[task.pk][0],
+            week_number=weeks[task.pk][1],
+        )
+        for task, terms in terms_by_task
+        for key in terms
+    )
+
+    # Keep this process's autocomplete current once the links are committed
+    new = Counter(key for _, terms in terms_by_task for key in terms)
+    changes = {
+        key: (displays.get(key, key[1]), new[key] - old[key])
+        for key in old.keys() | new.keys()
+        if new[key] != old[key]
+    }
+    if changes:
+        transaction.on_commit(lambda: term_autocomplete.record(changes))
+
+
+def top_terms(links, limit=20):
+    """
+    The most used terms among `links` (a DailyTaskTerm queryset), with how
+    many tasks and students listed each
+    """
+    return list(
+        links
+        .values('term_id', name=F('term__name'), display_name=F('term__display_name'))
+        .annotate(tasks=Count('id'), students=Count('student', distinct=True))
+        .order_by('-tasks', 'name')[:limit]
+    )
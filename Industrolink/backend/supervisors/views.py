@@ -10,7 +10,7 @@ from students.models import Student
 from students.serializers import StudentProfileSerializer
 from lecturers.models import LecturerStudentAssignment
 from lecturers.serializers import LecturerStudentAssignmentSerializer, StudentListSerializer
-from students.models import DailyTask
+from students.models import DailyTask, DailyTaskWeeklyRollup
 from students.serializers import SupervisorTaskApprovalSerializer
 from rest_framework.decorators import action
 from django.db.models import Q
@@ -180,14 +180,14 @@ class SupervisorTaskApprovalView(generics.UpdateAPIView):
     """
     serializer_class = SupervisorTaskApprovalSerializer
     permission_classes = [permissions.IsAuthenticated]
-    queryset = DailyTask.objects.all()
+    queryset = DailyTask.objects.select_related('student')
     
     def get_object(self):
         task = super().get_object()
         # Check if user is supervisor of the student's company
         if (self.request.user.role != 'supervisor' or 
             not hasattr(self.request.user, 'supervisor_profile') or
-            task.student.company != self.request.user.supervisor_profile.company):
+            task.student.company_id != self.request.user.supervisor_profile.company_id):
             from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied("You can only approve tasks from your company students")
         return task
@@ -236,15 +236,17 @@ class SupervisorBulkTaskApprovalView(generics.GenericAPIView):
             return Response({'error': 'No valid tasks found for approval'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        # Approve all tasks
-        approved_count = 0
-        for task in tasks:
-            task.approved = True
-            task.supervisor = request.user
-            task.supervisor_comments = comments
-            task.approved_at = timezone.now()
-            task.save()
-            approved_count += 1
+        # Approve all tasks in one UPDATE; the queryset refreshes the
+        # weekly rollups of the weeks it touched
+        now = timezone.now()
+        approved_count = tasks.update(
+            approved=True,
+            supervisor=request.user,
+            supervisor_comments=comments,
+            approved_at=now,
+            # update() skips auto_now
+            updated_at=now
+        )
         
         return Response({
             'message': f'Successfully approved {approved_count} tasks',
@@ -277,7 +279,7 @@ class SupervisorWeeklyTasksView(generics.ListAPIView):
             approved=False  # Only show unapproved tasks
         ).select_related('student__user', 'task_category')
         
-        return queryset.order_by('week_number', 'date')
+        return queryset.order_by('date', 'created_at')
     
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
@@ -285,7 +287,9 @@ class SupervisorWeeklyTasksView(generics.ListAPIView):
         # Group tasks by week
         weekly_tasks = {}
         for task in queryset:
-            week_key = f"{task.iso_year}-W{task.week_number:02d}"
+            # The week of the task's date, as the rollups below use
+            iso_year, week_number, _ = task.date.isocalendar()
+            week_key = f"{iso_year}-W{week_number:02d}"
             if week_key not in weekly_tasks:
                 weekly_tasks[week_key] = []
             weekly_tasks[week_key].append(SupervisorTaskApprovalSerializer(task).data)
@@ -293,8 +297,25 @@ class SupervisorWeeklyTasksView(generics.ListAPIView):
         # Sort weeks chronologically
         sorted_weeks = sorted(weekly_tasks.keys())
         
+        # Week totals (approved tasks included) come from the rollup table
+        week_summaries = {}
+        if request.user.role == 'supervisor' and hasattr(request.user, 'supervisor_profile'):
+            rollups = DailyTaskWeeklyRollup.objects.filter(
+                student_id=self.kwargs.get('student_id'),
+                student__company_id=request.user.supervisor_profile.company_id
+            )
+            for rollup in rollups:
+                week_summaries[f"{rollup.iso_year}-W{rollup.week_number:02d}"] = {
+                    'task_count': rollup.task_count,
+                    'approved_count': rollup.approved_count,
+                    'pending_count': rollup.pending_count,
+                    'total_hours': rollup.total_hours,
+                    'last_submitted_at': rollup.last_submitted_at,
+                }
+        
         return Response({
             'weekly_tasks': {week: weekly_tasks[week] for week in sorted_weeks},
-            'total_tasks': queryset.count(),
+            'week_summaries': week_summaries,
+            'total_tasks': sum(len(tasks) for tasks in weekly_tasks.values()),
             'total_weeks': len(weekly_tasks)
         })
@@ -0,0 +1,58 @@
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from .models import AdminAction
+from .serializers import AdminUserSerializer
+from users.async_views import (
+    aauthenticate, hashing_busy, issue_tokens, read_json, set_auth_cookies, too_many_requests
+)
+from users.hashing import HashPoolBusy
+from users.throttling import check_limits
+
+
+@csrf_exempt
+@require_POST
+async def admin_login_async_view(request):
+    """Async admin login; the password check runs in the hashing pool"""
+    data = read_json(request)
+    if data is None:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+
+    email = data.get('email')
+    password = data.get('password')
+
+    wait = await sync_to_async(check_limits, thread_sensitive=False)(request, email, 'login_ip', 'login_email')
+    if wait is not None:
+        return too_many_requests(wait)
+
+    if not email or not password:
+        return JsonResponse({'error': 'Email and password are required'}, status=400)
+
+    try:
+        user = await aauthenticate(email, password)
+    except HashPoolBusy:
+        return hashing_busy()
+
+    if user is None:
+        return JsonResponse({'error': 'Invalid credentials'}, status=401)
+
+    if user.role != 'admin':
+        return JsonResponse({'error': 'Access denied. Admin role required'}, status=401)
+
+    refresh, access_token = await issue_tokens(user)
+
+    # Log the action
+    await AdminAction.objects.acreate(
+        admin=user,
+        action_type='admin_login',
+        description=f'Admin {user.email} logged in'
+    )
+
+    response = JsonResponse({
+        'message': 'Login successful',
+        'user': AdminUserSerializer(user).data
+    })
+    set_auth_cookies(response, refresh, access_token)
+    return response
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from systemadmin.provisioning import import_cohort
+
+
+class Command(BaseCommand):
+    help = 'Create users and student profiles in bulk from a CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', type=str, help='Path to the CSV file')
+        parser.add_argument('--dry-run', action='store_true', help='Validate the file without creating anything')
+        parser.add_argument('--chunk-size', type=int, default=None, help='Rows inserted per bulk_create')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['csv_file'], encoding='utf-8-sig', newline='') as csv_file:
+                report = import_cohort(
+                    csv_file,
+                    chunk_size=options['chunk_size'],
+                    dry_run=options['dry_run'],
+                )
+        except OSError as e:
+            raise CommandError(f'Could not read {options["csv_file"]}: {e}')
+
+        for error in report['errors']:
+            problems = '; '.join(f'{field}: {message}' for field, message in error['errors'].items())
+            self.stderr.write(f"Row {error['row']} ({error['email'] or 'no email'}): {problems}")
+
+        verb = 'Would create' if report['dry_run'] else 'Created'
+        message = f"{verb} {report['created']} of {report['rows']} user(s), {report['failed']} failed"
+        self.stdout.write(self.style.SUCCESS(message) if not report['failed'] else self.style.WARNING(message))
@@ -0,0 +1,22 @@
+import time
+from django.core.management.base import BaseCommand
+from systemadmin.provisioning import run_pending_imports
+
+
+class Command(BaseCommand):
+    help = 'Run cohort CSV imports uploaded through the admin API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-jobs', type=int, default=None, help='Stop after this many imports')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for uploads until interrupted')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds between polls in --loop mode')
+
+    def handle(self, *args, **options):
+        while True:
+            ran = run_pending_imports(max_jobs=options['max_jobs'])
+            if ran or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f'Ran {ran} cohort import(s)'))
+
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -40,6 +40,12 @@ class AdminInvite(models.Model):
             return not self.used and not self.is_expired
         except:
             return False
+    
+    @property
+    def registration_url(self):
+        """Public frontend page where the invitee creates their account"""
+        frontend_url = settings.FRONTEND_URL
+        return f"{frontend_url}/admin-invite/{self.token}"
 
 class AdminAction(models.Model):
     ACTION_TYPES = [
@@ -57,6 +63,7 @@ class AdminAction(models.Model):
         ('session_verification', 'Session Verification'),
         ('setting_update', 'Setting Update'),
         ('user_details_viewed', 'User Details Viewed'),
+        ('cohort_import', 'Cohort Import'),
     ]
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -118,3 +125,37 @@ class AdminSettings(models.Model):
                 return "Admin Setting"
         except:
             return "Admin Setting"
+
+class CohortImportJob(models.Model):
+    """An uploaded cohort CSV, imported by `manage.py run_cohort_imports`"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='cohort_imports')
+    file_name = models.CharField(max_length=255)
+    # The upload itself; cleared once the import has run
+    csv_data = models.TextField(blank=True)
+    dry_run = models.BooleanField(default=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    report = models.JSONField(null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'cohort_import_jobs'
+        verbose_name = 'Cohort Import Job'
+        verbose_name_plural = 'Cohort Import Jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"Cohort import {self.file_name} ({self.status})"
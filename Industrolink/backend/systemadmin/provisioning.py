@@ -0,0 +1,349 @@
+"""
+Bulk cohort provisioning from CSV. Rows are read as a stream and handled
+in chunks: each chunk is validated against the database in a couple of
+queries, its passwords are hashed in the shared process pool and the
+users and student profiles are inserted with bulk_create.
+
+Imports run outside the request cycle: `manage.py import_cohort` for a
+file on disk, or a CohortImportJob uploaded through the admin API and
+picked up by `manage.py run_cohort_imports`.
+
+Columns: email, first_name, last_name, role, and optionally middle_name
+and password. Student rows also need registration_no, academic_year,
+course, year_of_study, company (the company's name), duration_in_weeks,
+start_date and completion_date (YYYY-MM-DD). Rows without a password get
+an unusable one, which skips hashing entirely, and an emailed link to
+choose their own; the emails go to the outbox in the same transaction as
+the chunk's users.
+"""
+import csv
+import io
+import logging
+from datetime import date
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from students.models import Student
+from supervisors.models import Company
+from users.hashing import hash_pool
+from users.mailer import MailTemplate, queue_templated_mail
+from users.models import User
+from users.utils import password_set_url
+from .models import AdminAction, CohortImportJob
+
+logger = logging.getLogger(__name__)
+
+USER_COLUMNS = ('email', 'first_name', 'last_name', 'role')
+STUDENT_COLUMNS = (
+    'registration_no', 'academic_year', 'course', 'year_of_study',
+    'company', 'duration_in_weeks', 'start_date', 'completion_date',
+)
+# Admins are only created through invites
+IMPORT_ROLES = ('student', 'lecturer', 'supervisor')
+MIN_PASSWORD_LENGTH = 8
+
+
+def _max_length(model, field):
+    return model._meta.get_field(field).max_length
+
+
+class CohortImport:
+    """
+    One import run. Keeps what earlier chunks created so duplicates within
+    the file are caught too, and collects a per-row error report.
+    """
+
+    def __init__(self, chunk_size=None, dry_run=False):
+        self.chunk_size = chunk_size or getattr(settings, 'PROVISIONING_CHUNK_SIZE', 500)
+        self.dry_run = dry_run
+        self.rows = 0
+        self.created = 0
+        self.invited = 0
+        self._invite_template = None
+        self.errors = []
+        self._seen_emails = set()
+        self._seen_registration_nos = set()
+        self._companies = None
+
+    def run(self, lines):
+        """Import every row of a CSV given as an iterable of text lines"""
+        reader = csv.DictReader(lines)
+        missing = [column for column in USER_COLUMNS if column not in (reader.fieldnames or ())]
+        if missing:
+            self.errors.append({'row': 1, 'email': None, 'errors': {'header': f"Missing columns: {', '.join(missing)}"}})
+            return self.report()
+
+        chunk = []
+        for row in reader:
+            chunk.append((reader.line_num, row))
+            if len(chunk) >= self.chunk_size:
+                self._import_chunk(chunk)
+                chunk = []
+        if chunk:
+            self._import_chunk(chunk)
+        return self.report()
+
+    def report(self):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'invited': self.invited,
+            'failed': len(self.errors),
+            'dry_run': self.dry_run,
+            'errors': self.errors,
+        }
+
+    @property
+    def companies(self):
+        # Companies are few; one query for the whole import
+        if self._companies is None:
+            self._companies = {
+                company.name.strip().lower(): company for company in Company.objects.all()
+            }
+        return self._companies
+
+    def _import_chunk(self, chunk):
+        self.rows += len(chunk)
+        valid = []
+        for line, row in chunk:
+            cleaned, errors = self._clean_row(row)
+            if errors:
+                self._fail(line, row, errors)
+            else:
+                valid.append((line, row, cleaned))
+
+        valid = self._drop_existing(valid)
+        if not valid or self.dry_run:
+            self.created += len(valid)
+            return
+
+        # Only rows that came with a password need the pool
+        passwords = [cleaned['password'] for _, _, cleaned in valid if cleaned['password']]
+        hashed = iter(hash_pool.make_passwords(passwords))
+
+        users, students, invites = [], [], []
+        for _, _, cleaned in valid:
+            password = next(hashed) if cleaned['password'] else make_password(None)
+            user = User(password=password, username=cleaned['email'], **cleaned['user'])
+            users.append(user)
+            if cleaned['student'] is not None:
+                students.append(Student(user=user, **cleaned['student']))
+            if not cleaned['password']:
+                invites.append((user.email, self._invite_context(user)))
+
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+                Student.objects.bulk_create(students)
+                if invites:
+                    queue_templated_mail(self.invite_template, invites)
+        except IntegrityError as e:
+            # Something created a clashing row since the checks; the chunk
+            # was rolled back as a whole
+            for line, row, _ in valid:
+                self._fail(line, row, {'row': f'Not imported: {e}'})
+            return
+        self.created += len(users)
+        self.invited += len(invites)
+
+    @property
+    def invite_template(self):
+        if self._invite_template is None:
+            self._invite_template = MailTemplate(
+                subject='Your Industrolink account is ready',
+                body_template_name='systemadmin/emails/account_invite.txt',
+            )
+        return self._invite_template
+
+    def _invite_context(self, user):
+        return {
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'email': user.email,
+            'set_password_url': password_set_url(user),
+            'expire_days': settings.PASSWORD_RESET_TIMEOUT // (60 * 60 * 24),
+        }
+
+    def _drop_existing(self, valid):
+        """Rows whose email or registration number is already taken"""
+        emails = [cleaned['email'] for _, _, cleaned in valid]
+        taken_emails = set()
+        for email, username in User.objects.filter(
+            Q(email__in=emails) | Q(username__in=emails)
+        ).values_list('email', 'username'):
+            taken_emails.update((email, username))
+
+        registration_nos = [
+            cleaned['student']['registration_no'] for _, _, cleaned in valid if cleaned['student']
+        ]
+        taken_registration_nos = set(
+            Student.objects.filter(registration_no__in=registration_nos).values_list('registration_no', flat=True)
+        ) if registration_nos else set()
+
+        kept = []
+        for line, row, cleaned in valid:
+            errors = {}
+            email = cleaned['email']
+            if email in taken_emails or email in self._seen_emails:
+                errors['email'] = 'A user with this email already exists'
+            student = cleaned['student']
+            if student is not None:
+                registration_no = student['registration_no']
+                if registration_no in taken_registration_nos or registration_no in self._seen_registration_nos:
+                    errors['registration_no'] = 'A student with this registration number already exists'
+            if errors:
+                self._fail(line, row, errors)
+                continue
+            self._seen_emails.add(email)
+            if student is not None:
+                self._seen_registration_nos.add(student['registration_no'])
+            kept.append((line, row, cleaned))
+        return kept
+
+    def _clean_row(self, row):
+        errors = {}
+
+        def value(column):
+            return (row.get(column) or '').strip()
+
+        user = {}
+        for column in ('first_name', 'middle_name', 'last_name'):
+            user[column] = value(column) or None
+            if user[column] and len(user[column]) > _max_length(User, column):
+                errors[column] = f'At most {_max_length(User, column)} characters'
+        for column in ('first_name', 'last_name'):
+            if not user[column]:
+                errors[column] = 'This field is required'
+
+        email = User.objects.normalize_email(value('email'))
+        try:
+            validate_email(email)
+        except ValidationError:
+            errors['email'] = 'Enter a valid email address'
+        user['email'] = email
+
+        role = value('role').lower()
+        if role not in IMPORT_ROLES:
+            errors['role'] = f"Must be one of: {', '.join(IMPORT_ROLES)}"
+        user['role'] = role
+
+        password = row.get('password') or ''
+        if password and len(password) < MIN_PASSWORD_LENGTH:
+            errors['password'] = f'At least {MIN_PASSWORD_LENGTH} characters'
+
+        # Students get their profile from the file, so it is complete
+        student = None
+        if role == 'student':
+            student, student_errors = self._clean_student(value)
+            errors.update(student_errors)
+        user['profile_completed'] = student is not None
+
+        return {'email': email, 'password': password, 'user': user, 'student': student}, errors
+
+    def _clean_student(self, value):
+        errors = {}
+        student = {}
+        for column in STUDENT_COLUMNS:
+            if not value(column):
+                errors[column] = 'This field is required'
+        if errors:
+            return None, errors
+
+        for column in ('registration_no', 'academic_year', 'course', 'year_of_study'):
+            student[column] = value(column)
+            if len(student[column]) > _max_length(Student, column):
+                errors[column] = f'At most {_max_length(Student, column)} characters'
+
+        student['company'] = self.companies.get(value('company').lower())
+        if student['company'] is None:
+            errors['company'] = 'Unknown company'
+
+        try:
+            student['duration_in_weeks'] = int(value('duration_in_weeks'))
+            if student['duration_in_weeks'] <= 0:
+                raise ValueError
+        except ValueError:
+            errors['duration_in_weeks'] = 'Must be a positive whole number'
+
+        for column in ('start_date', 'completion_date'):
+            try:
+                student[column] = date.fromisoformat(value(column))
+            except ValueError:
+                errors[column] = 'Use the YYYY-MM-DD format'
+        if 'start_date' not in errors and 'completion_date' not in errors:
+            if student['completion_date'] < student['start_date']:
+                errors['completion_date'] = 'Must not be before start_date'
+
+        return student, errors
+
+    def _fail(self, line, row, errors):
+        self.errors.append({'row': line, 'email': (row.get('email') or '').strip() or None, 'errors': errors})
+
+
+def import_cohort(lines, **options):
+    """Run a CohortImport over CSV lines and return its report"""
+    return CohortImport(**options).run(lines)
+
+
+def claim_import_job():
+    """Mark the oldest pending job as running and return it, or None"""
+    with transaction.atomic():
+        job = (
+            CohortImportJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='pending')
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = 'running'
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at'])
+    return job
+
+
+def run_import_job(job):
+    """Import a claimed job's CSV and store the report on it"""
+    try:
+        report = import_cohort(io.StringIO(job.csv_data), dry_run=job.dry_run)
+    except Exception as e:
+        logger.exception("Cohort import %s failed", job.pk)
+        job.status = 'failed'
+        job.error = str(e)
+    else:
+        job.status = 'done'
+        job.report = report
+        if not job.dry_run:
+            AdminAction.objects.create(
+                admin_id=job.created_by_id,
+                action_type='cohort_import',
+                description=f'Imported {report["created"]} of {report["rows"]} users from {job.file_name}',
+                metadata={
+                    'file': job.file_name,
+                    'job_id': str(job.pk),
+                    'created': report['created'],
+                    'failed': report['failed'],
+                }
+            )
+    job.csv_data = ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'report', 'error', 'csv_data', 'finished_at'])
+    return job
+
+
+def run_pending_imports(max_jobs=None):
+    """Run queued import jobs one at a time; returns how many ran"""
+    ran = 0
+    while max_jobs is None or ran < max_jobs:
+        job = claim_import_job()
+        if job is None:
+            break
+        run_import_job(job)
+        ran += 1
+    return ran
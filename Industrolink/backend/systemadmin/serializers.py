@@ -1,7 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.conf import settings
-from .models import AdminInvite, AdminAction, AdminSettings
+from .models import AdminInvite, AdminAction, AdminSettings, CohortImportJob
 from users.models import User
 
 class AdminUserSerializer(serializers.ModelSerializer):
@@ -192,6 +192,13 @@ class AdminSettingsSerializer(serializers.ModelSerializer):
         fields = ['id', 'key', 'value', 'description', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
+class CohortImportJobSerializer(serializers.ModelSerializer):
+    """Serializer for cohort import jobs and their reports"""
+    class Meta:
+        model = CohortImportJob
+        fields = ['id', 'file_name', 'dry_run', 'status', 'report', 'error', 'created_at', 'started_at', 'finished_at']
+        read_only_fields = fields
+
 class UserManagementSerializer(serializers.Serializer):
     """Serializer for user management operations"""
     action = serializers.ChoiceField(choices=['activate', 'deactivate', 'delete', 'approve'])
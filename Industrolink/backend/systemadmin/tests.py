@@ -3,12 +3,24 @@ from django.urls import reverse
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase
 from rest_framework import status
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
 from django.utils import timezone
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from datetime import timedelta
+import io
+import os
+import re
+import tempfile
 import uuid
 
 from .models import AdminInvite, AdminAction, AdminSettings
-from users.models import User
+from .provisioning import import_cohort
+from users.models import EmailOutbox, User
+from students.models import Student
+from supervisors.models import Company
 
 User = get_user_model()
 
@@ -127,6 +139,20 @@ class AdminAPITest(APITestCase):
         self.assertIn('message', response.data)
         self.assertIn('user', response.data)
     
+    def test_admin_login_is_stateless(self):
+        """Login writes no session row and logout blacklists the refresh token"""
+        response = self.client.post(reverse('systemadmin:admin-login'), {
+            'email': 'admin@test.com',
+            'password': 'testpass123'
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Session.objects.exists())
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        
+        response = self.client.post(reverse('systemadmin:admin-logout'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+    
     def test_admin_login_invalid_role(self):
         """Test admin login with non-admin user"""
         url = reverse('systemadmin:admin-login')
@@ -138,6 +164,58 @@ class AdminAPITest(APITestCase):
         response = self.client.post(url, data)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
     
+    def test_admin_async_login(self):
+        """Test the async admin login"""
+        url = reverse('systemadmin:admin-login-async')
+        
+        response = self.client.post(url, {'email': 'admin@test.com', 'password': 'testpass123'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('access_token', response.cookies)
+        self.assertTrue(AdminAction.objects.filter(action_type='admin_login').exists())
+        
+        response = self.client.post(url, {'email': 'user@test.com', 'password': 'testpass123'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_admin_login_requires_credentials(self):
+        """Both admin logins reject a missing password the same way"""
+        for name in ('systemadmin:admin-login', 'systemadmin:admin-login-async'):
+            response = self.client.post(reverse(name), {'email': 'missing@test.com'}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.json(), {'error': 'Email and password are required'})
+    
+    def test_session_verify_from_claims(self):
+        """Polling answers from the token and audits once per interval"""
+        self.client.post(reverse('systemadmin:admin-login'), {
+            'email': 'admin@test.com',
+            'password': 'testpass123'
+        })
+        url = reverse('systemadmin:admin-session-verify')
+        
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['user']['email'], 'admin@test.com')
+        self.assertEqual(response.data['user']['first_name'], 'Admin')
+        self.assertEqual(response.data['user']['user_id'], str(self.admin_user.user_id))
+        
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        audits = AdminAction.objects.filter(action_type='session_verification')
+        self.assertEqual(list(audits.values_list('description', flat=True)), [
+            'Session verified for admin admin@test.com'
+        ])
+    
+    def test_session_verify_rejects_demoted_admin(self):
+        self.client.post(reverse('systemadmin:admin-login'), {
+            'email': 'admin@test.com',
+            'password': 'testpass123'
+        })
+        self.admin_user.role = 'student'
+        self.admin_user.save()
+        
+        response = self.client.get(reverse('systemadmin:admin-session-verify'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+    
     def test_admin_dashboard_access(self):
         """Test admin dashboard access"""
         self.client.force_authenticate(user=self.admin_user)
@@ -188,6 +266,142 @@ class AdminAPITest(APITestCase):
         invite = AdminInvite.objects.get(email='newadmin@test.com')
         self.assertEqual(invite.created_by, self.admin_user)
         self.assertFalse(invite.used)
+        
+        # The email and the API point at the same public registration page
+        self.assertEqual(response.data['invite_url'], f"{settings.FRONTEND_URL}/admin-invite/{invite.token}")
+        body = EmailOutbox.objects.get(to_email='newadmin@test.com').body
+        self.assertIn(response.data['invite_url'], body)
+        self.assertIn(invite.expires_at.strftime('%d %B %Y, %H:%M').lstrip('0'), body)
+
+class CohortImportTest(APITestCase):
+    """Test bulk user provisioning from CSV"""
+    
+    HEADER = 'email,first_name,last_name,role,password,registration_no,academic_year,course,year_of_study,company,duration_in_weeks,start_date,completion_date\n'
+    
+    def setUp(self):
+        self.admin_user = User.objects.create_user(
+            email='admin@test.com',
+            username='admin@test.com',
+            password='testpass123',
+            first_name='Admin',
+            last_name='User',
+            role='admin'
+        )
+        Company.objects.create(
+            name='Acme',
+            address='1 Main St',
+            phone_number='0700000000',
+            email='info@acme.test'
+        )
+    
+    def csv_file(self, *rows):
+        return SimpleUploadedFile('cohort.csv', (self.HEADER + ''.join(rows)).encode(), content_type='text/csv')
+    
+    def upload(self, upload, **data):
+        """Queue an upload, run the import worker and return the job's report"""
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.post(
+            reverse('systemadmin:admin-cohort-import'), {'file': upload, **data}, format='multipart'
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        
+        call_command('run_cohort_imports', stdout=io.StringIO())
+        response = self.client.get(
+            reverse('systemadmin:admin-cohort-import-job', args=[response.data['job_id']])
+        )
+        self.assertEqual(response.data['status'], 'done')
+        return response.data['report']
+    
+    def test_import_users_and_students(self):
+        """Valid rows are created, bad rows are reported"""
+        report = self.upload(self.csv_file(
+            'ann@test.com,Ann,One,student,secretpass1,REG-1,2025,CS,3,Acme,12,2025-01-06,2025-03-31\n',
+            'bob@test.com,Bob,Two,lecturer,,,,,,,,,\n',
+            'admin@test.com,Dup,Email,lecturer,,,,,,,,,\n',
+            'cat@test.com,Cat,Three,student,,REG-2,2025,CS,3,Nowhere,12,2025-01-06,2025-03-31\n',
+            'dan@test.com,Dan,Four,student,,REG-1,2025,CS,3,acme,12,2025-01-06,2025-03-31\n',
+        ))
+        self.assertEqual(report['created'], 2)
+        self.assertEqual(report['failed'], 3)
+        errors = {error['row']: error['errors'] for error in report['errors']}
+        self.assertIn('email', errors[4])
+        self.assertIn('company', errors[5])
+        self.assertIn('registration_no', errors[6])
+        
+        ann = User.objects.get(email='ann@test.com')
+        self.assertTrue(ann.check_password('secretpass1'))
+        self.assertTrue(ann.profile_completed)
+        self.assertEqual(Student.objects.get(user=ann).registration_no, 'REG-1')
+        self.assertFalse(User.objects.get(email='bob@test.com').has_usable_password())
+        self.assertTrue(AdminAction.objects.filter(action_type='cohort_import').exists())
+    
+    def test_rows_without_password_get_a_link(self):
+        """Imported users without a password are emailed a link to set one"""
+        report = self.upload(self.csv_file(
+            'ann@test.com,Ann,One,lecturer,secretpass1,,,,,,,,\n',
+            'bob@test.com,Bob,Two,lecturer,,,,,,,,,\n',
+        ))
+        self.assertEqual(report['invited'], 1)
+        self.assertEqual(list(EmailOutbox.objects.values_list('to_email', flat=True)), ['bob@test.com'])
+        
+        link = re.search(r'/set-password/(\S+)/(\S+)', EmailOutbox.objects.get().body)
+        self.client.force_authenticate(user=None)
+        response = self.client.post(reverse('password-set'), {
+            'uid': link.group(1),
+            'token': link.group(2),
+            'password': 'chosenpass1',
+            'password_confirm': 'chosenpass1',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        bob = User.objects.get(email='bob@test.com')
+        self.assertTrue(bob.check_password('chosenpass1'))
+        self.assertTrue(bob.email_verified)
+        
+        # The link only works once
+        response = self.client.post(reverse('password-set'), {
+            'uid': link.group(1),
+            'token': link.group(2),
+            'password': 'otherpass1',
+            'password_confirm': 'otherpass1',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_dry_run(self):
+        report = self.upload(self.csv_file('bob@test.com,Bob,Two,lecturer,,,,,,,,,\n'), dry_run='true')
+        self.assertEqual(report['created'], 1)
+        self.assertFalse(User.objects.filter(email='bob@test.com').exists())
+        self.assertFalse(EmailOutbox.objects.exists())
+    
+    def test_upload_is_queued(self):
+        """The upload request only stores the file"""
+        self.client.force_authenticate(user=self.admin_user)
+        upload = self.csv_file('bob@test.com,Bob,Two,lecturer,,,,,,,,,\n')
+        response = self.client.post(reverse('systemadmin:admin-cohort-import'), {'file': upload}, format='multipart')
+        
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'pending')
+        self.assertFalse(User.objects.filter(email='bob@test.com').exists())
+    
+    def test_chunked_import(self):
+        """Duplicates are caught across chunks and each chunk is one bulk insert"""
+        rows = [self.HEADER] + [
+            f'user{i}@test.com,User,{i},supervisor,,,,,,,,,\n' for i in range(5)
+        ] + ['user0@test.com,User,Again,supervisor,,,,,,,,,\n']
+        
+        report = import_cohort(io.StringIO(''.join(rows)), chunk_size=2)
+        self.assertEqual(report['created'], 5)
+        self.assertEqual(report['errors'][0]['row'], 7)
+        self.assertEqual(User.objects.filter(role='supervisor').count(), 5)
+    
+    def test_import_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as csv_file:
+            csv_file.write(self.HEADER + 'bob@test.com,Bob,Two,lecturer,,,,,,,,,\n')
+        self.addCleanup(os.remove, csv_file.name)
+        
+        out = io.StringIO()
+        call_command('import_cohort', csv_file.name, stdout=out)
+        self.assertIn('Created 1 of 1', out.getvalue())
+        self.assertTrue(User.objects.filter(email='bob@test.com').exists())
 
 class AdminPermissionsTest(APITestCase):
     """Test admin permissions"""
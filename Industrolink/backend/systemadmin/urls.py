@@ -1,14 +1,16 @@
 from django.urls import path
-from . import views
+from . import views, async_views
 
 app_name = 'systemadmin'
 
 urlpatterns = [
     # Authentication
     path('login/', views.AdminLoginView.as_view(), name='admin-login'),
+    path('async/login/', async_views.admin_login_async_view, name='admin-login-async'),
     path('logout/', views.AdminLogoutView.as_view(), name='admin-logout'),
     path('verify-session/', views.AdminSessionVerifyView.as_view(), name='admin-session-verify'),
     path('test/', views.AdminTestView.as_view(), name='admin-test'),
+    path('metrics/', views.AdminMetricsView.as_view(), name='admin-metrics'),
     
     # Invitation system
     path('invite/', views.AdminInviteCreateView.as_view(), name='admin-invite-create'),
@@ -21,6 +23,8 @@ urlpatterns = [
     path('users/manage/', views.UserManagementView.as_view(), name='admin-user-management'),
     path('users/<uuid:user_id>/details/', views.UserDetailsView.as_view(), name='admin-user-details'),
     path('students/assign/', views.StudentAssignmentView.as_view(), name='admin-student-assignment'),
+    path('users/import/', views.CohortImportView.as_view(), name='admin-cohort-import'),
+    path('users/import/<uuid:job_id>/', views.CohortImportJobView.as_view(), name='admin-cohort-import-job'),
     
     # Lists and monitoring
     path('invites/', views.AdminInviteListView.as_view(), name='admin-invites'),
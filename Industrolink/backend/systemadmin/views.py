@@ -1,37 +1,54 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
-from django.contrib.auth import login, logout, authenticate
+from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.parsers import MultiPartParser
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import TokenError
+from django.contrib.auth import authenticate
 from django.utils import timezone
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from django.db.models import Q, Count
 from datetime import timedelta
 import secrets
 import string
 
-from .models import AdminInvite, AdminAction, AdminSettings
+from .models import AdminInvite, AdminAction, AdminSettings, CohortImportJob
 from .serializers import (
     AdminUserSerializer, AdminUserLoginSerializer, AdminInviteSerializer,
     AdminInviteCreateSerializer, AdminRegisterSerializer, AdminActionSerializer,
     AdminSettingsSerializer, UserManagementSerializer, StudentAssignmentSerializer,
-    UserListSerializer, DashboardStatsSerializer
+    UserListSerializer, DashboardStatsSerializer, CohortImportJobSerializer
 )
 from .permissions import IsAdminUser
 from users.models import User
 from students.models import Student, DailyTask
 from lecturers.models import Lecturer
 from supervisors.models import Supervisor, Company
+from users.token_cache import token_cache
+from users.hashing import hash_pool
+from users.blacklist import blacklist_filter
+from users.mailer import MailTemplate, queue_templated_mail
+from users.tokens import PrincipalRefreshToken, revoke_user_tokens
+from users.authentication import CookieJWTClaimsAuthentication
+from users.throttling import LoginIPThrottle, LoginEmailThrottle
 
 class AdminLoginView(APIView):
     """Admin login view"""
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
     
     def post(self, request):
         try:
             email = request.data.get('email')
             password = request.data.get('password')
             
+            if not email or not password:
+                return Response({'error': 'Email and password are required'}, status=status.HTTP_400_BAD_REQUEST)
+            
             # First, let's check if the user exists at all
             try:
                 user = User.objects.get(email=email)
@@ -50,10 +67,10 @@ class AdminLoginView(APIView):
             if authenticated_user.role != 'admin':
                 return Response({'error': 'Access denied. Admin role required'}, status=status.HTTP_401_UNAUTHORIZED)
             
-            login(request, authenticated_user)
-
-            # Issue JWT tokens in HTTP-only cookies (same as regular user login)
-            refresh = RefreshToken.for_user(authenticated_user)
+            # Issue JWT tokens in HTTP-only cookies (same as regular user login).
+            # They are the whole session: there is no auth login(), so
+            # nothing is written to the session table
+            refresh = PrincipalRefreshToken.for_user(authenticated_user)
             access_token = refresh.access_token
 
             # Log the action
@@ -105,8 +122,15 @@ class AdminLogoutView(APIView):
             description=f'Admin {request.user.email} logged out'
         )
         
-        logout(request)
-
+        # Sessions are stateless, so ending one means blacklisting its
+        # refresh token
+        raw_refresh = request.COOKIES.get('refresh_token')
+        if raw_refresh:
+            try:
+                PrincipalRefreshToken(raw_refresh).blacklist()
+            except TokenError:
+                pass
+        
         response = Response({'message': 'Logout successful'})
         # Clear cookies
         response.delete_cookie('access_token', path='/')
@@ -125,29 +149,40 @@ class AdminInviteCreateView(APIView):
             # Generate unique token
             token = ''.join(secrets.choice(string.ascii_letters + string.digits) for _ in range(32))
             
-            # Create invitation
-            invite = AdminInvite.objects.create(
-                email=email,
-                token=token,
-                created_by=request.user,
-                expires_at=timezone.now() + timedelta(hours=24)
-            )
-            
-            # Log the action
-            AdminAction.objects.create(
-                admin=request.user,
-                action_type='admin_invite_sent',
-                description=f'Admin invitation sent to {email}',
-                metadata={'invite_id': str(invite.id)}
-            )
-            
-            # TODO: Send email with invitation link
-            invite_url = f"{request.build_absolute_uri('/').rstrip('/')}/admin/register/{token}"
+            # The invite is only sent if its row commits, and vice versa
+            with transaction.atomic():
+                invite = AdminInvite.objects.create(
+                    email=email,
+                    token=token,
+                    created_by=request.user,
+                    expires_at=timezone.now() + timedelta(hours=24)
+                )
+                
+                # Log the action
+                AdminAction.objects.create(
+                    admin=request.user,
+                    action_type='admin_invite_sent',
+                    description=f'Admin invitation sent to {email}',
+                    metadata={'invite_id': str(invite.id)}
+                )
+                
+                # Queue the invitation email for the send_outbox worker
+                queue_templated_mail(
+                    MailTemplate(
+                        subject='You have been invited to administer Industrolink',
+                        body_template_name='systemadmin/emails/admin_invite.txt',
+                    ),
+                    [(email, {
+                        'invited_by': request.user.get_full_name(),
+                        'invite_url': invite.registration_url,
+                        'expires_at': invite.expires_at,
+                    })]
+                )
             
             return Response({
                 'message': 'Invitation sent successfully',
                 'invite': AdminInviteSerializer(invite).data,
-                'invite_url': invite_url
+                'invite_url': invite.registration_url
             })
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -293,6 +328,10 @@ class UserManagementView(APIView):
             if action != 'delete':
                 user.save()
                 
+                # One write signs the user out of every session
+                if action == 'deactivate':
+                    revoke_user_tokens(user)
+                
                 # Log the action
                 AdminAction.objects.create(
                     admin=request.user,
@@ -345,6 +384,48 @@ class StudentAssignmentView(APIView):
             return Response({'message': f'Student {action} successful'})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+
+class CohortImportView(APIView):
+    """
+    Queue an uploaded CSV for bulk user creation. The import itself runs in
+    `manage.py run_cohort_imports`; poll the returned job for its report.
+    """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    parser_classes = [MultiPartParser]
+    
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'A CSV file is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            csv_data = upload.read().decode('utf-8-sig')
+        except UnicodeDecodeError:
+            return Response({'error': 'The file must be UTF-8 encoded CSV'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        job = CohortImportJob.objects.create(
+            created_by=request.user,
+            file_name=upload.name,
+            csv_data=csv_data,
+            dry_run=str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes'),
+        )
+        return Response({
+            'job_id': job.id,
+            'status': job.status,
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class CohortImportJobView(APIView):
+    """Status and report of a queued cohort import"""
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    
+    def get(self, request, job_id):
+        try:
+            job = CohortImportJob.objects.defer('csv_data').get(id=job_id)
+        except CohortImportJob.DoesNotExist:
+            return Response({'error': 'Import not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(CohortImportJobSerializer(job).data)
+
 class UserListView(APIView):
     """List users with filters"""
     permission_classes = [IsAuthenticated, IsAdminUser]
@@ -473,6 +554,8 @@ class AdminSettingsUpdateView(APIView):
 
 class AdminSessionVerifyView(APIView):
     """Verify admin session is still valid"""
+    # Polled by every open admin tab, so answer from the token's claims
+    authentication_classes = [CookieJWTClaimsAuthentication, JWTAuthentication]
     permission_classes = [IsAuthenticated, IsAdminUser]
     
     def get(self, request):
@@ -481,12 +564,15 @@ class AdminSessionVerifyView(APIView):
             if not request.user.is_active or request.user.role != 'admin':
                 return Response({'error': 'Invalid session'}, status=status.HTTP_401_UNAUTHORIZED)
             
-            # Log the action
-            AdminAction.objects.create(
-                admin=request.user,
-                action_type='session_verification',
-                description=f'Session verified for admin {request.user.email}'
-            )
+            # Log the action, at most once per admin per audit interval
+            # rather than on every poll
+            audit_key = f'admin-session-verified:{request.user.pk}'
+            if cache.add(audit_key, True, timeout=getattr(settings, 'ADMIN_SESSION_AUDIT_SECONDS', 900)):
+                AdminAction.objects.create(
+                    admin_id=request.user.pk,
+                    action_type='session_verification',
+                    description=f'Session verified for admin {request.user.email}'
+                )
             
             return Response({
                 'valid': True,
@@ -496,6 +582,18 @@ class AdminSessionVerifyView(APIView):
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class AdminMetricsView(APIView):
+    """Runtime metrics for the current worker process"""
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    
+    def get(self, request):
+        return Response({
+            'token_cache': token_cache.stats(),
+            'password_hashing': hash_pool.stats(),
+            'token_blacklist_filter': blacklist_filter.stats(),
+        })
+
+
 class AdminTestView(APIView):
     """Test endpoint to check admin functionality"""
     permission_classes = [IsAuthenticated, IsAdminUser]
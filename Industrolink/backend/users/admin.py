@@ -1,3 +1,10 @@
 from django.contrib import admin
+from .models import EmailOutbox
 
-# Register your models here.
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ['to_email', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['to_email', 'subject']
+    readonly_fields = ['id', 'created_at', 'sent_at']
+    ordering = ['-created_at']
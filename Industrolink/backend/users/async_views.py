@@ -0,0 +1,316 @@
+"""
+Async versions of the endpoints that hash passwords. The hash runs in
+users.hashing.hash_pool, so under ASGI a burst of logins waits on worker
+processes instead of holding the threads other requests need.
+"""
+import asyncio
+import json
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from .authentication import CookieJWTAuthentication, CookieJWTClaimsAuthentication
+from .events import email_verified_channel
+from .hashing import HashPoolBusy, hash_pool
+from .models import User
+from .serializers import UserRegistrationSerializer, UserSerializer
+from .throttling import check_limits
+from .tokens import PrincipalRefreshToken, revoke_user_tokens
+from .utils import start_email_verification
+
+
+def read_json(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+@sync_to_async
+def issue_tokens(user):
+    """(refresh, access) token pair; reads the epoch cache, so off the loop"""
+    refresh = PrincipalRefreshToken.for_user(user)
+    return refresh, refresh.access_token
+
+
+def set_auth_cookies(response, refresh, access_token):
+    """HTTP-only token cookies, same as the sync login view"""
+    response.set_cookie(
+        'access_token',
+        str(access_token),
+        max_age=60 * 15,  # 15 minutes
+        httponly=True,
+        secure=False,  # Set to True in production with HTTPS
+        samesite='Lax',
+        path='/'
+    )
+    response.set_cookie(
+        'refresh_token',
+        str(refresh),
+        max_age=60 * 60 * 24 * 7,  # 7 days
+        httponly=True,
+        secure=False,  # Set to True in production with HTTPS
+        samesite='Lax',
+        path='/'
+    )
+
+
+def too_many_requests(wait):
+    response = JsonResponse({'error': 'Too many requests'}, status=429)
+    response['Retry-After'] = str(wait)
+    return response
+
+
+def hashing_busy():
+    response = JsonResponse({'error': 'Server busy, please retry shortly'}, status=503)
+    response['Retry-After'] = '1'
+    return response
+
+
+async def aauthenticate(email, password):
+    """
+    Email/password check equivalent to ModelBackend, with the hash done in
+    the process pool. Unknown emails still pay for one hash so response
+    times do not reveal which accounts exist.
+    """
+    user = await User.objects.filter(email=email).afirst()
+    if user is None:
+        await hash_pool.make_password(password)
+        return None
+    if not await hash_pool.check_password(password, user.password):
+        return None
+    if not user.is_active:
+        return None
+    return user
+
+
+async def get_request_user(request, cookie_authentication=CookieJWTAuthentication):
+    """User from the access token cookie or Authorization header, or None"""
+    result = await cookie_authentication().aauthenticate(request)
+    if result is not None:
+        return result[0]
+    
+    # Header tokens are rare; the stock authenticator runs in a thread
+    try:
+        result = await sync_to_async(JWTAuthentication().authenticate)(request)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result is not None else None
+
+
+def not_authenticated():
+    return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+
+@csrf_exempt
+@require_POST
+async def login_async_view(request):
+    data = read_json(request)
+    if data is None:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+
+    email = data.get('email')
+    password = data.get('password')
+
+    # The limiter may live in a shared cache, so keep it off the loop
+    wait = await sync_to_async(check_limits, thread_sensitive=False)(request, email, 'login_ip', 'login_email')
+    if wait is not None:
+        return too_many_requests(wait)
+
+    if not email or not password:
+        return JsonResponse({'error': 'Email and password are required'}, status=400)
+
+    try:
+        user = await aauthenticate(email, password)
+    except HashPoolBusy:
+        return hashing_busy()
+
+    if user is None:
+        return JsonResponse({'error': 'Invalid credentials'}, status=401)
+
+    refresh, access_token = await issue_tokens(user)
+    response = JsonResponse({
+        'message': 'Login successful',
+        'user': UserSerializer(user).data,
+    })
+    set_auth_cookies(response, refresh, access_token)
+    return response
+
+
+@csrf_exempt
+@require_POST
+async def register_async_view(request):
+    data = read_json(request)
+    if data is None:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+
+    serializer = UserRegistrationSerializer(data=data)
+    if not await sync_to_async(serializer.is_valid)():
+        return JsonResponse(serializer.errors, status=400)
+
+    try:
+        encoded_password = await hash_pool.make_password(serializer.validated_data['password'])
+    except HashPoolBusy:
+        return hashing_busy()
+
+    @sync_to_async
+    def save_user():
+        with transaction.atomic():
+            user = serializer.save(encoded_password=encoded_password)
+            start_email_verification(user)
+        return user
+
+    user = await save_user()
+    refresh, access_token = await issue_tokens(user)
+    response = JsonResponse({
+        'message': 'User registered successfully. Please check your email to verify your account.',
+        'user': UserSerializer(user).data,
+        'email_verification_sent': True,
+    }, status=201)
+    set_auth_cookies(response, refresh, access_token)
+    return response
+
+
+@require_GET
+async def profile_status_async_view(request):
+    # Answered from the access token's claims while they are current
+    user = await get_request_user(request, CookieJWTClaimsAuthentication)
+    if user is None:
+        return not_authenticated()
+    return JsonResponse({
+        'profile_completed': user.profile_completed,
+        'role': user.role
+    })
+
+
+@require_GET
+async def profile_async_view(request):
+    user = await get_request_user(request)
+    if user is None:
+        return not_authenticated()
+    return JsonResponse({
+        'user': UserSerializer(user).data,
+    })
+
+
+@csrf_exempt
+@require_POST
+async def password_change_async_view(request):
+    principal = await get_request_user(request)
+    if principal is None:
+        return not_authenticated()
+
+    data = read_json(request)
+    if data is None:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+
+    current_password = data.get('current_password')
+    new_password = data.get('new_password')
+    confirm_password = data.get('confirm_password')
+
+    if not all([current_password, new_password, confirm_password]):
+        return JsonResponse({'error': 'All password fields are required'}, status=400)
+
+    if new_password != confirm_password:
+        return JsonResponse({'error': 'New passwords do not match'}, status=400)
+
+    # Work on a fresh row, not the instance shared through the token cache
+    user = await User.objects.aget(pk=principal.pk)
+
+    try:
+        if not await hash_pool.check_password(current_password, user.password):
+            return JsonResponse({'error': 'Current password is incorrect'}, status=400)
+        user.password = await hash_pool.make_password(new_password)
+    except HashPoolBusy:
+        return hashing_busy()
+
+    await user.asave(update_fields=['password'])
+
+    # Sign out every other session, then give this one fresh tokens
+    await sync_to_async(revoke_user_tokens)(user)
+    refresh, access_token = await issue_tokens(user)
+
+    response = JsonResponse({'message': 'Password changed successfully'})
+    set_auth_cookies(response, refresh, access_token)
+    return response
+
+
+VERIFIED_EVENT = 'event: verified\ndata: {"email_verified": true}\n\n'
+
+
+async def already_verified_events():
+    yield VERIFIED_EVENT
+
+
+async def verification_events(email, waiter):
+    """
+    Event stream for one waiting client: keepalive comments until the
+    email is verified, then a single `verified` event. The database is
+    re-checked now and then in case verification happened in another
+    process, and the stream ends after a while so EventSource reconnects.
+    """
+    loop, future = waiter
+    keepalive = getattr(settings, 'VERIFICATION_STREAM_KEEPALIVE_SECONDS', 15)
+    recheck = getattr(settings, 'VERIFICATION_STREAM_RECHECK_SECONDS', 60)
+    deadline = loop.time() + getattr(settings, 'VERIFICATION_STREAM_MAX_SECONDS', 600)
+    next_check = loop.time() + recheck
+
+    try:
+        yield 'retry: 5000\n\n'
+        while loop.time() < deadline:
+            try:
+                await asyncio.wait_for(asyncio.shield(future), timeout=keepalive)
+            except asyncio.TimeoutError:
+                pass
+            else:
+                yield VERIFIED_EVENT
+                return
+
+            if loop.time() >= next_check:
+                next_check = loop.time() + recheck
+                if await User.objects.filter(email__iexact=email, email_verified=True).aexists():
+                    yield VERIFIED_EVENT
+                    return
+            yield ': keepalive\n\n'
+    finally:
+        email_verified_channel.unsubscribe(email, waiter)
+
+
+@require_GET
+async def verification_status_stream_view(request):
+    """
+    Server-sent events replacement for polling check-verification-status.
+    Holds one connection per waiting client and pushes when the email is
+    verified.
+    """
+    email = request.GET.get('email')
+    if not email:
+        return JsonResponse({'error': 'Email parameter is required'}, status=400)
+
+    wait = await sync_to_async(check_limits, thread_sensitive=False)(request, email, 'verification_ip', 'verification_email')
+    if wait is not None:
+        return too_many_requests(wait)
+
+    # Subscribe before reading the flag so a verification in between is not missed
+    waiter = email_verified_channel.subscribe(email)
+    verified = await User.objects.filter(email__iexact=email).values_list('email_verified', flat=True).afirst()
+
+    if verified is None:
+        email_verified_channel.unsubscribe(email, waiter)
+        return JsonResponse({'error': 'User not found'}, status=404)
+
+    if verified:
+        email_verified_channel.unsubscribe(email, waiter)
+        events = already_verified_events()
+    else:
+        events = verification_events(email, waiter)
+
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
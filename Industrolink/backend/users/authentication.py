@@ -1,48 +1,208 @@
 # Create a new file: authentication.py (in your app directory)
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError, AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
 from django.contrib.auth import get_user_model
+from .token_cache import token_cache
+from .tokens import (
+    ClaimsPrincipal, acache_token_epoch, ahas_current_claims, ahas_current_token_epoch, cache_token_epoch,
+    has_current_claims, has_current_token_epoch, is_token_revoked,
+)
 import logging
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+# Profile relations each role needs on almost every request. Loading them
+# with the user saves the lazy hasattr()/.company queries in the views.
+ROLE_PROFILE_RELATIONS = {
+    'student': ('student_profile__company',),
+    'supervisor': ('supervisor_profile__company',),
+    'lecturer': ('lecturer_profile',),
+}
+
+
+def get_principal_queryset(role=None):
+    """
+    Users joined with the profile their role needs. When the role is not
+    known up front every profile is joined so it is still a single query.
+    """
+    if role in ROLE_PROFILE_RELATIONS:
+        relations = ROLE_PROFILE_RELATIONS[role]
+    elif role is None:
+        relations = tuple(
+            relation
+            for role_relations in ROLE_PROFILE_RELATIONS.values()
+            for relation in role_relations
+        )
+    else:
+        relations = ()
+    return User.objects.select_related(*relations)
+
+
+def load_principal(user_id, role=None):
+    """Load a user and its role profile in one joined query"""
+    return get_principal_queryset(role).get(**{api_settings.USER_ID_FIELD: user_id})
+
+
+async def aload_principal(user_id, role=None):
+    return await get_principal_queryset(role).aget(**{api_settings.USER_ID_FIELD: user_id})
+
+
 class CookieJWTAuthentication(JWTAuthentication):
     """
     Custom authentication class that reads JWT tokens from HTTP-only cookies
     instead of the Authorization header
     """
+    use_token_cache = True
     
     def authenticate(self, request):
-        logger.info(f"CookieJWTAuthentication.authenticate called for path: {request.path}")
+        logger.debug("CookieJWTAuthentication.authenticate called for path: %s", request.path)
         
         # Try to get the access token from cookies
         raw_token = request.COOKIES.get('access_token')
         
-        logger.info(f"Access token from cookies: {'Found' if raw_token else 'Not found'}")
-        logger.info(f"Available cookies: {list(request.COOKIES.keys())}")
+        logger.debug("Access token from cookies: %s", 'Found' if raw_token else 'Not found')
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Available cookies: %s", list(request.COOKIES.keys()))
         
         if raw_token is None:
-            logger.info("No access token in cookies, returning None")
+            logger.debug("No access token in cookies, returning None")
             return None
         
+        # Skip signature verification and the user lookup for tokens we
+        # have already resolved recently
+        cache_key = token_cache.make_key(raw_token)
+        cached = token_cache.get(cache_key) if self.use_token_cache else None
+        # Entries from an older epoch may be revoked or stale; resolve those
+        # again below
+        if cached is not None and has_current_token_epoch(cached[1]):
+            return cached
+        
         try:
             # Validate the token using the parent class method
-            logger.info("Attempting to validate token...")
+            logger.debug("Attempting to validate token...")
             validated_token = self.get_validated_token(raw_token)
             user = self.get_user(validated_token)
-            logger.info(f"Authentication successful for user: {user.username}")
+            logger.debug("Authentication successful for user: %s", user.username)
+            if self.use_token_cache:
+                token_cache.set(cache_key, user, validated_token)
             return (user, validated_token)
         except TokenError as e:
-            logger.error(f"Token validation failed: {str(e)}")
+            logger.info("Token validation failed: %s", e)
             return None
         except Exception as e:
-            logger.error(f"Unexpected error in authentication: {str(e)}")
+            logger.error("Unexpected error in authentication: %s", e)
             return None
     
+    def get_user(self, validated_token):
+        """
+        Same checks as the parent class, but the user is loaded together
+        with its role profile
+        """
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+        
+        try:
+            user = load_principal(user_id, validated_token.get('role'))
+        except User.DoesNotExist:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed("The user's password has been changed.", code="password_changed")
+        
+        if is_token_revoked(validated_token, user):
+            raise AuthenticationFailed("Token has been revoked", code="token_revoked")
+        
+        cache_token_epoch(user)
+        return user
+    
+    async def aauthenticate(self, request):
+        """
+        authenticate() for async views: same checks, but the cache and the
+        user lookup go through the async APIs so the event loop never blocks.
+        Returns (user, token) or None.
+        """
+        raw_token = request.COOKIES.get('access_token')
+        if raw_token is None:
+            return None
+        
+        cache_key = token_cache.make_key(raw_token)
+        cached = token_cache.get(cache_key) if self.use_token_cache else None
+        if cached is not None and await ahas_current_token_epoch(cached[1]):
+            return cached
+        
+        try:
+            validated_token = self.get_validated_token(raw_token)
+            user = await self.aget_user(validated_token)
+        except (TokenError, InvalidToken, AuthenticationFailed) as e:
+            logger.info("Token validation failed: %s", e)
+            return None
+        
+        if self.use_token_cache:
+            token_cache.set(cache_key, user, validated_token)
+        return (user, validated_token)
+    
+    async def aget_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+        
+        try:
+            user = await aload_principal(user_id, validated_token.get('role'))
+        except User.DoesNotExist:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed("The user's password has been changed.", code="password_changed")
+        
+        if is_token_revoked(validated_token, user):
+            raise AuthenticationFailed("Token has been revoked", code="token_revoked")
+        
+        await acache_token_epoch(user)
+        return user
+    
     def get_header(self, request):
         """
         Override to prevent looking for Authorization header
         since we're using cookies
         """
-        return None
\ No newline at end of file
+        return None
+
+
+class CookieJWTClaimsAuthentication(CookieJWTAuthentication):
+    """
+    Cookie authentication for lightweight status endpoints. While the
+    user's token epoch is unchanged the principal is built from the token's
+    claims alone; once it moves the user is loaded from the database.
+    """
+    # The epoch must be checked on every request
+    use_token_cache = False
+    
+    def get_user(self, validated_token):
+        if has_current_claims(validated_token):
+            principal = ClaimsPrincipal(validated_token)
+            if not principal.is_active:
+                raise AuthenticationFailed("User is inactive", code="user_inactive")
+            return principal
+        return super().get_user(validated_token)
+    
+    async def aget_user(self, validated_token):
+        if await ahas_current_claims(validated_token):
+            principal = ClaimsPrincipal(validated_token)
+            if not principal.is_active:
+                raise AuthenticationFailed("User is inactive", code="user_inactive")
+            return principal
+        return await super().aget_user(validated_token)
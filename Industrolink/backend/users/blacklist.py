@@ -0,0 +1,231 @@
+import hashlib
+import math
+import threading
+import time
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings. Never gives false negatives;
+    false positives happen at roughly error_rate once `capacity` items
+    have been added.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.size = max(int(-self.capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hash_count = max(int(round(self.size / self.capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.sha256(item.encode()).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:16], 'big') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class BlacklistFilter:
+    """
+    In-memory filter of blacklisted refresh-token JTIs, kept in front of
+    the BlacklistedToken lookup. A miss means the token is definitely not
+    blacklisted, so most refreshes never touch the blacklist tables.
+
+    New blacklist rows are pulled in by primary key every `sync_interval`
+    seconds. Ids are handed out before commit, so a row can show up below
+    ids already synced; each sync re-reads the last `trailing_ids` ids to
+    catch those. The filter is rebuilt from scratch every
+    `rebuild_interval` seconds, or once it outgrows its capacity, to drop
+    JTIs of pruned tokens. A token blacklisted by another process can
+    therefore still pass for up to `sync_interval` seconds; tokens
+    blacklisted by this process are added immediately.
+    """
+
+    def __init__(self, capacity=100000, error_rate=0.01, sync_interval=5, rebuild_interval=3600, trailing_ids=1000):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self.trailing_ids = trailing_ids
+        self._lock = threading.Lock()
+        # Held by the one thread reading the database, without blocking lookups
+        self._refresh_lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._bloom = None
+            self._last_id = 0
+            # Ids in the trailing window that are already in the filter
+            self._seen = set()
+            # JTIs added while a rebuild was reading the database
+            self._pending = None
+            self._synced_at = 0.0
+            self._built_at = 0.0
+            self.skipped = 0
+            self.checked = 0
+            self.false_positives = 0
+
+    def _rebuild(self, now):
+        with self._lock:
+            self._pending = []
+
+        try:
+            # Take the high-water mark first so rows added meanwhile are
+            # picked up by the next sync rather than skipped
+            last_id = BlacklistedToken.objects.order_by('-id').values_list('id', flat=True).first() or 0
+            rows = list(
+                BlacklistedToken.objects
+                .filter(id__lte=last_id, token__expires_at__gt=timezone.now())
+                .values_list('id', 'token__jti')
+            )
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+        capacity = self.capacity
+        while capacity < len(rows) * 2:
+            capacity *= 2
+
+        bloom = BloomFilter(capacity, self.error_rate)
+        for _, jti in rows:
+            bloom.add(jti)
+        seen = {row_id for row_id, _ in rows if row_id > last_id - self.trailing_ids}
+
+        with self._lock:
+            for jti in self._pending:
+                bloom.add(jti)
+            self._pending = None
+            self._bloom = bloom
+            self._last_id = last_id
+            self._seen = seen
+            self._synced_at = self._built_at = now
+
+    def _sync(self, now):
+        rows = list(
+            BlacklistedToken.objects
+            .filter(id__gt=self._last_id - self.trailing_ids)
+            .order_by('id')
+            .values_list('id', 'token__jti')
+        )
+        with self._lock:
+            for row_id, jti in rows:
+                if row_id not in self._seen:
+                    self._bloom.add(jti)
+                    self._seen.add(row_id)
+                self._last_id = max(self._last_id, row_id)
+            floor = self._last_id - self.trailing_ids
+            self._seen = {row_id for row_id in self._seen if row_id > floor}
+            self._synced_at = now
+
+    def _refresh(self):
+        now = time.monotonic()
+        with self._lock:
+            bloom = self._bloom
+            rebuild = (
+                bloom is None
+                or now - self._built_at >= self.rebuild_interval
+                or bloom.count > bloom.capacity
+            )
+            if not rebuild and now - self._synced_at < self.sync_interval:
+                return
+
+        # One thread reads the database while the rest keep using the
+        # current filter; only the very first build makes them wait
+        if not self._refresh_lock.acquire(blocking=bloom is None):
+            return
+        try:
+            if rebuild and (bloom is not None or self._bloom is None):
+                self._rebuild(now)
+            elif not rebuild:
+                self._sync(now)
+        finally:
+            self._refresh_lock.release()
+
+    def might_contain(self, jti):
+        try:
+            self._refresh()
+        except DatabaseError:
+            # Keep the filter we have; the next call tries again
+            pass
+        with self._lock:
+            # With no filter yet, leave it to the BlacklistedToken lookup
+            if self._bloom is None or jti in self._bloom:
+                self.checked += 1
+                return True
+            self.skipped += 1
+            return False
+
+    def add(self, jti):
+        """Record a JTI blacklisted by this process right away"""
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+            if self._pending is not None:
+                self._pending.append(jti)
+
+    def record_false_positive(self):
+        with self._lock:
+            self.false_positives += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': self._bloom.count if self._bloom else 0,
+                'capacity': self._bloom.capacity if self._bloom else self.capacity,
+                'skipped_lookups': self.skipped,
+                'db_lookups': self.checked,
+                'false_positives': self.false_positives,
+            }
+
+
+def prune_expired_tokens(chunk_size=1000, max_chunks=None):
+    """
+    Delete expired outstanding tokens (and their blacklist entries) in
+    chunks, so each statement stays short and locks few rows. Returns the
+    number of outstanding tokens removed.
+    """
+    now = timezone.now()
+    deleted = 0
+    chunks = 0
+
+    while max_chunks is None or chunks < max_chunks:
+        ids = list(
+            OutstandingToken.objects
+            .filter(expires_at__lte=now)
+            .order_by('id')
+            .values_list('id', flat=True)[:chunk_size]
+        )
+        if not ids:
+            break
+
+        with transaction.atomic():
+            BlacklistedToken.objects.filter(token_id__in=ids).delete()
+            OutstandingToken.objects.filter(id__in=ids).delete()
+
+        deleted += len(ids)
+        chunks += 1
+
+    return deleted
+
+
+blacklist_filter = BlacklistFilter(
+    capacity=getattr(settings, 'TOKEN_BLACKLIST_FILTER_CAPACITY', 100000),
+    sync_interval=getattr(settings, 'TOKEN_BLACKLIST_FILTER_SYNC_SECONDS', 5),
+    rebuild_interval=getattr(settings, 'TOKEN_BLACKLIST_FILTER_REBUILD_SECONDS', 3600),
+    trailing_ids=getattr(settings, 'TOKEN_BLACKLIST_FILTER_TRAILING_IDS', 1000),
+)
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+from collections import defaultdict
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(True)
+
+
+class EmailVerifiedChannel:
+    """
+    In-process pub/sub for "this email was just verified". Subscribers are
+    coroutines waiting on a future in their own event loop; publishers may
+    be sync views running in any thread.
+    """
+
+    def __init__(self):
+        self._waiters = defaultdict(set)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(email):
+        return email.strip().lower()
+
+    def subscribe(self, email):
+        """Register interest in an email. Must be called from a running loop."""
+        loop = asyncio.get_running_loop()
+        waiter = (loop, loop.create_future())
+        with self._lock:
+            self._waiters[self._key(email)].add(waiter)
+        return waiter
+
+    def unsubscribe(self, email, waiter):
+        key = self._key(email)
+        with self._lock:
+            waiters = self._waiters.get(key)
+            if waiters is not None:
+                waiters.discard(waiter)
+                if not waiters:
+                    del self._waiters[key]
+
+    def publish(self, email):
+        """Wake everyone waiting on the email. Returns how many were woken."""
+        with self._lock:
+            waiters = self._waiters.pop(self._key(email), set())
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve, future)
+            except RuntimeError:
+                # The subscriber's loop has already shut down
+                pass
+        return len(waiters)
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(waiters) for waiters in self._waiters.values())
+
+
+email_verified_channel = EmailVerifiedChannel()
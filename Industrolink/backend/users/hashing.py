@@ -0,0 +1,135 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class HashPoolBusy(Exception):
+    """Raised when the hashing pool already has as many jobs as it accepts"""
+
+
+# These run inside the worker processes. They return how long the hash
+# itself took so the parent can tell queueing time from hashing time.
+
+def _setup_worker(settings_module):
+    # Workers are spawned, not forked from a process that already runs
+    # threads, so they start from a fresh interpreter and load Django here
+    if settings_module:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def _check_password(password, encoded):
+    started = time.perf_counter()
+    result = hashers.check_password(password, encoded)
+    return result, time.perf_counter() - started
+
+
+def _make_password(password):
+    started = time.perf_counter()
+    result = hashers.make_password(password)
+    return result, time.perf_counter() - started
+
+
+class PasswordHashPool:
+    """
+    Runs password hashing in a bounded ProcessPoolExecutor so async views
+    can await it without tying up the event loop or a request thread.
+    Jobs beyond max_pending are refused instead of queued indefinitely.
+    """
+
+    def __init__(self, max_workers=None, max_pending=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.max_workers * 8
+        self._executor = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_setup_worker,
+                    initargs=(os.environ.get('DJANGO_SETTINGS_MODULE'),),
+                )
+            return self._executor
+
+    async def check_password(self, password, encoded):
+        return await self._run(_check_password, password, encoded)
+
+    async def make_password(self, password):
+        return await self._run(_make_password, password)
+
+    def make_passwords(self, passwords, chunksize=16):
+        """
+        Hash a batch from sync code such as bulk imports. Results come back
+        in input order. The whole batch is one job, so max_pending does not
+        apply; bulk imports run in management commands, never in a process
+        serving logins.
+        """
+        if not passwords:
+            return []
+        results = list(self.executor.map(_make_password, passwords, chunksize=chunksize))
+        with self._lock:
+            self.completed += len(results)
+        return [encoded for encoded, _ in results]
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self.in_flight >= self.max_pending:
+                self.rejected += 1
+                raise HashPoolBusy('Too many password hashing jobs queued')
+            self.in_flight += 1
+
+        submitted = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, hash_seconds = await loop.run_in_executor(self.executor, fn, *args)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+        wait = max(time.perf_counter() - submitted - hash_seconds, 0.0)
+        with self._lock:
+            self.completed += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'max_pending': self.max_pending,
+                'in_flight': self.in_flight,
+                'queue_depth': max(self.in_flight - self.max_workers, 0),
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'avg_wait_ms': round(self.total_wait / self.completed * 1000, 2) if self.completed else 0.0,
+                'max_wait_ms': round(self.max_wait * 1000, 2),
+            }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+# Shared by every async auth view in this process
+hash_pool = PasswordHashPool(
+    max_workers=getattr(settings, 'PASSWORD_HASH_WORKERS', None),
+    max_pending=getattr(settings, 'PASSWORD_HASH_MAX_PENDING', None),
+)
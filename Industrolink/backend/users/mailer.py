@@ -0,0 +1,130 @@
+import time
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.template import Context, Template
+from django.template.loader import get_template
+from .models import EmailOutbox
+
+
+class MailTemplate:
+    """
+    Subject and body templates compiled once and rendered for each
+    recipient, so a batch of thousands pays for template parsing once.
+    """
+
+    def __init__(self, subject, body_template_name, from_email=None):
+        self.subject = Template(subject)
+        self.body = get_template(body_template_name)
+        self.from_email = from_email or settings.DEFAULT_FROM_EMAIL
+
+    def render(self, context):
+        """Return (subject, body) for one recipient"""
+        subject = self.subject.render(Context(context, autoescape=False)).strip()
+        body = self.body.render(context)
+        return subject, body
+
+    def build_outbox_entry(self, to_email, context):
+        subject, body = self.render(context)
+        return EmailOutbox(
+            to_email=to_email,
+            from_email=self.from_email,
+            subject=subject,
+            body=body,
+        )
+
+
+def queue_templated_mail(template, recipients, batch_size=500):
+    """
+    Render a template for many (to_email, context) pairs and write the
+    results to the outbox with chunked bulk inserts.
+    """
+    entries = [template.build_outbox_entry(to_email, context) for to_email, context in recipients]
+    return EmailOutbox.objects.bulk_create(entries, batch_size=batch_size)
+
+
+class DispatchReport:
+    """Outcome and throughput of one dispatch run"""
+
+    def __init__(self):
+        self.sent = 0
+        self.failed = []
+        self.connections = 0
+        self.batches = 0
+        self.elapsed = 0.0
+        self._started = time.monotonic()
+
+    def finish(self):
+        self.elapsed = time.monotonic() - self._started
+
+    @property
+    def throughput(self):
+        """Messages delivered per second"""
+        return self.sent / self.elapsed if self.elapsed > 0 else float(self.sent)
+
+    def as_dict(self):
+        return {
+            'sent': self.sent,
+            'failed': len(self.failed),
+            'connections': self.connections,
+            'batches': self.batches,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'messages_per_second': round(self.throughput, 2),
+        }
+
+
+class MailDispatcher:
+    """
+    Sends messages over one persistent connection to the mail backend
+    instead of opening a new SMTP/TLS session per message. The connection
+    is only re-established after a failure.
+    """
+
+    def __init__(self, connection=None):
+        self.connection = connection or get_connection(fail_silently=False)
+
+    def send(self, messages):
+        """
+        Send EmailMessage objects one after another over the shared
+        connection. Failures are recorded in the report, not raised.
+        """
+        report = DispatchReport()
+        is_open = False
+
+        try:
+            for message in messages:
+                try:
+                    if not is_open:
+                        self.connection.open()
+                        is_open = True
+                        report.connections += 1
+                    self.connection.send_messages([message])
+                except Exception as e:
+                    report.failed.append((message, e))
+                    # The session may be unusable after an error
+                    if is_open:
+                        self._close()
+                        is_open = False
+                else:
+                    report.sent += 1
+        finally:
+            if is_open:
+                self._close()
+            report.finish()
+
+        return report
+
+    def _close(self):
+        try:
+            self.connection.close()
+        except Exception:
+            pass
+
+
+def build_message(entry):
+    """EmailMessage for an outbox row"""
+    return EmailMessage(
+        subject=entry.subject,
+        body=entry.body,
+        from_email=entry.from_email,
+        to=[entry.to_email],
+    )
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from users.blacklist import prune_expired_tokens
+
+
+class Command(BaseCommand):
+    help = 'Delete expired outstanding and blacklisted refresh tokens in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=None, help='Rows deleted per statement')
+        parser.add_argument('--max-chunks', type=int, default=None, help='Stop after this many chunks')
+
+    def handle(self, *args, **options):
+        deleted = prune_expired_tokens(
+            chunk_size=options['chunk_size'] or getattr(settings, 'TOKEN_PRUNE_CHUNK_SIZE', 1000),
+            max_chunks=options['max_chunks'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired token(s)'))
@@ -0,0 +1,32 @@
+import time
+from django.core.management.base import BaseCommand
+from users.outbox import drain_outbox
+
+
+class Command(BaseCommand):
+    help = 'Deliver pending messages from the email outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Messages claimed per batch')
+        parser.add_argument('--max-batches', type=int, default=None, help='Stop after this many batches')
+        parser.add_argument('--loop', action='store_true', help='Keep polling the outbox until interrupted')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds between polls in --loop mode')
+
+    def handle(self, *args, **options):
+        while True:
+            report = drain_outbox(
+                batch_size=options['batch_size'],
+                max_batches=options['max_batches'],
+            )
+            if report.sent or report.failed or not options['loop']:
+                stats = report.as_dict()
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Sent {stats['sent']} message(s), {stats['failed']} failed, "
+                        f"{stats['connections']} connection(s), {stats['messages_per_second']} msg/s"
+                    )
+                )
+
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
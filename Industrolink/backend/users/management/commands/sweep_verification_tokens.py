@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from users.utils import sweep_verification_tokens
+
+
+class Command(BaseCommand):
+    help = 'Delete expired email verification tokens and those of verified users'
+
+    def handle(self, *args, **options):
+        deleted = sweep_verification_tokens()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} verification token(s)'))
@@ -0,0 +1,34 @@
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('to_email', models.EmailField(max_length=254)),
+                ('from_email', models.CharField(max_length=254)),
+                ('subject', models.CharField(max_length=255)),
+                ('body', models.TextField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'email_outbox',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='email_outbo_status_c5a6aa_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='token_epoch',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_emailverificationtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='revoked_token_epoch',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        # Tokens revoked so far were all issued before the current epoch
+        migrations.RunSQL(
+            'UPDATE users SET revoked_token_epoch = token_epoch',
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -26,12 +26,36 @@ class User(AbstractUser):
     
     # Email verification fields
     email_verified = models.BooleanField(default=False)
-    email_verification_token = models.CharField(max_length=100, blank=True, null=True)
     email_verification_sent_at = models.DateTimeField(blank=True, null=True)
     
+    # Bumped whenever a claimed field changes or tokens are revoked; tokens
+    # issued before revoked_token_epoch are rejected (see users/tokens.py)
+    token_epoch = models.PositiveIntegerField(default=0)
+    revoked_token_epoch = models.PositiveIntegerField(default=0)
+    
+    # Only ever moved by UPDATEs in users/tokens.py
+    EPOCH_FIELDS = ('token_epoch', 'revoked_token_epoch')
+    
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name', 'role']
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # What the row held, so a save can tell whether a claimed field
+        # changed (users/signals.py)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+    
+    def save(self, *args, **kwargs):
+        # A full save of a stale instance must not move the epochs back
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.EPOCH_FIELDS
+            ]
+        super().save(*args, **kwargs)
+    
     def __str__(self):
         try:
             first = self.first_name or ''
@@ -54,3 +78,53 @@ class User(AbstractUser):
     class Meta:
         db_table = 'users'
 
+
+class EmailOutbox(models.Model):
+    """
+    Outgoing mail written in the same transaction as the change that
+    triggered it and delivered later by the send_outbox command.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    to_email = models.EmailField()
+    from_email = models.CharField(max_length=254)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email} ({self.status})"
+    
+    class Meta:
+        db_table = 'email_outbox'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+
+class EmailVerificationToken(models.Model):
+    """
+    Pending email verification. Only the SHA-256 of the token in the link
+    is stored; verification looks the row up by that hash.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='verification_tokens')
+    token_hash = models.CharField(max_length=64, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Verification token for {self.user_id}"
+    
+    class Meta:
+        db_table = 'email_verification_tokens'
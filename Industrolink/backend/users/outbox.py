@@ -0,0 +1,93 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .mailer import DispatchReport, MailDispatcher, build_message
+from .models import EmailOutbox
+
+
+def retry_delay(attempts):
+    """Exponential backoff: base, 2x base, 4x base, ... capped at one hour"""
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_BASE_SECONDS', 30)
+    return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), 3600))
+
+
+def claim_batch(batch_size):
+    """
+    Lease up to batch_size due messages to this worker. Rows stay locked
+    only while being claimed; a crashed worker's lease simply runs out and
+    the messages become due again.
+    """
+    now = timezone.now()
+    lease = timedelta(seconds=getattr(settings, 'EMAIL_OUTBOX_LEASE_SECONDS', 300))
+
+    with transaction.atomic():
+        ids = list(
+            EmailOutbox.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        EmailOutbox.objects.filter(id__in=ids).update(
+            attempts=F('attempts') + 1,
+            next_attempt_at=now + lease,
+        )
+    return list(EmailOutbox.objects.filter(id__in=ids).order_by('next_attempt_at', 'created_at'))
+
+
+def mark_sent(messages):
+    EmailOutbox.objects.filter(id__in=[message.id for message in messages]).update(
+        status='sent',
+        sent_at=timezone.now(),
+        last_error=None,
+    )
+
+
+def mark_failed(message, error):
+    max_attempts = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+    if message.attempts >= max_attempts:
+        EmailOutbox.objects.filter(id=message.id).update(status='failed', last_error=str(error))
+    else:
+        EmailOutbox.objects.filter(id=message.id).update(
+            next_attempt_at=timezone.now() + retry_delay(message.attempts),
+            last_error=str(error),
+        )
+
+
+def drain_outbox(batch_size=None, max_batches=None):
+    """
+    Deliver due outbox messages batch by batch until none are left. Each
+    batch goes out over a single backend connection. Returns the combined
+    dispatch report.
+    """
+    batch_size = batch_size or getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 100)
+    report = DispatchReport()
+
+    while max_batches is None or report.batches < max_batches:
+        batch = claim_batch(batch_size)
+        if not batch:
+            break
+        report.batches += 1
+
+        pairs = [(entry, build_message(entry)) for entry in batch]
+        batch_report = MailDispatcher().send(message for _, message in pairs)
+
+        errors = {id(message): error for message, error in batch_report.failed}
+        sent_entries = []
+        for entry, message in pairs:
+            if id(message) in errors:
+                mark_failed(entry, errors[id(message)])
+            else:
+                sent_entries.append(entry)
+        mark_sent(sent_entries)
+
+        report.sent += batch_report.sent
+        report.failed.extend(batch_report.failed)
+        report.connections += batch_report.connections
+
+    report.finish()
+    return report
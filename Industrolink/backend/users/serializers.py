@@ -1,5 +1,9 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.exceptions import ValidationError
+from django.utils.encoding import force_str
+from django.utils.http import urlsafe_base64_decode
 from students.models import Student
 from lecturers.models import Lecturer
 from supervisors.models import Supervisor, Company
@@ -26,8 +30,14 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         validated_data.pop('password_confirm')
         password = validated_data.pop('password')
+        # The async registration view hashes the password in a worker
+        # process and passes the result in through save()
+        encoded_password = validated_data.pop('encoded_password', None)
         user = User.objects.create_user(**validated_data)
-        user.set_password(password)
+        if encoded_password:
+            user.password = encoded_password
+        else:
+            user.set_password(password)
         user.save()
         return user
 
@@ -46,25 +56,37 @@ class UserSerializer(serializers.ModelSerializer):
 class EmailVerificationSerializer(serializers.Serializer):
     email = serializers.EmailField()
     token = serializers.CharField()
+
+
+class SetPasswordSerializer(serializers.Serializer):
+    uid = serializers.CharField()
+    token = serializers.CharField()
+    password = serializers.CharField(write_only=True, min_length=8)
+    password_confirm = serializers.CharField(write_only=True)
     
-    def validate_email(self, value):
+    def validate(self, attrs):
+        if attrs['password'] != attrs['password_confirm']:
+            raise serializers.ValidationError("Passwords don't match")
         try:
-            user = User.objects.get(email=value)
-            if user.email_verified:
-                raise serializers.ValidationError("Email is already verified")
-        except User.DoesNotExist:
-            raise serializers.ValidationError("User with this email does not exist")
-        return value
+            user = User.objects.get(pk=force_str(urlsafe_base64_decode(attrs['uid'])))
+        except (ValueError, ValidationError, User.DoesNotExist):
+            user = None
+        if user is None or not default_token_generator.check_token(user, attrs['token']):
+            raise serializers.ValidationError({'token': 'Invalid or expired link'})
+        attrs['user'] = user
+        return attrs
 
 
 class ResendVerificationSerializer(serializers.Serializer):
     email = serializers.EmailField()
     
-    def validate_email(self, value):
+    def validate(self, attrs):
+        # The user is looked up once here and handed to the view
         try:
-            user = User.objects.get(email=value)
-            if user.email_verified:
-                raise serializers.ValidationError("Email is already verified")
+            user = User.objects.get(email=attrs['email'])
         except User.DoesNotExist:
-            raise serializers.ValidationError("User with this email does not exist")
-        return value
+            raise serializers.ValidationError({'email': "User with this email does not exist"})
+        if user.email_verified:
+            raise serializers.ValidationError({'email': "Email is already verified"})
+        attrs['user'] = user
+        return attrs
@@ -0,0 +1,51 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import User
+from .token_cache import token_cache
+from .tokens import PRINCIPAL_CLAIMS, bump_token_epoch, forget_token_epoch
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_principal(sender, instance, **kwargs):
+    """Evict cached tokens so deactivation and role changes apply immediately"""
+    token_cache.invalidate_user(instance.pk)
+
+
+def _claims_changed(instance, claims):
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded is None:
+        return True
+    # Fields deferred at load and never set cannot have changed
+    return any(instance.__dict__[name] != loaded.get(name) for name in claims if name in instance.__dict__)
+
+
+@receiver(post_save, sender=User)
+def bump_epoch_on_principal_change(sender, instance, created=False, update_fields=None, **kwargs):
+    """Stop trusting token claims once any of the claimed fields changed"""
+    claims = set(PRINCIPAL_CLAIMS)
+    if update_fields is not None:
+        claims &= set(update_fields)
+    if not created and claims and _claims_changed(instance, claims):
+        bump_token_epoch(instance)
+
+    # The saved values are what the row holds now
+    saved = PRINCIPAL_CLAIMS if created or update_fields is None else claims
+    loaded = instance.__dict__.setdefault('_loaded_values', {})
+    loaded.update((name, instance.__dict__[name]) for name in saved if name in instance.__dict__)
+
+
+@receiver(post_delete, sender=User)
+def forget_epoch_on_delete(sender, instance, **kwargs):
+    forget_token_epoch(instance.pk)
+
+
+@receiver(post_save, sender='students.Student')
+@receiver(post_delete, sender='students.Student')
+@receiver(post_save, sender='supervisors.Supervisor')
+@receiver(post_delete, sender='supervisors.Supervisor')
+@receiver(post_save, sender='lecturers.Lecturer')
+@receiver(post_delete, sender='lecturers.Lecturer')
+def invalidate_cached_profile(sender, instance, **kwargs):
+    """Cached principals carry their role profile, so refresh them on change"""
+    token_cache.invalidate_user(instance.user_id)
@@ -1,3 +1,967 @@
-from django.test import TestCase
+import asyncio
+from asgiref.sync import sync_to_async
+import socketserver
+import logging
+from io import StringIO
+import threading
+from datetime import date
+from unittest import mock
+from django.core import mail
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password
+from rest_framework.test import APITestCase
+from rest_framework import status
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from core.logging_pipeline import BackgroundStreamHandler, SamplingFilter
+from students.models import DailyTask, Student, TaskCategory
+from supervisors.models import Company
+from .authentication import load_principal
+from .token_cache import TokenPrincipalCache, token_cache
+from .tokens import PrincipalRefreshToken, revoke_user_tokens
+from .models import EmailOutbox, EmailVerificationToken
+from .outbox import drain_outbox
+from .utils import issue_verification_token, queue_verification_emails
+from .mailer import MailDispatcher
+from .throttling import SlidingWindowLimiter, CacheSlidingWindowLimiter, reset_limiters
+from .hashing import PasswordHashPool, hash_pool
+from .blacklist import BloomFilter, blacklist_filter
+from .events import email_verified_channel
+
+User = get_user_model()
+
+
+class TokenPrincipalCacheTest(TestCase):
+    """Test the LRU token cache in isolation"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='student@test.com',
+            username='student@test.com',
+            password='testpass123',
+            first_name='Test',
+            last_name='Student',
+            role='student'
+        )
+
+    def test_lru_eviction(self):
+        """Oldest entries are evicted once the cache is full"""
+        cache = TokenPrincipalCache(max_entries=2, ttl=60)
+        tokens = [AccessToken.for_user(self.user) for _ in range(3)]
+        for token in tokens:
+            cache.set(cache.make_key(str(token)), self.user, token)
+
+        self.assertIsNone(cache.get(cache.make_key(str(tokens[0]))))
+        self.assertIsNotNone(cache.get(cache.make_key(str(tokens[2]))))
+        self.assertEqual(cache.stats()['size'], 2)
+
+    def test_ttl_capped_by_token_expiry(self):
+        """Entries never outlive the token's exp claim"""
+        cache = TokenPrincipalCache(max_entries=10, ttl=3600)
+        token = AccessToken.for_user(self.user)
+        token['exp'] = 0
+        key = cache.make_key(str(token))
+        cache.set(key, self.user, token)
+
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(cache.misses, 1)
+
+    def test_invalidate_user(self):
+        """All entries of a user are dropped on invalidation"""
+        cache = TokenPrincipalCache(max_entries=10, ttl=60)
+        token = AccessToken.for_user(self.user)
+        key = cache.make_key(str(token))
+        cache.set(key, self.user, token)
+        cache.invalidate_user(self.user.pk)
+
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(cache.stats()['size'], 0)
+
+
+class CookieJWTAuthenticationCacheTest(APITestCase):
+    """Test that cookie authentication reuses resolved principals"""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(
+            email='student@test.com',
+            username='student@test.com',
+            password='testpass123',
+            first_name='Test',
+            last_name='Student',
+            role='student'
+        )
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.user))
+
+    def test_repeated_requests_hit_cache(self):
+        """Second request with the same token skips the user query"""
+        url = reverse('profile-view')
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(token_cache.hits, 1)
+        self.assertEqual(token_cache.misses, 1)
+
+    def test_deactivation_invalidates_cache(self):
+        """Deactivated users are rejected on their next request"""
+        url = reverse('profile-view')
+        self.client.get(url)
+
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrincipalLoaderTest(APITestCase):
+    """Test that the role profile is loaded together with the user"""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(
+            email='student@test.com',
+            username='student@test.com',
+            password='testpass123',
+            first_name='Test',
+            last_name='Student',
+            role='student'
+        )
+        self.company = Company.objects.create(
+            name='Acme',
+            address='1 Main St',
+            phone_number='0700000000',
+            email='info@acme.test'
+        )
+        self.student = Student.objects.create(
+            user=self.user,
+            registration_no='REG-001',
+            academic_year='2025',
+            course='Computer Science',
+            year_of_study='3',
+            company=self.company,
+            duration_in_weeks=12,
+            start_date=date(2025, 1, 6),
+            completion_date=date(2025, 3, 31)
+        )
+        self.client.cookies['access_token'] = str(PrincipalRefreshToken.for_user(self.user).access_token)
+
+    def test_profile_and_company_loaded_in_one_query(self):
+        """Student profile view needs no queries beyond authentication"""
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('student-profile'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['company_name'], 'Acme')
+
+    def test_profile_change_refreshes_cached_principal(self):
+        """Updating the profile evicts the cached principal"""
+        self.client.get(reverse('student-profile'))
+
+        other = Company.objects.create(
+            name='Globex',
+            address='2 Side St',
+            phone_number='0711111111',
+            email='info@globex.test'
+        )
+        self.student.company = other
+        self.student.save()
+
+        response = self.client.get(reverse('student-profile'))
+        self.assertEqual(response.data['company_name'], 'Globex')
+
+    def test_cached_principal_is_copied_per_request(self):
+        """Requests served from one cache entry get their own objects"""
+        token = AccessToken.for_user(self.user)
+        key = token_cache.make_key(str(token))
+        token_cache.set(key, load_principal(self.user.pk, 'student'), token)
+
+        first, _ = token_cache.get(key)
+        first.first_name = 'Changed'
+        first.student_profile.company.name = 'Changed'
+
+        with self.assertNumQueries(0):
+            second, _ = token_cache.get(key)
+            self.assertIsNot(second, first)
+            self.assertEqual(second.first_name, 'Test')
+            self.assertEqual(second.student_profile.company.name, 'Acme')
+            self.assertIs(second.student_profile.user, second)
+
+
+class ClaimsTokenTest(APITestCase):
+    """Test status checks answered from token claims"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='lecturer@test.com',
+            username='lecturer@test.com',
+            password='testpass123',
+            first_name='Test',
+            last_name='Lecturer',
+            role='lecturer'
+        )
+        refresh = PrincipalRefreshToken.for_user(self.user)
+        self.client.cookies['access_token'] = str(refresh.access_token)
+
+    def test_profile_status_from_claims(self):
+        """Profile status needs no database queries"""
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('profile-status'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['role'], 'lecturer')
+        self.assertFalse(response.data['profile_completed'])
+
+    def test_changed_user_is_reloaded(self):
+        """Claims are ignored once the user's epoch moves"""
+        self.user.profile_completed = True
+        self.user.save()
+
+        response = self.client.get(reverse('profile-status'))
+        self.assertTrue(response.data['profile_completed'])
+
+    def test_deactivation_is_immediate(self):
+        """Deactivated users are rejected despite claims saying otherwise"""
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(reverse('profile-status'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class EmailOutboxTest(APITestCase):
+    """Test verification mail going through the outbox"""
+
+    def register(self):
+        return self.client.post(reverse('user-register'), {
+            'first_name': 'New',
+            'last_name': 'Student',
+            'username': 'new@test.com',
+            'email': 'new@test.com',
+            'role': 'student',
+            'password': 'testpass123',
+            'password_confirm': 'testpass123',
+        })
+
+    def test_registration_queues_instead_of_sending(self):
+        """Registration writes an outbox row and sends nothing inline"""
+        response = self.register()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(mail.outbox), 0)
+
+        message = EmailOutbox.objects.get(to_email='new@test.com')
+        self.assertEqual(message.status, 'pending')
+        self.assertIn('/verify-email?token=', message.body)
+
+    def test_worker_delivers_pending_messages(self):
+        """The send_outbox command drains the outbox"""
+        self.register()
+        call_command('send_outbox')
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['new@test.com'])
+        self.assertEqual(EmailOutbox.objects.get().status, 'sent')
+
+    @override_settings(
+        EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+        EMAIL_HOST='127.0.0.1',
+        EMAIL_PORT=1,
+        EMAIL_OUTBOX_MAX_ATTEMPTS=2,
+    )
+    def test_failures_back_off_then_give_up(self):
+        """Failed deliveries are retried later and eventually marked failed"""
+        self.register()
+
+        report = drain_outbox()
+        message = EmailOutbox.objects.get()
+        self.assertEqual(len(report.failed), 1)
+        self.assertEqual(message.status, 'pending')
+        self.assertEqual(message.attempts, 1)
+        self.assertGreater(message.next_attempt_at, timezone.now())
+
+        # Not due yet, so nothing is claimed
+        self.assertEqual(drain_outbox().batches, 0)
+
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+        drain_outbox()
+        message.refresh_from_db()
+        self.assertEqual(message.status, 'failed')
+        self.assertEqual(message.attempts, 2)
+
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept mail from smtplib"""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 localhost stub SMTP')
+        in_data = False
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                break
+            if in_data:
+                if line == b'.\r\n':
+                    in_data = False
+                    self.server.messages += 1
+                    self.reply('250 OK')
+                continue
+
+            command = line[:4].upper()
+            if command == b'DATA':
+                in_data = True
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+            elif command == b'QUIT':
+                self.reply('221 Bye')
+                break
+            else:
+                self.reply('250 OK')
+
+
+class MailDispatcherTest(TestCase):
+    """Test batched dispatch against a local SMTP server"""
+
+    def setUp(self):
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), StubSMTPHandler)
+        self.server.daemon_threads = True
+        self.server.connections = 0
+        self.server.messages = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def smtp_settings(self):
+        return override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=self.server.server_address[1],
+            EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER='',
+            EMAIL_HOST_PASSWORD='',
+        )
+
+    def test_batch_uses_one_connection(self):
+        """Many messages go out over a single SMTP session"""
+        users = [
+            User(email=f'student{i}@test.com', first_name='Student', last_name=str(i))
+            for i in range(25)
+        ]
+        queue_verification_emails([
+            (user, f'http://localhost/verify-email?token={i}')
+            for i, user in enumerate(users)
+        ])
+
+        with self.smtp_settings():
+            report = drain_outbox()
+
+        self.assertEqual(report.sent, 25)
+        self.assertEqual(report.connections, 1)
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(self.server.messages, 25)
+        self.assertEqual(EmailOutbox.objects.filter(status='sent').count(), 25)
+
+    def test_dispatch_report(self):
+        """The report carries throughput figures"""
+        messages = [
+            mail.EmailMessage('Subject', 'Body', 'noreply@test.com', [f'user{i}@test.com'])
+            for i in range(3)
+        ]
+        with self.smtp_settings():
+            report = MailDispatcher().send(messages)
+
+        stats = report.as_dict()
+        self.assertEqual(stats['sent'], 3)
+        self.assertEqual(stats['failed'], 0)
+        self.assertGreater(stats['messages_per_second'], 0)
+
+
+class SlidingWindowLimiterTest(TestCase):
+    """Test the sliding-window limiters"""
+
+    def test_window_slides(self):
+        """Old hits stop counting once they leave the window"""
+        limiter = SlidingWindowLimiter(limit=2, window=60)
+        self.assertTrue(limiter.hit('1.2.3.4', now=0)[0])
+        self.assertTrue(limiter.hit('1.2.3.4', now=30)[0])
+
+        allowed, wait = limiter.hit('1.2.3.4', now=45)
+        self.assertFalse(allowed)
+        self.assertEqual(wait, 15)
+
+        self.assertTrue(limiter.hit('1.2.3.4', now=61)[0])
+        self.assertTrue(limiter.hit('5.6.7.8', now=61)[0])
+
+    def test_key_count_is_bounded(self):
+        limiter = SlidingWindowLimiter(limit=1, window=60, max_keys=2)
+        for key in ('a', 'b', 'c'):
+            limiter.hit(key, now=0)
+        self.assertEqual(list(limiter._hits), ['b', 'c'])
+
+    def test_cache_limiter(self):
+        """The shared limiter weights the previous window"""
+        limiter = CacheSlidingWindowLimiter(limit=2, window=60, cache_alias='default', prefix='test-throttle')
+        self.assertTrue(limiter.hit('a@test.com', now=6000)[0])
+        self.assertTrue(limiter.hit('a@test.com', now=6010)[0])
+        self.assertFalse(limiter.hit('a@test.com', now=6020)[0])
+        # Early in the next window the old hits still count almost fully
+        self.assertTrue(limiter.hit('a@test.com', now=6062)[0])
+        self.assertFalse(limiter.hit('a@test.com', now=6063)[0])
+        self.assertTrue(limiter.hit('a@test.com', now=6115)[0])
+
+
+@override_settings(AUTH_THROTTLE_RATES={
+    'login_ip': '10/min',
+    'login_email': '2/min',
+    'verification_ip': '10/min',
+    'verification_email': '2/min',
+})
+class AuthThrottleTest(APITestCase):
+    """Test throttling of the unauthenticated auth endpoints"""
+
+    def setUp(self):
+        reset_limiters()
+        self.user = User.objects.create_user(
+            email='student@test.com',
+            username='student@test.com',
+            password='testpass123',
+            first_name='Test',
+            last_name='Student',
+            role='student'
+        )
+
+    def tearDown(self):
+        reset_limiters()
+
+    def test_login_throttled_by_email(self):
+        """Rejected logins never reach the database"""
+        url = reverse('user-login')
+        data = {'email': 'Student@test.com', 'password': 'wrong'}
+        for _ in range(2):
+            response = self.client.post(url, data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        with self.assertNumQueries(0):
+            response = self.client.post(url, {'email': 'student@test.com', 'password': 'testpass123'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+
+        response = self.client.post(url, {'email': 'other@test.com', 'password': 'wrong'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_login_throttled_by_ip(self):
+        url = reverse('user-login')
+        for i in range(10):
+            self.client.post(url, {'email': f'user{i}@test.com', 'password': 'wrong'}, format='json')
+
+        response = self.client.post(url, {'email': 'student@test.com', 'password': 'testpass123'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_verification_status_throttled(self):
+        url = reverse('check-verification-status')
+        for _ in range(2):
+            response = self.client.get(url, {'email': 'student@test.com'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'email': 'student@test.com'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+class AsyncAuthViewTest(APITestCase):
+    """Test the async auth endpoints backed by the hashing pool"""
+
+    def setUp(self):
+        reset_limiters()
+        self.user = User.objects.create_user(
+            email='student@test.com',
+            username='student@test.com',
+            password='testpass123',
+            first_name='Test',
+            last_name='Student',
+            role='student'
+        )
+
+    def tearDown(self):
+        reset_limiters()
+
+    def test_login(self):
+        url = reverse('user-login-async')
+        response = self.client.post(url, {'email': 'student@test.com', 'password': 'testpass123'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('access_token', response.cookies)
+
+        response = self.client.post(url, {'email': 'student@test.com', 'password': 'wrong'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_register(self):
+        response = self.client.post(reverse('user-register-async'), {
+            'first_name': 'New',
+            'last_name': 'Student',
+            'username': 'new@test.com',
+            'email': 'new@test.com',
+            'role': 'student',
+            'password': 'newpass123',
+            'password_confirm': 'newpass123',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        user = User.objects.get(email='new@test.com')
+        self.assertTrue(user.check_password('newpass123'))
+        self.assertEqual(EmailOutbox.objects.filter(to_email='new@test.com').count(), 1)
+
+    def test_password_change(self):
+        refresh = PrincipalRefreshToken.for_user(self.user)
+        self.client.cookies['access_token'] = str(refresh.access_token)
+
+        response = self.client.post(reverse('password-change-async'), {
+            'current_password': 'testpass123',
+            'new_password': 'changed123',
+            'confirm_password': 'changed123',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('changed123'))
+
+    def test_saturated_pool_is_refused(self):
+        """Jobs beyond the pending cap get a 503 instead of queueing"""
+        max_pending = hash_pool.max_pending
+        hash_pool.max_pending = 0
+        try:
+            response = self.client.post(
+                reverse('user-login-async'),
+                {'email': 'student@test.com', 'password': 'testpass123'},
+                format='json'
+            )
+        finally:
+            hash_pool.max_pending = max_pending
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertGreaterEqual(hash_pool.stats()['rejected'], 1)
+
+    def test_pool_stats(self):
+        pool = PasswordHashPool(max_workers=1, max_pending=4)
+        self.assertEqual(pool.stats()['queue_depth'], 0)
+        self.assertEqual(pool.stats()['max_pending'], 4)
+
+    def test_workers_are_spawned(self):
+        pool = PasswordHashPool(max_workers=1)
+        try:
+            # Forking a process that already runs threads is unsafe
+            self.assertEqual(pool.executor._mp_context.get_start_method(), 'spawn')
+            encoded, = pool.make_passwords(['secret123'])
+            self.assertTrue(check_password('secret123', encoded))
+        finally:
+            pool.shutdown()
+
+
+class TokenBlacklistFilterTest(APITestCase):
+    """Test the filter in front of the refresh-token blacklist"""
+
+    def setUp(self):
+        blacklist_filter.reset()
+        self.user = User.objects.create_user(
+            email='student@test.com',
+            username='student@test.com',
+            password='testpass123',
+            first_name='Test',
+            last_name='Student',
+            role='student'
+        )
+
+    def tearDown(self):
+        blacklist_filter.reset()
+
+    def test_bloom_filter(self):
+        bloom = BloomFilter(capacity=100)
+        for i in range(100):
+            bloom.add(f'jti-{i}')
+        self.assertTrue(all(f'jti-{i}' in bloom for i in range(100)))
+        misses = sum(f'other-{i}' in bloom for i in range(1000))
+        self.assertLess(misses, 50)
+
+    def test_refresh_skips_blacklist_lookup(self):
+        """Tokens missing from the filter are not looked up"""
+        raw = str(PrincipalRefreshToken.for_user(self.user))
+        PrincipalRefreshToken(raw)
+
+        with self.assertNumQueries(0):
+            PrincipalRefreshToken(raw)
+        self.assertGreaterEqual(blacklist_filter.stats()['skipped_lookups'], 1)
+
+    def test_unavailable_database_falls_through(self):
+        with mock.patch.object(blacklist_filter, '_rebuild', side_effect=OperationalError('down')):
+            self.assertTrue(blacklist_filter.might_contain('jti'))
+            self.assertTrue(blacklist_filter.might_contain('jti'))
+        self.assertFalse(blacklist_filter.might_contain('jti'))
+
+    def test_blacklisted_token_is_rejected(self):
+        refresh = PrincipalRefreshToken.for_user(self.user)
+        PrincipalRefreshToken(str(refresh))
+        refresh.blacklist()
+
+        with self.assertRaises(TokenError):
+            PrincipalRefreshToken(str(refresh))
+
+        response = self.client.post(reverse('refresh-token'), HTTP_COOKIE=f'refresh_token={refresh}')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_sync_picks_up_rows_committed_late(self):
+        """A row below the synced ids that shows up later is still added"""
+        late = PrincipalRefreshToken.for_user(self.user)
+        early = PrincipalRefreshToken.for_user(self.user)
+        late.blacklist()
+        early.blacklist()
+        late_row = BlacklistedToken.objects.get(token__jti=late['jti'])
+
+        # As if the late row's transaction had not committed yet at rebuild time
+        late_row.delete()
+        blacklist_filter.might_contain(early['jti'])
+        self.assertFalse(blacklist_filter.might_contain(late['jti']))
+        late_row.save()
+
+        blacklist_filter._synced_at = 0.0
+        self.assertTrue(blacklist_filter.might_contain(late['jti']))
+
+    def test_prune_tokens(self):
+        """Expired tokens and their blacklist entries are deleted"""
+        for _ in range(5):
+            PrincipalRefreshToken.for_user(self.user).blacklist()
+        live = PrincipalRefreshToken.for_user(self.user)
+        OutstandingToken.objects.exclude(jti=live['jti']).update(expires_at=timezone.now())
+
+        call_command('prune_tokens', chunk_size=2, stdout=StringIO())
+
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), [live['jti']])
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+
+class TokenEpochRevocationTest(APITestCase):
+    """Test revoking every session of a user by bumping token_epoch"""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(
+            email='student@test.com',
+            username='student@test.com',
+            password='testpass123',
+            first_name='Test',
+            last_name='Student',
+            role='student'
+        )
+        self.refresh = PrincipalRefreshToken.for_user(self.user)
+        self.client.cookies['access_token'] = str(self.refresh.access_token)
+
+    def test_revoke_rejects_cached_token(self):
+        """Tokens already in the token cache stop working too"""
+        response = self.client.get(reverse('profile-view'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with CaptureQueriesContext(connection) as queries:
+            revoke_user_tokens(self.user)
+        writes = [q for q in queries.captured_queries if not q['sql'].startswith('SELECT')]
+        self.assertEqual(len(writes), 1)
+
+        response = self.client.get(reverse('profile-view'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revoke_rejects_refresh(self):
+        revoke_user_tokens(self.user)
+        with self.assertRaises(TokenError):
+            PrincipalRefreshToken(str(self.refresh))
+
+    def test_claim_change_keeps_sessions(self):
+        """A new epoch from a profile change is not a revocation"""
+        self.user.profile_completed = True
+        self.user.save()
+
+        response = self.client.get(reverse('profile-view'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        access = PrincipalRefreshToken(str(self.refresh)).access_token
+        self.assertTrue(access['profile_completed'])
+        self.assertEqual(access['token_epoch'], self.user.token_epoch)
+
+    def test_unclaimed_change_keeps_epoch(self):
+        user = User.objects.get(pk=self.user.pk)
+        epoch = user.token_epoch
+        user.middle_name = 'Middle'
+        user.role = user.role
+        with self.assertNumQueries(1):
+            user.save()
+        self.assertEqual(User.objects.get(pk=user.pk).token_epoch, epoch)
+
+        user.first_name = 'Changed'
+        user.save()
+        self.assertEqual(User.objects.get(pk=user.pk).token_epoch, epoch + 1)
+
+    def test_stale_save_keeps_revocation(self):
+        """Saving an instance loaded before the revocation does not undo it"""
+        stale = User.objects.get(pk=self.user.pk)
+        revoke_user_tokens(self.user)
+        stale.first_name = 'Changed'
+        stale.save()
+
+        with self.assertRaises(TokenError):
+            PrincipalRefreshToken(str(self.refresh))
+
+    def test_logout_all_devices(self):
+        other_session = str(PrincipalRefreshToken.for_user(self.user).access_token)
+
+        response = self.client.post(reverse('user-logout'), {'all_devices': True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.cookies['access_token'] = other_session
+        response = self.client.get(reverse('profile-view'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_keeps_current_session(self):
+        old_access = str(self.refresh.access_token)
+        response = self.client.post(reverse('password-change'), {
+            'current_password': 'testpass123',
+            'new_password': 'changed123',
+            'confirm_password': 'changed123',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # The new cookie works, the old token does not
+        response = self.client.get(reverse('profile-view'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.cookies['access_token'] = old_access
+        response = self.client.get(reverse('profile-view'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class EmailVerificationTokenTest(APITestCase):
+    """Test hashed verification tokens"""
+
+    def setUp(self):
+        reset_limiters()
+        self.user = User.objects.create_user(
+            email='student@test.com',
+            username='student@test.com',
+            password='testpass123',
+            first_name='Test',
+            last_name='Student',
+            role='student'
+        )
+        self.token = issue_verification_token(self.user)
+
+    def tearDown(self):
+        reset_limiters()
+
+    def verify(self, token):
+        return self.client.post(reverse('verify-email'), {'email': 'student@test.com', 'token': token}, format='json')
+
+    def test_only_hash_is_stored(self):
+        stored = EmailVerificationToken.objects.get(user=self.user)
+        self.assertNotEqual(stored.token_hash, self.token)
+        self.assertEqual(len(stored.token_hash), 64)
+
+    def test_verify_in_two_queries(self):
+        """One conditional UPDATE and one SELECT"""
+        with self.assertNumQueries(2):
+            response = self.verify(self.token)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['user']['email_verified'])
+
+        response = self.verify(self.token)
+        self.assertEqual(response.data['message'], 'Email is already verified')
+
+    def test_invalid_and_expired_tokens(self):
+        response = self.verify('not-the-token')
+        self.assertEqual(response.data['error'], 'Invalid verification token')
+
+        EmailVerificationToken.objects.update(expires_at=timezone.now())
+        response = self.verify(self.token)
+        self.assertEqual(response.data['error'], 'Verification token has expired')
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.email_verified)
+
+    def test_resend_replaces_token(self):
+        response = self.client.post(reverse('resend-verification'), {'email': 'student@test.com'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(EmailVerificationToken.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(self.verify(self.token).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_sweeper(self):
+        other = User.objects.create_user(
+            email='other@test.com',
+            username='other@test.com',
+            password='testpass123',
+            first_name='Other',
+            last_name='Student',
+            role='student'
+        )
+        issue_verification_token(other)
+        self.verify(self.token)
+
+        call_command('sweep_verification_tokens', stdout=StringIO())
+        self.assertEqual(list(EmailVerificationToken.objects.values_list('user_id', flat=True)), [other.pk])
+
+
+class VerificationStreamTest(TestCase):
+    """Test the server-sent verification status stream"""
+
+    def setUp(self):
+        reset_limiters()
+        self.user = User.objects.create_user(
+            email='student@test.com',
+            username='student@test.com',
+            password='testpass123',
+            first_name='Test',
+            last_name='Student',
+            role='student'
+        )
+
+    def tearDown(self):
+        reset_limiters()
+
+    async def read_events(self, response):
+        chunks = []
+        async for chunk in response.streaming_content:
+            chunks.append(chunk.decode())
+        return ''.join(chunks)
+
+    async def test_verified_user_gets_single_event(self):
+        await User.objects.filter(pk=self.user.pk).aupdate(email_verified=True)
+        response = await self.async_client.get(reverse('verification-status-stream'), {'email': 'student@test.com'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(await self.read_events(response), 'event: verified\ndata: {"email_verified": true}\n\n')
+
+    async def test_publish_wakes_waiting_stream(self):
+        response = await self.async_client.get(reverse('verification-status-stream'), {'email': 'Student@test.com'})
+        self.assertEqual(email_verified_channel.subscriber_count(), 1)
+
+        reader = asyncio.ensure_future(self.read_events(response))
+        await asyncio.sleep(0)
+        # Verification happens in another thread, as a sync view would
+        await asyncio.to_thread(email_verified_channel.publish, 'student@test.com')
+
+        events = await asyncio.wait_for(reader, timeout=5)
+        self.assertIn('event: verified', events)
+        self.assertEqual(email_verified_channel.subscriber_count(), 0)
+
+    async def test_unknown_email(self):
+        response = await self.async_client.get(reverse('verification-status-stream'), {'email': 'nobody@test.com'})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(email_verified_channel.subscriber_count(), 0)
+
+    def test_verification_publishes_on_commit(self):
+        token = issue_verification_token(self.user)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.client.post(reverse('verify-email'), {'email': 'student@test.com', 'token': token}, format='json')
+        self.assertEqual(len(callbacks), 1)
+
+
+class AsyncReadViewTest(TestCase):
+    """Test the native async profile, status and today's task endpoints"""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(
+            email='student@test.com',
+            username='student@test.com',
+            password='testpass123',
+            first_name='Test',
+            last_name='Student',
+            role='student'
+        )
+        company = Company.objects.create(
+            name='Acme',
+            address='1 Main St',
+            phone_number='0700000000',
+            email='info@acme.test'
+        )
+        self.student = Student.objects.create(
+            user=self.user,
+            registration_no='REG-001',
+            academic_year='2025',
+            course='Computer Science',
+            year_of_study='3',
+            company=company,
+            duration_in_weeks=12,
+            start_date=date(2025, 1, 6),
+            completion_date=date(2025, 3, 31)
+        )
+        self.access = str(PrincipalRefreshToken.for_user(self.user).access_token)
+        self.async_client.cookies['access_token'] = self.access
+
+    def tearDown(self):
+        token_cache.clear()
+
+    async def test_profile_status_from_claims(self):
+        response = await self.async_client.get(reverse('profile-status-async'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'profile_completed': False, 'role': 'student'})
+
+    async def test_profile(self):
+        response = await self.async_client.get(reverse('profile-view-async'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['email'], 'student@test.com')
+
+    async def test_revoked_token_rejected(self):
+        await sync_to_async(revoke_user_tokens)(self.user)
+        response = await self.async_client.get(reverse('profile-view-async'))
+        self.assertEqual(response.status_code, 401)
+
+    async def test_anonymous(self):
+        self.async_client.cookies.clear()
+        response = await self.async_client.get(reverse('profile-status-async'))
+        self.assertEqual(response.status_code, 401)
+
+    async def test_today_task(self):
+        response = await self.async_client.get(reverse('today-task-async'))
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.json()['has_task'])
+
+        category = await TaskCategory.objects.acreate(name='Testing')
+        await DailyTask.objects.acreate(
+            student=self.student,
+            description='Wrote tests',
+            task_category=category,
+            hours_spent=2
+        )
+        response = await self.async_client.get(reverse('today-task-async'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['has_task'])
+        self.assertEqual(response.json()['task']['description'], 'Wrote tests')
+
+
+class LoggingPipelineTest(TestCase):
+    """Test the queued, sampled logging handlers"""
+
+    def record(self, name, level=logging.INFO):
+        return logging.LogRecord(name, level, __file__, 1, 'message %s', ('arg',), None)
+
+    def test_sampling_by_logger(self):
+        sample = SamplingFilter(rates={'users.authentication': 0.0})
+        self.assertFalse(sample.filter(self.record('users.authentication')))
+        self.assertFalse(sample.filter(self.record('users.authentication.child')))
+        self.assertTrue(sample.filter(self.record('users.views')))
+        # Warnings are never sampled away
+        self.assertTrue(sample.filter(self.record('users.authentication', logging.WARNING)))
+
+    def test_formatting_happens_off_thread(self):
+        stream = StringIO()
+        handler = BackgroundStreamHandler(stream=stream)
+        handler.setFormatter(logging.Formatter('%(name)s %(message)s'))
+
+        # The caller only enqueues the record as-is; nothing is formatted
+        record = self.record('users.views')
+        self.assertIs(handler.prepare(record), record)
+        self.assertFalse(hasattr(record, 'message'))
+        handler.handle(record)
+
+        handler.close()
+        self.assertEqual(stream.getvalue(), 'users.views message arg\n')
@@ -0,0 +1,190 @@
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+
+def parse_rate(rate):
+    """Turn a DRF-style rate such as '5/min' into (limit, window_seconds)"""
+    num, period = rate.split('/')
+    window = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+    return int(num), window
+
+
+class SlidingWindowLimiter:
+    """
+    In-process sliding-window log. Each key keeps the timestamps of its
+    hits inside the window; the number of tracked keys is bounded so a
+    flood of distinct IPs or emails cannot exhaust memory.
+    """
+
+    def __init__(self, limit, window, max_keys=100000):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._hits = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, now=None):
+        """Record a hit. Returns (allowed, seconds_until_allowed)."""
+        now = time.monotonic() if now is None else now
+        cutoff = now - self.window
+
+        with self._lock:
+            history = self._hits.get(key)
+            if history is None:
+                history = self._hits[key] = deque()
+                while len(self._hits) > self.max_keys:
+                    self._hits.popitem(last=False)
+            else:
+                self._hits.move_to_end(key)
+
+            while history and history[0] <= cutoff:
+                history.popleft()
+
+            if len(history) >= self.limit:
+                return False, history[0] + self.window - now
+
+            history.append(now)
+            return True, 0
+
+    def reset(self):
+        with self._lock:
+            self._hits.clear()
+
+
+class CacheSlidingWindowLimiter:
+    """
+    Sliding-window counter kept in a shared cache so limits hold across
+    workers. The previous fixed window is weighted by how much of it still
+    overlaps the sliding window; counting uses atomic cache.incr().
+    """
+
+    def __init__(self, limit, window, cache_alias, prefix='auth-throttle'):
+        self.limit = limit
+        self.window = window
+        self.cache = caches[cache_alias]
+        self.prefix = prefix
+
+    def _key(self, key, index):
+        return f'{self.prefix}:{key}:{index}'
+
+    def hit(self, key, now=None):
+        now = time.time() if now is None else now
+        index = int(now // self.window)
+        elapsed = (now % self.window) / self.window
+
+        current_key = self._key(key, index)
+        counts = self.cache.get_many([current_key, self._key(key, index - 1)])
+        current = counts.get(current_key, 0)
+        previous = counts.get(self._key(key, index - 1), 0)
+
+        if previous * (1 - elapsed) + current >= self.limit:
+            return False, self.window * (1 - elapsed)
+
+        if self.cache.add(current_key, 1, timeout=self.window * 2):
+            return True, 0
+        try:
+            self.cache.incr(current_key)
+        except ValueError:
+            self.cache.set(current_key, 1, timeout=self.window * 2)
+        return True, 0
+
+    def reset(self):
+        pass
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(scope):
+    """Shared limiter for a scope configured in AUTH_THROTTLE_RATES"""
+    with _limiters_lock:
+        limiter = _limiters.get(scope)
+        if limiter is None:
+            limit, window = parse_rate(settings.AUTH_THROTTLE_RATES[scope])
+            cache_alias = getattr(settings, 'AUTH_THROTTLE_CACHE', None)
+            if cache_alias:
+                limiter = CacheSlidingWindowLimiter(limit, window, cache_alias, prefix=f'auth-throttle:{scope}')
+            else:
+                limiter = SlidingWindowLimiter(limit, window)
+            _limiters[scope] = limiter
+        return limiter
+
+
+def reset_limiters():
+    with _limiters_lock:
+        for limiter in _limiters.values():
+            limiter.reset()
+        _limiters.clear()
+
+
+def check_limits(request, email, ip_scope, email_scope):
+    """
+    Throttle check for plain Django views, which cannot use DRF throttle
+    classes. Returns the seconds to wait when a limit is hit, else None.
+    """
+    hits = [(ip_scope, BaseThrottle().get_ident(request))]
+    if email and isinstance(email, str):
+        hits.append((email_scope, email.strip().lower()))
+
+    for scope, key in hits:
+        allowed, wait = get_limiter(scope).hit(key)
+        if not allowed:
+            return math.ceil(wait)
+    return None
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    DRF throttle backed by a sliding-window limiter. DRF checks throttles
+    before the view runs, so rejected requests never reach password
+    hashing or the database.
+    """
+    scope = None
+
+    def get_key(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        key = self.get_key(request)
+        if key is None:
+            return True
+        allowed, self.wait_seconds = get_limiter(self.scope).hit(key)
+        return allowed
+
+    def wait(self):
+        return math.ceil(self.wait_seconds)
+
+
+class IPThrottle(SlidingWindowThrottle):
+    def get_key(self, request):
+        return self.get_ident(request)
+
+
+class EmailThrottle(SlidingWindowThrottle):
+    def get_key(self, request):
+        email = request.data.get('email') if request.method == 'POST' else request.query_params.get('email')
+        if not email or not isinstance(email, str):
+            return None
+        return email.strip().lower()
+
+
+class LoginIPThrottle(IPThrottle):
+    scope = 'login_ip'
+
+
+class LoginEmailThrottle(EmailThrottle):
+    scope = 'login_email'
+
+
+class VerificationIPThrottle(IPThrottle):
+    scope = 'verification_ip'
+
+
+class VerificationEmailThrottle(EmailThrottle):
+    scope = 'verification_email'
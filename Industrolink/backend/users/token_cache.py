@@ -0,0 +1,136 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import models
+
+
+def copy_principal(instance, memo=None):
+    """
+    Copy of a model instance and the related instances it has loaded
+    (user -> profile -> company), so requests served from one cache entry
+    never share objects a view might modify. Back-references
+    (profile.user) point at the copy.
+    """
+    if memo is None:
+        memo = {}
+    if id(instance) in memo:
+        return memo[id(instance)]
+
+    clone = memo[id(instance)] = copy.copy(instance)
+    clone._state.fields_cache = {
+        name: copy_principal(related, memo) if isinstance(related, models.Model) else related
+        for name, related in instance._state.fields_cache.items()
+    }
+    return clone
+
+
+class TokenPrincipalCache:
+    """
+    Bounded, in-process LRU cache of validated access tokens and the users
+    they resolve to. Entries are keyed by a SHA-256 digest of the raw token
+    so the token itself is never kept in memory, and each entry lives no
+    longer than the configured TTL or the token's own ``exp`` claim.
+    Users go in and come out as copies (see copy_principal), so the cached
+    instance is never handed to a request.
+    """
+
+    def __init__(self, max_entries=2048, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(raw_token):
+        if isinstance(raw_token, str):
+            raw_token = raw_token.encode()
+        return hashlib.sha256(raw_token).hexdigest()
+
+    def get(self, key):
+        """Return ``(user, validated_token)`` for a cached token, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            user, validated_token, expires_at = entry
+            if expires_at <= now:
+                self._discard(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy_principal(user), validated_token
+
+    def set(self, key, user, validated_token):
+        if self.max_entries <= 0:
+            return
+
+        # Never outlive the token itself
+        expires_at = time.time() + self.ttl
+        exp = validated_token.get('exp')
+        if exp is not None:
+            expires_at = min(expires_at, exp)
+
+        user = copy_principal(user)
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = (user, validated_token, expires_at)
+            self._keys_by_user.setdefault(user.pk, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                oldest_key = next(iter(self._entries))
+                self._discard(oldest_key)
+
+    def invalidate_user(self, user_id):
+        """Drop every cached token that resolved to the given user"""
+        with self._lock:
+            for key in self._keys_by_user.pop(user_id, ()):
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+            }
+
+    def _discard(self, key):
+        # Caller must hold the lock
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        user_keys = self._keys_by_user.get(entry[0].pk)
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._keys_by_user[entry[0].pk]
+
+
+token_cache = TokenPrincipalCache(
+    max_entries=getattr(settings, 'TOKEN_CACHE_MAX_ENTRIES', 2048),
+    ttl=getattr(settings, 'TOKEN_CACHE_TTL_SECONDS', 60),
+)
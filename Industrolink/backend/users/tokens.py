@@ -0,0 +1,240 @@
+from datetime import datetime
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import F
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from .blacklist import blacklist_filter
+
+User = get_user_model()
+
+# User fields embedded in every token so status checks can skip the database
+PRINCIPAL_CLAIMS = (
+    'role', 'is_active', 'is_staff', 'profile_completed', 'email_verified',
+    'email', 'first_name', 'last_name', 'created_at',
+)
+# Copy of User.token_epoch at issue time. The epoch moves whenever a
+# claimed field changes or the user's tokens are revoked, so a token from
+# the current epoch is neither stale nor revoked. Tokens from older epochs
+# are checked against the database (User.revoked_token_epoch).
+TOKEN_EPOCH_CLAIM = 'token_epoch'
+
+
+def _token_epoch_cache_key(user_id):
+    return f'token-epoch:{user_id}'
+
+
+def _token_epoch_timeout():
+    return getattr(settings, 'TOKEN_EPOCH_CACHE_SECONDS', 60)
+
+
+def _token_epoch_query(user_id):
+    return User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).values_list('token_epoch', flat=True)
+
+
+def get_token_epoch(user_id):
+    """
+    The user's current User.token_epoch, read through the cache. None when
+    the user no longer exists.
+    """
+    key = _token_epoch_cache_key(user_id)
+    epoch = cache.get(key)
+    if epoch is None:
+        epoch = _token_epoch_query(user_id).first()
+        if epoch is not None:
+            cache.add(key, epoch, timeout=_token_epoch_timeout())
+    return epoch
+
+
+def has_current_token_epoch(validated_token):
+    """True while nothing about the user has changed since the token was issued"""
+    current = get_token_epoch(validated_token[api_settings.USER_ID_CLAIM])
+    return current is not None and validated_token.get(TOKEN_EPOCH_CLAIM, 0) == current
+
+
+def has_current_claims(validated_token):
+    """
+    True when the token's claims still reflect the user's current state.
+    Tokens issued before the claims existed never count as current.
+    """
+    if any(claim not in validated_token for claim in PRINCIPAL_CLAIMS):
+        return False
+    return has_current_token_epoch(validated_token)
+
+
+def is_token_revoked(validated_token, user):
+    """True when the user's tokens were revoked after this one was issued"""
+    return validated_token.get(TOKEN_EPOCH_CLAIM, 0) < user.revoked_token_epoch
+
+
+async def aget_token_epoch(user_id):
+    """Async get_token_epoch(), using the async cache and ORM APIs"""
+    key = _token_epoch_cache_key(user_id)
+    epoch = await cache.aget(key)
+    if epoch is None:
+        epoch = await _token_epoch_query(user_id).afirst()
+        if epoch is not None:
+            await cache.aadd(key, epoch, timeout=_token_epoch_timeout())
+    return epoch
+
+
+async def ahas_current_token_epoch(validated_token):
+    current = await aget_token_epoch(validated_token[api_settings.USER_ID_CLAIM])
+    return current is not None and validated_token.get(TOKEN_EPOCH_CLAIM, 0) == current
+
+
+async def ahas_current_claims(validated_token):
+    """Async has_current_claims() for the async views"""
+    if any(claim not in validated_token for claim in PRINCIPAL_CLAIMS):
+        return False
+    return await ahas_current_token_epoch(validated_token)
+
+
+def cache_token_epoch(user):
+    """Remember the epoch of a user just read from the database"""
+    cache.set(_token_epoch_cache_key(user.pk), user.token_epoch, timeout=_token_epoch_timeout())
+
+
+async def acache_token_epoch(user):
+    await cache.aset(_token_epoch_cache_key(user.pk), user.token_epoch, timeout=_token_epoch_timeout())
+
+
+def _move_token_epoch(user, **updates):
+    User.objects.filter(pk=user.pk).update(token_epoch=F('token_epoch') + 1, **updates)
+    user.token_epoch, user.revoked_token_epoch = (
+        User.objects.filter(pk=user.pk).values_list('token_epoch', 'revoked_token_epoch').get()
+    )
+    cache_token_epoch(user)
+    return user.token_epoch
+
+
+def bump_token_epoch(user):
+    """
+    Stop trusting the claims of every token issued to the user so far.
+    The tokens stay valid; they are checked against the database instead.
+    """
+    return _move_token_epoch(user)
+
+
+def revoke_user_tokens(user):
+    """
+    Revoke every token issued to the user so far ("log out everywhere")
+    with a single UPDATE, however many sessions are outstanding.
+    """
+    # Both right-hand sides read the old token_epoch
+    return _move_token_epoch(user, revoked_token_epoch=F('token_epoch') + 1)
+
+
+def forget_token_epoch(user_id):
+    """Drop the cached epoch of a deleted user, so its tokens stop working"""
+    cache.delete(_token_epoch_cache_key(user_id))
+
+
+def set_principal_claims(token, user):
+    for claim in PRINCIPAL_CLAIMS:
+        value = getattr(user, claim)
+        token[claim] = value.isoformat() if isinstance(value, datetime) else value
+    token[TOKEN_EPOCH_CLAIM] = user.token_epoch
+
+
+class PrincipalRefreshToken(RefreshToken):
+    """
+    Refresh token carrying the user's role and status flags as claims.
+    Access tokens derived from it inherit those claims.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        set_principal_claims(token, user)
+        cache.add(_token_epoch_cache_key(user.pk), user.token_epoch, timeout=_token_epoch_timeout())
+        return token
+
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        if has_current_token_epoch(self):
+            return
+        # An older epoch only means the claims may be stale, unless the
+        # user's tokens were revoked since
+        revoked = (
+            User.objects
+            .filter(**{api_settings.USER_ID_FIELD: self[api_settings.USER_ID_CLAIM]})
+            .values_list('revoked_token_epoch', flat=True)
+            .first()
+        )
+        if revoked is None or self.get(TOKEN_EPOCH_CLAIM, 0) < revoked:
+            raise TokenError('Token has been revoked')
+
+    def check_blacklist(self):
+        # Only tokens the in-memory filter flags need the database lookup
+        if not blacklist_filter.might_contain(self.payload[api_settings.JTI_CLAIM]):
+            return
+        super().check_blacklist()
+        # Flagged by the filter but not actually blacklisted
+        blacklist_filter.record_false_positive()
+
+    def blacklist(self):
+        result = super().blacklist()
+        blacklist_filter.add(self.payload[api_settings.JTI_CLAIM])
+        return result
+
+    @property
+    def access_token(self):
+        access = super().access_token
+
+        # Re-read the user when the claims copied from the refresh token
+        # are out of date, so new access tokens always start out current
+        if not has_current_claims(self):
+            try:
+                user = User.objects.get(**{api_settings.USER_ID_FIELD: self[api_settings.USER_ID_CLAIM]})
+            except (KeyError, User.DoesNotExist):
+                raise TokenError('Token user not found')
+            if not user.is_active:
+                raise TokenError('Token user is inactive')
+            set_principal_claims(access, user)
+
+        return access
+
+
+class ClaimsPrincipal(TokenUser):
+    """Stateless user backed entirely by the claims of a validated token"""
+
+    @property
+    def user_id(self):
+        return self.id
+
+    @property
+    def is_active(self):
+        return self.token.get('is_active', False)
+
+    @property
+    def role(self):
+        return self.token.get('role')
+
+    @property
+    def profile_completed(self):
+        return self.token.get('profile_completed', False)
+
+    @property
+    def email_verified(self):
+        return self.token.get('email_verified', False)
+
+    @property
+    def email(self):
+        return self.token.get('email', '')
+
+    @property
+    def first_name(self):
+        return self.token.get('first_name', '')
+
+    @property
+    def last_name(self):
+        return self.token.get('last_name', '')
+
+    @property
+    def created_at(self):
+        # ISO 8601 string, as serializers would render it
+        return self.token.get('created_at')
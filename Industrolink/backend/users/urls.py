@@ -1,6 +1,6 @@
 # users/urls.py
 from django.urls import path
-from . import views
+from . import views, async_views
 
 urlpatterns = [
     path('register/', views.UserRegistrationView.as_view(), name='user-register'),
@@ -10,6 +10,7 @@ urlpatterns = [
     path('profile-view/', views.profile_view, name='profile-view'),
     path('profile/update/', views.profile_update_view, name='profile-update'),
     path('password/change/', views.password_change_view, name='password-change'),
+    path('password/set/', views.set_password_view, name='password-set'),
     path('logout/', views.logout_view, name='user-logout'),
     path('refresh/', views.refresh_token_view, name='refresh-token'),
     
@@ -17,4 +18,12 @@ urlpatterns = [
     path('verify-email/', views.verify_email_view, name='verify-email'),
     path('resend-verification/', views.resend_verification_email_view, name='resend-verification'),
     path('check-verification-status/', views.check_email_verification_status, name='check-verification-status'),
+    
+    # Async variants for ASGI deployments; password hashing runs in a process pool
+    path('async/login/', async_views.login_async_view, name='user-login-async'),
+    path('async/register/', async_views.register_async_view, name='user-register-async'),
+    path('async/password/change/', async_views.password_change_async_view, name='password-change-async'),
+    path('async/profile-status/', async_views.profile_status_async_view, name='profile-status-async'),
+    path('async/profile-view/', async_views.profile_async_view, name='profile-view-async'),
+    path('verification-status/stream/', async_views.verification_status_stream_view, name='verification-status-stream'),
 ]
@@ -1,81 +1,146 @@
-import uuid
+import hashlib
+import secrets
 from datetime import timedelta
+from django.contrib.auth.tokens import default_token_generator
+from django.db import transaction
+from django.db.models import F, Q
 from django.utils import timezone
-from django.core.mail import send_mail
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
 from django.conf import settings
+from .mailer import MailTemplate, queue_templated_mail
+from .models import EmailVerificationToken, User
+from .token_cache import token_cache
+from .tokens import cache_token_epoch
+from .events import email_verified_channel
 
 
 def generate_verification_token():
     """Generate a unique verification token"""
-    return str(uuid.uuid4())
+    return secrets.token_urlsafe(32)
 
 
-def send_verification_email(user, verification_url):
-    """Send verification email to user"""
-    subject = settings.EMAIL_VERIFICATION_SUBJECT
-    from_email = settings.EMAIL_VERIFICATION_FROM_EMAIL
-    to_email = user.email
+def hash_verification_token(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def issue_verification_token(user):
+    """
+    Replace the user's pending verification token with a new one and
+    return the raw token for the link. Only its hash is stored.
+    """
+    token = generate_verification_token()
+    now = timezone.now()
     
-    # Plain text email message
-    message = f"""
-Hello {user.first_name} {user.last_name},
+    EmailVerificationToken.objects.filter(user=user).delete()
+    EmailVerificationToken.objects.create(
+        user=user,
+        token_hash=hash_verification_token(token),
+        expires_at=now + timedelta(hours=settings.EMAIL_VERIFICATION_TOKEN_EXPIRE_HOURS),
+    )
+    User.objects.filter(pk=user.pk).update(email_verification_sent_at=now)
+    user.email_verification_sent_at = now
+    return token
+
 
-Thank you for registering with Industrolink! To complete your registration and access your account, please verify your email address by clicking the link below:
+def verification_mail_template():
+    return MailTemplate(
+        subject=settings.EMAIL_VERIFICATION_SUBJECT,
+        body_template_name='users/emails/verification_email.txt',
+        from_email=settings.EMAIL_VERIFICATION_FROM_EMAIL,
+    )
 
-{verification_url}
 
-Important: This verification link will expire in {settings.EMAIL_VERIFICATION_TOKEN_EXPIRE_HOURS} hours. If you don't verify your email within this time, you'll need to request a new verification email.
+def verification_context(user, verification_url):
+    return {
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'verification_url': verification_url,
+        'expire_hours': settings.EMAIL_VERIFICATION_TOKEN_EXPIRE_HOURS,
+    }
 
-If the link above doesn't work, you can copy and paste it into your browser.
 
-If you didn't create an account with Industrolink, please ignore this email.
+def queue_verification_email(user, verification_url):
+    """
+    Write the verification email to the outbox. Call inside the same
+    transaction as the user change; the send_outbox worker delivers it.
+    """
+    return queue_verification_emails([(user, verification_url)])[0]
 
-Best regards,
-The Industrolink Team
 
----
-This is an automated message from Industrolink. Please do not reply to this email.
-© 2025 Industrolink. All rights reserved.
-"""
-    
-    try:
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=from_email,
-            recipient_list=[to_email],
-            fail_silently=False,
-        )
-        return True
-    except Exception as e:
-        # In production, this should be logged to a proper logging system
-        # For now, we'll silently fail to avoid cluttering logs
-        return False
-
-
-def is_verification_token_expired(user):
-    """Check if verification token has expired"""
-    if not user.email_verification_sent_at:
-        return True
+def queue_verification_emails(users_and_urls):
+    """Queue verification emails for many users, compiling the template once"""
+    template = verification_mail_template()
+    return queue_templated_mail(template, [
+        (user.email, verification_context(user, verification_url))
+        for user, verification_url in users_and_urls
+    ])
+
+
+def start_email_verification(user):
+    """
+    Give the user a fresh verification token and queue the email for it.
+    Call inside the transaction that creates or updates the user.
+    """
+    verification_token = issue_verification_token(user)
     
-    expiry_time = user.email_verification_sent_at + timedelta(
-        hours=settings.EMAIL_VERIFICATION_TOKEN_EXPIRE_HOURS
-    )
-    return timezone.now() > expiry_time
+    frontend_url = settings.FRONTEND_URL
+    verification_url = f"{frontend_url}/verify-email?token={verification_token}&email={user.email}"
+    queue_verification_email(user, verification_url)
 
 
-def verify_email_token(user, token):
-    """Verify the email verification token"""
-    if user.email_verification_token != token:
-        return False, "Invalid verification token"
+def verify_email_token(email, token):
+    """
+    Verify an email with the token from its link. Returns
+    (user, verified, message); user is None for unknown emails.
+    
+    The happy path is one conditional UPDATE matched through the token
+    hash index, plus one SELECT for the user.
+    """
+    token_hash = hash_verification_token(token)
+    
+    updated = User.objects.filter(
+        email=email,
+        email_verified=False,
+        verification_tokens__token_hash=token_hash,
+        verification_tokens__expires_at__gt=timezone.now(),
+    ).update(email_verified=True, email_verification_sent_at=None, token_epoch=F('token_epoch') + 1)
+    
+    user = User.objects.filter(email=email).first()
+    if user is None:
+        return None, False, "Invalid verification token"
     
-    if is_verification_token_expired(user):
-        return False, "Verification token has expired"
+    if updated:
+        # update() skips the post_save handlers that refresh cached principals
+        cache_token_epoch(user)
+        token_cache.invalidate_user(user.pk)
+        # Wake any open verification-status streams for this email
+        transaction.on_commit(lambda: email_verified_channel.publish(user.email))
+        return user, True, "Email verified successfully"
     
-    # Mark email as verified
-    user.email_verified = True
-    user.email_verification_token = None
-    user.email_verification_sent_at = None
-    user.save()
+    if user.email_verified:
+        return user, True, "Email is already verified"
     
-    return True, "Email verified successfully"
+    if EmailVerificationToken.objects.filter(user=user, token_hash=token_hash).exists():
+        return user, False, "Verification token has expired"
+    return user, False, "Invalid verification token"
+
+
+def sweep_verification_tokens():
+    """Delete expired tokens and those of already verified users in bulk"""
+    deleted, _ = EmailVerificationToken.objects.filter(
+        Q(expires_at__lte=timezone.now()) | Q(user__email_verified=True)
+    ).delete()
+    return deleted
+
+
+def password_set_url(user):
+    """
+    Frontend link that lets `user` choose a password (set_password_view).
+    The token is Django's password reset token, so it stops working once a
+    password is set and after PASSWORD_RESET_TIMEOUT.
+    """
+    uid = urlsafe_base64_encode(force_bytes(user.pk))
+    token = default_token_generator.make_token(user)
+    frontend_url = settings.FRONTEND_URL
+    return f"{frontend_url}/set-password/{uid}/{token}"
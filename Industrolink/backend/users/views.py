@@ -1,18 +1,24 @@
 from rest_framework import status, generics, permissions
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, authentication_classes, throttle_classes
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import TokenError
 from django.contrib.auth import authenticate
-from .serializers import UserRegistrationSerializer, UserSerializer, EmailVerificationSerializer, ResendVerificationSerializer
+from .serializers import (
+    UserRegistrationSerializer, UserSerializer, EmailVerificationSerializer, ResendVerificationSerializer,
+    SetPasswordSerializer,
+)
 from supervisors.serializers import CompanySerializer, CompanyRegistrationSerializer
 from django.http import JsonResponse
 from django.conf import settings
-from .utils import generate_verification_token, send_verification_email, verify_email_token
-from django.utils import timezone
+from .utils import issue_verification_token, queue_verification_email, start_email_verification, verify_email_token
 from django.shortcuts import get_object_or_404
+from django.db import transaction
 from .models import User
+from .tokens import PrincipalRefreshToken, revoke_user_tokens
+from .authentication import CookieJWTClaimsAuthentication
+from .throttling import LoginIPThrottle, LoginEmailThrottle, VerificationIPThrottle, VerificationEmailThrottle
 
 
 # class UserRegistrationView(generics.CreateAPIView):
@@ -67,6 +73,8 @@ from .models import User
 # UPDATE your existing login_view function:
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@authentication_classes([])
+@throttle_classes([LoginIPThrottle, LoginEmailThrottle])
 def login_view(request):
     email = request.data.get('email')
     password = request.data.get('password')
@@ -79,7 +87,7 @@ def login_view(request):
     user = authenticate(request, username=email, password=password)
    
     if user:
-        refresh = RefreshToken.for_user(user)
+        refresh = PrincipalRefreshToken.for_user(user)
         access_token = refresh.access_token
         
         # Create response with user data (no tokens in JSON)
@@ -126,30 +134,22 @@ class UserRegistrationView(generics.CreateAPIView):
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user = serializer.save()
         
-        # Generate verification token and send verification email
-        verification_token = generate_verification_token()
-        user.email_verification_token = verification_token
-        user.email_verification_sent_at = timezone.now()
-        user.save()
-        
-        # Build verification URL
-        frontend_url = getattr(settings, 'FRONTEND_URL', 'http://localhost:3001')
-        verification_url = f"{frontend_url}/verify-email?token={verification_token}&email={user.email}"
-        
-        # Send verification email
-        email_sent = send_verification_email(user, verification_url)
+        # The user and its verification email are committed together; the
+        # send_outbox worker delivers the email outside the request
+        with transaction.atomic():
+            user = serializer.save()
+            start_email_verification(user)
         
         # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = PrincipalRefreshToken.for_user(user)
         access_token = refresh.access_token
         
         # Create response with user data (no tokens in JSON)
         response_data = {
             'message': 'User registered successfully. Please check your email to verify your account.',
             'user': UserSerializer(user).data,
-            'email_verification_sent': email_sent,
+            'email_verification_sent': True,
         }
         
         response = Response(response_data, status=status.HTTP_201_CREATED)
@@ -291,7 +291,7 @@ def refresh_token_view(request):
     
     try:
         # Validate and refresh the token
-        refresh = RefreshToken(refresh_token)
+        refresh = PrincipalRefreshToken(refresh_token)
         new_access_token = refresh.access_token
         
         response_data = {
@@ -322,8 +322,12 @@ def refresh_token_view(request):
 @permission_classes([permissions.IsAuthenticated])  # User must be authenticated
 def logout_view(request):
     """
-    Logout user by clearing HTTP-only cookies
+    Logout user by clearing HTTP-only cookies. With all_devices set,
+    every other session of the user is revoked as well.
     """
+    if request.data.get('all_devices'):
+        revoke_user_tokens(request.user)
+    
     response_data = {
         'message': 'Logged out successfully'
     }
@@ -356,9 +360,10 @@ def logout_view(request):
 
 
 @api_view(['GET'])
+@authentication_classes([CookieJWTClaimsAuthentication, JWTAuthentication])
 @permission_classes([IsAuthenticated])
 def profile_status_view(request):
-    
+    # Answered from the access token's claims, no user row is read
     user = request.user
     return Response({
         'profile_completed': user.profile_completed,
@@ -439,9 +444,32 @@ def password_change_view(request):
         user.set_password(new_password)
         user.save()
         
-        return Response({
+        # Sign out every other session, then give this one fresh tokens
+        revoke_user_tokens(user)
+        refresh = PrincipalRefreshToken.for_user(user)
+        
+        response = Response({
             'message': 'Password changed successfully'
         }, status=status.HTTP_200_OK)
+        response.set_cookie(
+            'access_token',
+            str(refresh.access_token),
+            max_age=60 * 15,  # 15 minutes
+            httponly=True,
+            secure=False,  # Set to True in production with HTTPS
+            samesite='Lax',
+            path='/'
+        )
+        response.set_cookie(
+            'refresh_token',
+            str(refresh),
+            max_age=60 * 60 * 24 * 7,  # 7 days
+            httponly=True,
+            secure=False,  # Set to True in production with HTTPS
+            samesite='Lax',
+            path='/'
+        )
+        return response
         
     except Exception as e:
         return Response({
@@ -478,14 +506,7 @@ def verify_email_view(request):
     token = serializer.validated_data['token']
     
     try:
-        user = get_object_or_404(User, email=email)
-        
-        if user.email_verified:
-            return Response({
-                'message': 'Email is already verified'
-            }, status=status.HTTP_200_OK)
-        
-        success, message = verify_email_token(user, token)
+        user, success, message = verify_email_token(email, token)
         
         if success:
             return Response({
@@ -505,6 +526,32 @@ def verify_email_view(request):
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@authentication_classes([])
+@throttle_classes([VerificationIPThrottle])
+def set_password_view(request):
+    """
+    Choose a password from an emailed link (users created by a cohort
+    import start without one). The link proves the address, so the email
+    counts as verified too.
+    """
+    serializer = SetPasswordSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    
+    user = serializer.validated_data['user']
+    user.set_password(serializer.validated_data['password'])
+    user.email_verified = True
+    user.email_verification_sent_at = None
+    user.save()
+    
+    return Response({
+        'message': 'Password set successfully. You can now log in.'
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.AllowAny])
+@authentication_classes([])
+@throttle_classes([VerificationIPThrottle, VerificationEmailThrottle])
 def resend_verification_email_view(request):
     """
     Resend verification email
@@ -512,34 +559,28 @@ def resend_verification_email_view(request):
     serializer = ResendVerificationSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
     
-    email = serializer.validated_data['email']
-    user = get_object_or_404(User, email=email)
-    
-    # Generate new verification token
-    verification_token = generate_verification_token()
-    user.email_verification_token = verification_token
-    user.email_verification_sent_at = timezone.now()
-    user.save()
-    
-    # Build verification URL
-    frontend_url = getattr(settings, 'FRONTEND_URL', 'http://localhost:5173')
-    verification_url = f"{frontend_url}/verify-email?token={verification_token}&email={user.email}"
+    user = serializer.validated_data['user']
     
-    # Send verification email
-    email_sent = send_verification_email(user, verification_url)
+    with transaction.atomic():
+        # Replace the pending verification token
+        verification_token = issue_verification_token(user)
+        
+        # Build verification URL
+        frontend_url = settings.FRONTEND_URL
+        verification_url = f"{frontend_url}/verify-email?token={verification_token}&email={user.email}"
+        
+        # Queue verification email for the send_outbox worker
+        queue_verification_email(user, verification_url)
     
-    if email_sent:
-        return Response({
-            'message': 'Verification email sent successfully'
-        }, status=status.HTTP_200_OK)
-    else:
-        return Response({
-            'error': 'Failed to send verification email'
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return Response({
+        'message': 'Verification email sent successfully'
+    }, status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
+@authentication_classes([])
+@throttle_classes([VerificationIPThrottle, VerificationEmailThrottle])
 def check_email_verification_status(request):
     """
     Check email verification status
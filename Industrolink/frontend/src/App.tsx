@@ -9,7 +9,9 @@ import MainLayout from './components/layout/MainLayout';
 import Login from './pages/auth/Login';
 import Register from './pages/auth/Register';
 import EmailVerification from './pages/auth/EmailVerification';
+import SetPassword from './pages/auth/SetPassword';
 import AdminRoutes from './routes/AdminRoutes';
+import AdminRegistration from './components/admin/AdminRegistration';
 
 // Dashboard Pages
 import StudentDashboard from './pages/dashboard/StudentDashboard';
@@ -90,6 +92,8 @@ function App(): React.ReactElement {
           isAuthenticated ? <Navigate to="/dashboard" replace /> : <Register />
         } />
         <Route path="/verify-email" element={<EmailVerification />} />
+        <Route path="/set-password/:uid/:token" element={<SetPassword />} />
+        <Route path="/admin-invite/:token" element={<AdminRegistration />} />
 
         {/* System Routes */}
         <Route path="/unauthorized" element={<Unauthorized />} />
@@ -102,7 +102,7 @@ const AdminInvitation: React.FC = () => {
   };
 
   const copyInviteLink = (token: string) => {
-    const inviteUrl = `${window.location.origin}/system-admin/register/${token}`;
+    const inviteUrl = `${window.location.origin}/admin-invite/${token}`;
     navigator.clipboard.writeText(inviteUrl);
     toast.success('Invitation link copied to clipboard');
   };
@@ -0,0 +1,127 @@
+import React, { useState } from 'react';
+import { useParams, useNavigate } from 'react-router-dom';
+import { Button } from '@/components/ui/button';
+import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card';
+import { Input } from '@/components/ui/input';
+import { Label } from '@/components/ui/label';
+import { Alert, AlertDescription } from '@/components/ui/alert';
+import { CheckCircle, XCircle, Lock } from 'lucide-react';
+import { setPassword } from '@/services/api/auth';
+
+const SetPassword: React.FC = () => {
+  const { uid, token } = useParams<{ uid: string; token: string }>();
+  const navigate = useNavigate();
+  const [status, setStatus] = useState<'idle' | 'saving' | 'success' | 'error'>('idle');
+  const [message, setMessage] = useState('');
+  const [password, setPasswordValue] = useState('');
+  const [passwordConfirm, setPasswordConfirm] = useState('');
+
+  const handleSubmit = async (e: React.FormEvent) => {
+    e.preventDefault();
+    if (!uid || !token) return;
+
+    if (password !== passwordConfirm) {
+      setStatus('error');
+      setMessage("Passwords don't match");
+      return;
+    }
+
+    setStatus('saving');
+    try {
+      const response = await setPassword(uid, token, password, passwordConfirm);
+      setStatus('success');
+      setMessage(response.message);
+    } catch (error: any) {
+      setStatus('error');
+      const data = error.data;
+      setMessage(data?.token?.[0] || data?.password?.[0] || data?.non_field_errors?.[0] || data?.error || 'Failed to set password');
+    }
+  };
+
+  return (
+    <div className="min-h-screen flex items-center justify-center bg-gray-50 py-12 px-4 sm:px-6 lg:px-8">
+      <div className="max-w-md w-full space-y-8">
+        <div className="text-center">
+          <Lock className="mx-auto h-12 w-12 text-blue-600" />
+          <h2 className="mt-6 text-3xl font-extrabold text-gray-900">
+            Choose Your Password
+          </h2>
+          <p className="mt-2 text-sm text-gray-600">
+            Your Industrolink account is ready. Set a password to sign in.
+          </p>
+        </div>
+
+        <Card>
+          <CardHeader>
+            <CardTitle>Set Password</CardTitle>
+            <CardDescription>
+              Use at least 8 characters
+            </CardDescription>
+          </CardHeader>
+          <CardContent className="space-y-6">
+            {status === 'error' && (
+              <Alert className="border-red-200 bg-red-50">
+                <XCircle className="h-4 w-4 text-red-600" />
+                <AlertDescription className="text-red-800">
+                  {message}
+                </AlertDescription>
+              </Alert>
+            )}
+
+            {status === 'success' ? (
+              <div className="text-center space-y-4">
+                <Alert className="border-green-200 bg-green-50">
+                  <CheckCircle className="h-4 w-4 text-green-600" />
+                  <AlertDescription className="text-green-800">
+                    {message}
+                  </AlertDescription>
+                </Alert>
+                <Button onClick={() => navigate('/login')} className="w-full" variant="default" size="default">
+                  Continue to Login
+                </Button>
+              </div>
+            ) : (
+              <form onSubmit={handleSubmit} className="space-y-4">
+                <div className="space-y-2">
+                  <Label htmlFor="password" className="text-sm font-medium text-gray-700">Password</Label>
+                  <Input
+                    id="password"
+                    type="password"
+                    value={password}
+                    onChange={(e: React.ChangeEvent<HTMLInputElement>) => setPasswordValue(e.target.value)}
+                    placeholder="Enter a password"
+                    className="w-full"
+                    required
+                  />
+                </div>
+                <div className="space-y-2">
+                  <Label htmlFor="password-confirm" className="text-sm font-medium text-gray-700">Confirm Password</Label>
+                  <Input
+                    id="password-confirm"
+                    type="password"
+                    value={passwordConfirm}
+                    onChange={(e: React.ChangeEvent<HTMLInputElement>) => setPasswordConfirm(e.target.value)}
+                    placeholder="Enter the password again"
+                    className="w-full"
+                    required
+                  />
+                </div>
+                <Button
+                  type="submit"
+                  disabled={status === 'saving'}
+                  className="w-full"
+                  variant="default"
+                  size="default"
+                >
+                  {status === 'saving' ? 'Saving...' : 'Set Password'}
+                </Button>
+              </form>
+            )}
+          </CardContent>
+        </Card>
+      </div>
+    </div>
+  );
+};
+
+export default SetPassword;
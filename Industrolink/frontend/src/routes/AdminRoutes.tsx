@@ -4,7 +4,6 @@ import AdminLayout from '../components/admin/AdminLayout';
 import AdminDashboard from '../components/admin/AdminDashboard';
 import UserManagement from '../components/admin/UserManagement';
 import AdminInvitation from '../components/admin/AdminInvitation';
-import AdminRegistration from '../components/admin/AdminRegistration';
 import ActivityLog from '../components/admin/ActivityLog';
 import Settings from '../components/admin/Settings';
 
@@ -16,9 +15,6 @@ const ProtectedRoute: React.FC<{ children: React.ReactNode }> = ({ children }) =
 const AdminRoutes: React.FC = () => {
   return (
     <Routes>
-      {/* Public admin routes */}
-      <Route path="/register/:token" element={<AdminRegistration />} />
-      
       {/* Protected admin routes - all nested under AdminLayout */}
       <Route
         path="/"
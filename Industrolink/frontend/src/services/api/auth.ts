@@ -333,6 +333,19 @@ export const verifyEmail = async (email: string, token: string): Promise<{ messa
   });
 };
 
+// Password links emailed to users created by a cohort import
+export const setPassword = async (
+  uid: string,
+  token: string,
+  password: string,
+  password_confirm: string
+): Promise<{ message: string }> => {
+  return apiRequest('/api/users/password/set/', {
+    method: 'POST',
+    body: JSON.stringify({ uid, token, password, password_confirm }),
+  });
+};
+
 export const resendVerificationEmail = async (email: string): Promise<{ message: string }> => {
   return apiRequest('/api/users/resend-verification/', {
     method: 'POST',